@@ -12,6 +12,7 @@ A toy structural engine reflecting Aurora’s reasoning pattern.
 
 from dataclasses import dataclass, asdict
 import json
+import re
 
 # -------------------------
 #   DATA STRUCTURES
@@ -33,15 +34,25 @@ class Interpretation:
 #   STATE UPDATER
 # -------------------------
 
+# Context phrase -> AuroraState field it sets. Add entries here to track new facts.
+CONTEXT_ATOMS = {
+    "emma's sister": "emma_has_sister",
+    "lucy's sister": "lucy_has_sister",
+}
+
+# One compiled pattern for all phrases: a single pass per sentence.
+_CONTEXT_PATTERN = re.compile(
+    "|".join(re.escape(p) for p in sorted(CONTEXT_ATOMS, key=len, reverse=True)),
+    re.IGNORECASE,
+)
+
+
 def update_state_with_context(state: AuroraState, sentence: str) -> None:
     # Normalize Unicode to ASCII first
     sentence = sentence.replace("’", "'")
 
-    text = sentence.lower()
-    if "emma's sister" in text:
-        state.emma_has_sister = True
-    if "lucy's sister" in text:
-        state.lucy_has_sister = True
+    for m in _CONTEXT_PATTERN.finditer(sentence):
+        setattr(state, CONTEXT_ATOMS[m.group().lower()], True)
 
 
 # -------------------------
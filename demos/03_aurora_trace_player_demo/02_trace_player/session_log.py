@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Session Log — recording replays as `user_choice` sessions
+
+Every replay can carry a SessionRecorder. It appends one record per event to
+a shared JSONL log:
+
+    {"session": "...", "trace_id": "...", "seq": 0, "ts": ..., "t": "session_start", "data": {...}}
+    {"session": "...", "trace_id": "...", "seq": 1, "ts": ..., "t": "user_choice",
+     "id": "u1", "after": "e3", "data": {"selected_key": "A", "answer": "Emma"}}
+    {"session": "...", "trace_id": "...", "seq": 2, "ts": ..., "t": "session_end", "data": {"stance": "..."}}
+
+`user_choice.data` follows `schema.md`; `after` is the id of the
+clarification_options event that was answered.
+
+SessionWriter is the only thing that touches the file. It keeps one
+O_APPEND descriptor open, buffers records in memory and writes them in
+batches (one os.write per batch, so concurrent writers never interleave
+partial lines), with fsync at most every `fsync_interval` seconds. Many
+recorders - e.g. thousands of headless replays on a thread pool - share one
+writer.
+
+`compact` folds session logs into a columnar summary of choice frequencies
+per (trace_id, selected_key).
+
+Run:
+  python session_log.py replay [n_sessions] [--threads N] [--log PATH]
+  python session_log.py compact [log ...] [--out PATH] [--merge]
+  python session_log.py show [--out PATH]
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from trace_player import HERE, TRACES_DIR, Trace, eprint, list_traces, load_trace, pop_option, replay
+
+# Session logs are user data, kept out of the source tree: $AURORA_SESSIONS_DIR,
+# else $XDG_DATA_HOME/aurora_trace_player (~/.local/share/aurora_trace_player).
+SESSIONS_DIR = os.environ.get("AURORA_SESSIONS_DIR") or os.path.join(
+    os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share"),
+    "aurora_trace_player")
+SESSION_LOG = os.path.join(SESSIONS_DIR, "sessions.jsonl")
+SUMMARY_PATH = os.path.join(SESSIONS_DIR, "choice_summary.json")
+SUMMARY_VERSION = 1
+
+
+# -------------------------
+#   Writer
+# -------------------------
+
+class SessionWriter:
+    """Append-only, batched JSONL writer shared by any number of recorders."""
+
+    def __init__(
+        self,
+        path: str = SESSION_LOG,
+        batch_size: int = 512,
+        flush_interval: float = 0.5,
+        fsync_interval: float = 2.0,
+    ) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        self._fd: Optional[int] = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._lock = threading.Lock()
+        self._buf: List[str] = []
+        self._last_flush = time.monotonic()
+        self._last_fsync = self._last_flush
+        self.records = 0
+        self.batches = 0
+        self.fsyncs = 0
+
+    def write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._fd is None:
+                raise ValueError("session writer is closed")
+            self._buf.append(line)
+            self.records += 1
+            if (len(self._buf) >= self.batch_size
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush_locked(sync=False)
+
+    def _flush_locked(self, sync: bool) -> None:
+        now = time.monotonic()
+        if self._buf:
+            data = memoryview("".join(self._buf).encode("utf-8"))
+            self._buf = []
+            while data:
+                data = data[os.write(self._fd, data):]
+            self.batches += 1
+        self._last_flush = now
+        if sync or now - self._last_fsync >= self.fsync_interval:
+            os.fsync(self._fd)
+            self.fsyncs += 1
+            self._last_fsync = now
+
+    def flush(self, sync: bool = False) -> None:
+        with self._lock:
+            if self._fd is not None:
+                self._flush_locked(sync)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fd is None:
+                return
+            self._flush_locked(sync=True)
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> "SessionWriter":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def session(self, trace: Trace, session_id: Optional[str] = None) -> "SessionRecorder":
+        return SessionRecorder(self, trace, session_id)
+
+
+# -------------------------
+#   Recorder
+# -------------------------
+
+class SessionRecorder:
+    """One replay session; pass as replay(trace, recorder=...)."""
+
+    def __init__(self, writer: SessionWriter, trace: Trace, session_id: Optional[str] = None) -> None:
+        self.writer = writer
+        self.trace_id = trace.trace_id
+        self.session_id = session_id or uuid.uuid4().hex
+        self.seq = 0
+        self.choices = 0
+        self._emit("session_start", {"title": trace.title, "version": trace.version})
+
+    def _emit(self, t: str, data: Dict[str, Any], **extra: Any) -> None:
+        record = {"session": self.session_id, "trace_id": self.trace_id,
+                  "seq": self.seq, "ts": time.time(), "t": t}
+        record.update(extra)
+        record["data"] = data
+        self.writer.write(record)
+        self.seq += 1
+
+    def user_choice(self, option: Dict[str, Any], after: str = "") -> None:
+        self.choices += 1
+        self._emit(
+            "user_choice",
+            {"selected_key": str(option.get("key", "")), "answer": str(option.get("answer", ""))},
+            id=f"u{self.choices}", after=after,
+        )
+
+    def end(self, stance: str) -> None:
+        self._emit("session_end", {"stance": stance})
+
+
+# -------------------------
+#   Compaction
+# -------------------------
+
+def iter_records(paths: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Records of session logs; a torn last line (crash mid-batch) is skipped."""
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def _empty_summary() -> Dict[str, Any]:
+    return {
+        "version": SUMMARY_VERSION,
+        "sessions": 0,
+        "columns": {"trace_id": [], "selected_key": [], "answer": [], "count": [], "frequency": []},
+    }
+
+
+def compact(paths: Iterable[str], base: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Columnar choice-frequency summary of session logs:
+
+        columns.trace_id[i], columns.selected_key[i]  ->  count[i], frequency[i]
+
+    frequency is the share of all choices recorded for that trace. `base` (an
+    earlier summary) is merged in, so logs can be compacted and then rotated.
+    """
+    counts: Dict[Tuple[str, str], int] = {}
+    answers: Dict[Tuple[str, str], str] = {}
+    sessions = 0
+    if base is not None:
+        if base.get("version") != SUMMARY_VERSION:
+            raise ValueError("unsupported choice summary version")
+        cols = base["columns"]
+        sessions = int(base.get("sessions", 0))
+        for tid, key, answer, n in zip(cols["trace_id"], cols["selected_key"], cols["answer"], cols["count"]):
+            counts[(tid, key)] = counts.get((tid, key), 0) + int(n)
+            answers[(tid, key)] = answer
+
+    for rec in iter_records(paths):
+        t = rec.get("t")
+        if t == "session_start":
+            sessions += 1
+        elif t == "user_choice":
+            data = rec.get("data", {})
+            k = (str(rec.get("trace_id", "")), str(data.get("selected_key", "")))
+            counts[k] = counts.get(k, 0) + 1
+            answers[k] = str(data.get("answer", ""))
+
+    per_trace: Dict[str, int] = {}
+    for (tid, _), n in counts.items():
+        per_trace[tid] = per_trace.get(tid, 0) + n
+
+    summary = _empty_summary()
+    summary["sessions"] = sessions
+    cols = summary["columns"]
+    for (tid, key) in sorted(counts):
+        n = counts[(tid, key)]
+        cols["trace_id"].append(tid)
+        cols["selected_key"].append(key)
+        cols["answer"].append(answers[(tid, key)])
+        cols["count"].append(n)
+        cols["frequency"].append(round(n / per_trace[tid], 6))
+    return summary
+
+
+def load_summary(path: str = SUMMARY_PATH) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_summary(summary: Dict[str, Any], path: str = SUMMARY_PATH) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def print_summary(summary: Dict[str, Any]) -> None:
+    cols = summary["columns"]
+    print(f"{summary['sessions']} sessions, {sum(cols['count'])} choices")
+    for tid, key, answer, n, freq in zip(cols["trace_id"], cols["selected_key"], cols["answer"],
+                                         cols["count"], cols["frequency"]):
+        print(f"  {tid:20}  {key:3} {n:8d}  {freq:6.1%}  {answer}")
+
+
+# -------------------------
+#   Headless replays
+# -------------------------
+
+def _discard(*args: Any, **kwargs: Any) -> None:
+    pass
+
+
+def run_headless(traces: List[Trace], n_sessions: int, writer: SessionWriter,
+                 threads: int = 32, seed: int = 0) -> None:
+    """Replay n_sessions random traces concurrently with random choices."""
+    def one(i: int) -> None:
+        rng = random.Random(seed * 1_000_003 + i)
+        trace = rng.choice(traces)
+        replay(trace, chooser=rng.choice, recorder=writer.session(trace), out=_discard)
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for _ in pool.map(one, range(n_sessions)):
+            pass
+
+
+# -------------------------
+#   CLI
+# -------------------------
+
+def main(argv: List[str]) -> int:
+    args = list(argv[1:])
+    log_path = pop_option(args, "--log", SESSION_LOG)
+    out_path = pop_option(args, "--out", SUMMARY_PATH)
+    threads = int(pop_option(args, "--threads", "32"))
+    merge = "--merge" in args
+    if merge:
+        args.remove("--merge")
+    if not args or args[0] not in ("replay", "compact", "show"):
+        eprint(__doc__.split("Run:")[1].rstrip())
+        return 2
+
+    cmd, rest = args[0], args[1:]
+    if cmd == "replay":
+        n = int(rest[0]) if rest else 1000
+        traces = [load_trace(os.path.join(TRACES_DIR, fname)) for _, _, fname in list_traces()]
+        if not traces:
+            eprint("No traces found in:", TRACES_DIR)
+            return 2
+        t0 = time.perf_counter()
+        with SessionWriter(log_path) as writer:
+            run_headless(traces, n, writer, threads=threads)
+        secs = time.perf_counter() - t0
+        print(f"{n} sessions on {threads} threads in {secs:.2f}s ({n / secs:.0f} sessions/s): "
+              f"{writer.records} records, {writer.batches} batches, {writer.fsyncs} fsyncs -> {log_path}")
+        return 0
+
+    if cmd == "compact":
+        logs = rest or [log_path]
+        base = load_summary(out_path) if merge else None
+        summary = compact(logs, base=base)
+        write_summary(summary, out_path)
+        print_summary(summary)
+        print(f"-> {out_path}")
+        return 0
+
+    summary = load_summary(out_path)
+    if summary is None:
+        eprint("No summary yet. Run: python session_log.py compact")
+        return 2
+    print_summary(summary)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv))
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Trace Index — inverted index and query engine over trace corpora
+
+Answers multi-field questions across a trace archive, e.g.
+
+    kind=pronoun_antecedent span="her sister" stance=refusal_unresolved
+
+without calling `load_trace` on every file. Each trace is indexed under the
+event fields defined in `schema.md`:
+
+    type        event type (`t`) of any event
+    kind        ambiguity_detected.kind
+    span        ambiguity_detected.span
+    candidate   ambiguity_detected.candidates[*]
+    bind_key    clarification_options.options[*].binds keys and
+                binding_committed.binding keys
+    bind_value  the corresponding values
+    stance      terminal_stance.stance
+    speaker     utterance.speaker
+    trace_id, version
+
+Values are matched case-insensitively after whitespace normalisation. Fields
+are matched per trace: a query holds for a trace when every field=value term
+occurs somewhere in it.
+
+The index is built incrementally: files are keyed by path, size and mtime, so
+`update` only re-reads new or changed traces and drops deleted ones. Postings
+are sorted doc-id lists; a query intersects them shortest-first with
+galloping search.
+
+Run:
+  python trace_index.py build [traces_dir] [--index PATH]
+  python trace_index.py query field=value [field=value ...] [--index PATH]
+  python trace_index.py fields [--index PATH]
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from trace_player import HERE, TRACES_DIR, eprint, pop_option
+
+INDEX_PATH = os.path.join(HERE, ".trace_index.json")
+INDEX_VERSION = 2
+
+FIELDS = ("type", "kind", "span", "candidate", "bind_key", "bind_value",
+          "stance", "speaker", "trace_id", "version")
+
+
+def norm(value: Any) -> str:
+    """Casefolded, whitespace-collapsed, curly apostrophes straightened (traces mix both)."""
+    s = str(value).replace("’", "'").replace("‘", "'")
+    return " ".join(s.split()).casefold()
+
+
+def trace_terms(obj: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """Distinct (field, value) terms of one raw trace object."""
+    terms = {("trace_id", norm(obj.get("trace_id", ""))), ("version", norm(obj.get("version", "")))}
+    for ev in obj.get("events", []):
+        t = ev.get("t", "")
+        data = ev.get("data", {}) or {}
+        terms.add(("type", norm(t)))
+        if t == "utterance":
+            terms.add(("speaker", norm(data.get("speaker", ""))))
+        elif t == "ambiguity_detected":
+            terms.add(("kind", norm(data.get("kind", ""))))
+            terms.add(("span", norm(data.get("span", ""))))
+            for c in data.get("candidates", []):
+                terms.add(("candidate", norm(c)))
+        elif t == "clarification_options":
+            for o in data.get("options", []):
+                for k, v in (o.get("binds", {}) or {}).items():
+                    terms.add(("bind_key", norm(k)))
+                    terms.add(("bind_value", norm(v)))
+        elif t == "binding_committed":
+            for k, v in (data.get("binding", {}) or {}).items():
+                terms.add(("bind_key", norm(k)))
+                terms.add(("bind_value", norm(v)))
+        elif t == "terminal_stance":
+            terms.add(("stance", norm(data.get("stance", ""))))
+    return sorted(terms)
+
+
+def _term_key(field: str, value: str) -> str:
+    return f"{field}={value}"
+
+
+# -------------------------
+#   Postings intersection
+# -------------------------
+
+def _gallop(postings: List[int], target: int, lo: int) -> int:
+    """First index >= lo with postings[index] >= target (exponential + binary search)."""
+    step = 1
+    hi = lo
+    n = len(postings)
+    while hi < n and postings[hi] < target:
+        lo = hi + 1
+        hi += step
+        step <<= 1
+    return bisect_left(postings, target, lo, min(hi + 1, n))
+
+
+def intersect(lists: Iterable[List[int]]) -> List[int]:
+    """Intersection of sorted doc-id lists, shortest first."""
+    ordered = sorted(lists, key=len)
+    if not ordered:
+        return []
+    result = ordered[0]
+    for postings in ordered[1:]:
+        if not result:
+            break
+        out: List[int] = []
+        pos = 0
+        for doc in result:
+            pos = _gallop(postings, doc, pos)
+            if pos == len(postings):
+                break
+            if postings[pos] == doc:
+                out.append(doc)
+        result = out
+    return list(result)
+
+
+# -------------------------
+#   Index
+# -------------------------
+
+class TraceIndex:
+    """Inverted index: 'field=value' -> sorted doc ids; docs keyed by file path."""
+
+    def __init__(self) -> None:
+        self.docs: Dict[int, Dict[str, Any]] = {}     # id -> {path, size, mtime, trace_id, title, terms}
+        self.by_path: Dict[str, int] = {}
+        self.postings: Dict[str, List[int]] = {}
+        self.next_id = 0
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    # ---- maintenance ----
+
+    def add(self, path: str, obj: Dict[str, Any], size: int = 0, mtime: float = 0.0) -> int:
+        """Index one trace object (replacing any earlier version of the same path)."""
+        path = os.path.abspath(path)
+        if path in self.by_path:
+            self.remove(path)
+        doc = self.next_id
+        self.next_id += 1
+        terms = [_term_key(f, v) for f, v in trace_terms(obj)]
+        self.docs[doc] = {
+            "path": path, "size": size, "mtime": mtime,
+            "trace_id": str(obj.get("trace_id", "")), "title": str(obj.get("title", "")),
+            "terms": terms,
+        }
+        self.by_path[path] = doc
+        for term in terms:
+            # new ids are the largest so far: appending keeps postings sorted
+            self.postings.setdefault(term, []).append(doc)
+        return doc
+
+    def remove(self, path: str) -> bool:
+        doc = self.by_path.pop(os.path.abspath(path), None)
+        if doc is None:
+            return False
+        for term in self.docs.pop(doc)["terms"]:
+            postings = self.postings[term]
+            i = bisect_left(postings, doc)
+            if i < len(postings) and postings[i] == doc:
+                del postings[i]
+            if not postings:
+                del self.postings[term]
+        return True
+
+    def update(self, traces_dir: str = TRACES_DIR) -> Dict[str, int]:
+        """Incremental build: (re)index new or changed *.json files, drop deleted ones."""
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0, "skipped": 0}
+        seen = set()
+        for name in sorted(os.listdir(traces_dir)) if os.path.isdir(traces_dir) else []:
+            if not name.endswith(".json"):
+                continue
+            path = os.path.abspath(os.path.join(traces_dir, name))
+            seen.add(path)
+            st = os.stat(path)
+            doc = self.by_path.get(path)
+            if doc is not None and self.docs[doc]["size"] == st.st_size and self.docs[doc]["mtime"] == st.st_mtime:
+                stats["unchanged"] += 1
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    obj = json.load(f)
+            except (OSError, ValueError):
+                stats["skipped"] += 1
+                continue
+            self.add(path, obj, st.st_size, st.st_mtime)
+            stats["updated" if doc is not None else "added"] += 1
+
+        root = os.path.abspath(traces_dir) + os.sep
+        for path in [p for p in self.by_path if p.startswith(root) and p not in seen]:
+            self.remove(path)
+            stats["removed"] += 1
+        return stats
+
+    # ---- queries ----
+
+    def lookup(self, field: str, value: Any) -> List[int]:
+        if field not in FIELDS:
+            raise ValueError(f"unknown field {field!r} (expected one of {', '.join(FIELDS)})")
+        return self.postings.get(_term_key(field, norm(value)), [])
+
+    def query(self, **terms: Any) -> List[Dict[str, Any]]:
+        """Docs matching every field=value term, e.g. query(kind=..., span=..., stance=...)."""
+        if not terms:
+            ids = sorted(self.docs)
+        else:
+            ids = intersect(self.lookup(f, v) for f, v in terms.items())
+        return [self.docs[i] for i in ids]
+
+    def values(self, field: str) -> Dict[str, int]:
+        """Distinct values of a field with their document frequencies."""
+        prefix = field + "="
+        return {k[len(prefix):]: len(p) for k, p in self.postings.items() if k.startswith(prefix)}
+
+    # ---- persistence ----
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "version": INDEX_VERSION,
+            "next_id": self.next_id,
+            "docs": {str(k): v for k, v in self.docs.items()},
+        }
+
+    @classmethod
+    def from_json(cls, obj: Dict[str, Any]) -> "TraceIndex":
+        if obj.get("version") != INDEX_VERSION:
+            raise ValueError("unsupported trace index version")
+        index = cls()
+        index.next_id = int(obj["next_id"])
+        for key in sorted(obj["docs"], key=int):
+            doc = int(key)
+            meta = obj["docs"][key]
+            index.docs[doc] = meta
+            index.by_path[meta["path"]] = doc
+            for term in meta["terms"]:
+                index.postings.setdefault(term, []).append(doc)
+        return index
+
+    def save(self, path: str = INDEX_PATH) -> None:
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f, ensure_ascii=True)
+        os.replace(tmp, path)
+
+
+def load_index(path: str = INDEX_PATH) -> TraceIndex:
+    """Load a saved index, or an empty one if none exists yet or it has another INDEX_VERSION."""
+    if not os.path.exists(path):
+        return TraceIndex()
+    with open(path, "r", encoding="utf-8") as f:
+        obj = json.load(f)
+    if obj.get("version") != INDEX_VERSION:
+        return TraceIndex()     # terms were normalized differently: rebuild from scratch
+    return TraceIndex.from_json(obj)
+
+
+def iter_matches(index: TraceIndex, **terms: Any) -> Iterator[Tuple[str, str, str]]:
+    for doc in index.query(**terms):
+        yield doc["trace_id"], doc["title"], doc["path"]
+
+
+# -------------------------
+#   CLI
+# -------------------------
+
+def main(argv: List[str]) -> int:
+    args = list(argv[1:])
+    index_path = pop_option(args, "--index", INDEX_PATH)
+    if not args or args[0] not in ("build", "query", "fields"):
+        eprint(__doc__.split("Run:")[1].rstrip())
+        return 2
+
+    cmd, rest = args[0], args[1:]
+    if cmd == "build":
+        traces_dir = rest[0] if rest else TRACES_DIR
+        index = load_index(index_path)
+        t0 = time.perf_counter()
+        stats = index.update(traces_dir)
+        index.save(index_path)
+        print(f"Indexed {len(index)} traces in {time.perf_counter() - t0:.3f}s: {stats}")
+        return 0
+
+    index = load_index(index_path)
+    if not len(index):
+        eprint("Index is empty. Run: python trace_index.py build")
+        return 2
+
+    if cmd == "fields":
+        for field in FIELDS:
+            print(f"{field}:")
+            for value, df in sorted(index.values(field).items()):
+                print(f"  {value}  ({df})")
+        return 0
+
+    terms: Dict[str, str] = {}
+    for arg in rest:
+        field, sep, value = arg.partition("=")
+        if not sep:
+            eprint(f"Expected field=value, got {arg!r}")
+            return 2
+        terms[field.strip()] = value
+    try:
+        t0 = time.perf_counter()
+        matches = list(iter_matches(index, **terms))
+        ms = (time.perf_counter() - t0) * 1e3
+    except ValueError as exc:
+        eprint(str(exc))
+        return 2
+    for tid, title, path in matches:
+        print(f"  {tid:20}  {title}  ({os.path.basename(path)})")
+    print(f"{len(matches)} of {len(index)} traces match ({ms:.2f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv))
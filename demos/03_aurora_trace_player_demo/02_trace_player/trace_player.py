@@ -14,6 +14,13 @@ IMPORTANT:
 - This is NOT a reasoning engine.
 - No ambiguity extraction is performed here.
 - The traces are hand-authored / precomputed evidence artifacts.
+
+Run:
+  python trace_player.py [trace_id] [--log PATH] [--no-record]
+  python trace_player.py --list
+
+Each replay appends its choices to a session log (default: session_log.SESSION_LOG,
+in the user data directory); --log picks another file, --no-record writes nothing.
 """
 
 from __future__ import annotations
@@ -21,10 +28,18 @@ from __future__ import annotations
 import json
 import os
 import sys
+import time
+from collections import Counter
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 HERE = os.path.dirname(os.path.abspath(__file__))
+try:
+    from aurora_metrics import METRICS  # demos/metrics, when on sys.path (see its README)
+except ImportError:  # no metrics registry: instrumentation stays off
+    from types import SimpleNamespace
+    METRICS = SimpleNamespace(enabled=False)
+
 TRACES_DIR = os.path.join(HERE, "traces")
 SCHEMA_VERSION = "1.0"
 
@@ -33,6 +48,16 @@ def eprint(*args: Any) -> None:
     print(*args, file=sys.stderr)
 
 
+def pop_option(args: List[str], name: str, default: str) -> str:
+    """Remove `name VALUE` from args and return VALUE (default if absent)."""
+    if name in args:
+        i = args.index(name)
+        value = args[i + 1]
+        del args[i:i + 2]
+        return value
+    return default
+
+
 @dataclass
 class Trace:
     trace_id: str
@@ -43,7 +68,14 @@ class Trace:
     events: List[Dict[str, Any]]
 
 
-def load_trace(path: str) -> Trace:
+def load_trace(path: str, store: Any = None) -> Trace:
+    """
+    Load a trace from a JSON file, or with `store` (a trace_store.TraceStore)
+    rehydrate it lazily from the store, `path` being the trace_id.
+    """
+    if store is not None:
+        return store.load_trace(path)
+
     with open(path, "r", encoding="utf-8") as f:
         obj = json.load(f)
 
@@ -88,14 +120,29 @@ def prompt_choice(options: List[Dict[str, Any]]) -> Dict[str, Any]:
         print("Invalid choice. Try again.")
 
 
-def replay(trace: Trace) -> None:
-    print("=" * 72)
-    print(f"Aurora Trace Player (Reference) — {trace.title}")
-    print(f"trace_id: {trace.trace_id}   schema: {trace.version}   created: {trace.created_utc}")
-    print("=" * 72)
-    print("SOURCE TEXT:")
-    print(trace.source_text)
-    print("-" * 72)
+def replay(
+    trace: Trace,
+    chooser: Optional[Callable[[List[Dict[str, Any]]], Dict[str, Any]]] = None,
+    recorder: Any = None,
+    out: Callable[..., None] = print,
+) -> None:
+    """
+    Replay a trace.
+
+    chooser:  picks a clarification option (default: prompt on stdin)
+    recorder: optional session recorder (session_log.SessionRecorder); receives
+              a user_choice event per choice and the terminal stance
+    out:      output sink (default: print); headless replays pass a no-op
+    """
+    choose = chooser or prompt_choice
+    t0 = time.perf_counter() if METRICS.enabled else 0.0
+    out("=" * 72)
+    out(f"Aurora Trace Player (Reference) — {trace.title}")
+    out(f"trace_id: {trace.trace_id}   schema: {trace.version}   created: {trace.created_utc}")
+    out("=" * 72)
+    out("SOURCE TEXT:")
+    out(trace.source_text)
+    out("-" * 72)
 
     # Store chosen bindings for placeholder replacement
     bindings: Dict[str, str] = {}
@@ -107,67 +154,91 @@ def replay(trace: Trace) -> None:
         t = ev.get("t")
         data = ev.get("data", {})
         if t == "utterance":
-            print(f'USER: {data.get("text","")}')
+            out(f'USER: {data.get("text","")}')
         elif t == "ambiguity_detected":
-            print("\nAMBIGUITY DETECTED → REFUSAL")
-            print(f'  kind: {data.get("kind","")}')
-            print(f'  span: {data.get("span","")}')
+            out("\nAMBIGUITY DETECTED → REFUSAL")
+            out(f'  kind: {data.get("kind","")}')
+            out(f'  span: {data.get("span","")}')
             q = data.get("question", "")
             if q:
-                print(f"  question: {q}")
+                out(f"  question: {q}")
         elif t == "clarification_options":
             options = data.get("options", [])
             if not options:
-                print("\n(No clarification options provided in trace.)")
+                out("\n(No clarification options provided in trace.)")
             else:
-                print("\nCLARIFICATION OPTIONS (bounded):")
+                out("\nCLARIFICATION OPTIONS (bounded):")
                 for o in options:
-                    print(f'  {o.get("key")}: {o.get("answer")}')
-                chosen = prompt_choice(options)
+                    out(f'  {o.get("key")}: {o.get("answer")}')
+                chosen = choose(options)
+                if recorder is not None:
+                    recorder.user_choice(chosen, after=str(ev.get("id", "")))
                 binds = chosen.get("binds", {})
                 # record bindings
                 for k, v in binds.items():
                     bindings[str(k)] = str(v)
-                print(f'\nYou chose: {chosen.get("answer")}')
-                print(f"Bindings committed (session): {binds}")
+                out(f'\nYou chose: {chosen.get("answer")}')
+                out(f"Bindings committed (session): {binds}")
         elif t == "binding_committed":
             b = dict(data.get("binding", {}))
             # replace placeholder markers if present
             for k in list(b.keys()):
                 if b[k] == "<CHOICE>":
                     b[k] = bindings.get(k, "<UNBOUND>")
-            print("\nBINDING COMMITTED")
-            print(f'  policy: {data.get("commit_policy","")}')
-            print(f"  binding: {b}")
+            out("\nBINDING COMMITTED")
+            out(f'  policy: {data.get("commit_policy","")}')
+            out(f"  binding: {b}")
         elif t == "resolved_interpretation":
             interp = str(data.get("interpretation", ""))
             # naive placeholder replacement for display
             for k, v in bindings.items():
                 interp = interp.replace("<CHOICE>", v)
-            print("\nRESOLVED INTERPRETATION")
-            print(f"  {interp}")
+            out("\nRESOLVED INTERPRETATION")
+            out(f"  {interp}")
             facts = data.get("facts", [])
             if facts:
-                print("  facts (reference-only):")
+                out("  facts (reference-only):")
                 for fact in facts:
                     fact_str = str(fact).replace("<CHOICE>", next(iter(bindings.values()), "<UNBOUND>"))
-                    print(f"   - {fact_str}")
+                    out(f"   - {fact_str}")
         elif t == "terminal_stance":
-            print("\nTERMINAL STANCE")
-            print(f'  stance: {data.get("stance","")}')
+            if recorder is not None:
+                recorder.end(str(data.get("stance", "")))
+            out("\nTERMINAL STANCE")
+            out(f'  stance: {data.get("stance","")}')
             notes = data.get("notes", "")
             if notes:
-                print(f"  notes: {notes}")
-            print("-" * 72)
-            print("REFERENCE TRACE — NON-OPERATIONAL DEMONSTRATOR")
-            print("=" * 72)
+                out(f"  notes: {notes}")
+            out("-" * 72)
+            out("REFERENCE TRACE — NON-OPERATIONAL DEMONSTRATOR")
+            out("=" * 72)
         else:
             # unknown event type: ignore
             pass
         i += 1
 
+    if METRICS.enabled:
+        _publish_replay(trace, time.perf_counter() - t0)
+
+
+def _publish_replay(trace: Trace, secs: float) -> None:
+    by_type = Counter(str(ev.get("t", "")) for ev in trace.events)
+    METRICS.counter("replay_sessions_total", "Trace replays").inc(trace_id=trace.trace_id)
+    events = METRICS.counter("replay_events_total", "Replayed events by type")
+    for t, n in by_type.items():
+        events.inc(n, type=t)
+    METRICS.histogram("replay_seconds", "replay duration (includes prompts)").observe(secs)
+    METRICS.gauge("replay_events_per_second", "Replayed events per second, last replay").set(
+        len(trace.events) / secs if secs > 0 else 0.0)
+
 
 def main(argv: List[str]) -> int:
+    argv = list(argv)
+    record = "--no-record" not in argv
+    if not record:
+        argv.remove("--no-record")
+    log_path = pop_option(argv, "--log", "")
+
     traces = list_traces()
     if not traces:
         eprint("No traces found. Expected JSON traces in:", TRACES_DIR)
@@ -217,7 +288,14 @@ def main(argv: List[str]) -> int:
     if tr.version != SCHEMA_VERSION:
         eprint(f"Warning: trace schema version {tr.version} != expected {SCHEMA_VERSION}")
 
-    replay(tr)
+    if not record:
+        replay(tr)
+        return 0
+
+    from session_log import SESSION_LOG, SessionWriter  # imports this module
+
+    with SessionWriter(log_path or SESSION_LOG) as writer:
+        replay(tr, recorder=writer.session(tr))
     return 0
 
 
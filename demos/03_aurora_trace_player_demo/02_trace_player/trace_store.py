@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Trace Store — content-addressed deduplication of trace events and strings
+
+Traces repeat the same source texts, questions, clarification options and
+`binds` payloads. The store hash-conses every JSON node of every trace:
+
+- each distinct string is stored once;
+- each dict / list is stored once, as the ids of its (already interned)
+  children, so identical payloads (an option, a `binds` object, a whole event)
+  collapse to one node no matter how many traces contain them.
+
+On disk a store is one append-only JSONL file of nodes plus trace records:
+
+    ["s", "text"]                  string           (id = line order of nodes)
+    ["v", 3]                       other scalar
+    ["l", [id, id, ...]]           list
+    ["d", [key_id, val_id, ...]]   dict (insertion order kept)
+    ["T", "trace_id", root_id]     trace record (latest record wins)
+
+Loading reads the node table only. `load_trace` rehydrates a Trace lazily: the
+top-level fields are materialised, events are built on first access, and every
+node is materialised once and shared by all traces that contain it. Shared
+payloads must therefore be treated as read-only (the player never mutates
+them).
+
+Run:
+  python trace_store.py build [traces_dir] [--store DIR]
+  python trace_store.py stats [--store DIR]
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+from trace_player import HERE, TRACES_DIR, Trace, eprint, pop_option
+
+STORE_DIR = os.path.join(HERE, ".trace_store")
+STORE_FILE = "nodes.jsonl"
+
+REQUIRED_KEYS = ("trace_id", "title", "version", "created_utc", "source_text", "events")
+
+
+class LazyEvents(Sequence):
+    """Read-only event list whose items are materialised on first access."""
+
+    def __init__(self, store: "TraceStore", ids: List[int]) -> None:
+        self._store = store
+        self._ids = ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._store.materialize(n) for n in self._ids[i]]
+        return self._store.materialize(self._ids[i])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for n in self._ids:
+            yield self._store.materialize(n)
+
+
+class TraceStore:
+    """Hash-consed node table plus trace_id -> root node id."""
+
+    def __init__(self, root: str = STORE_DIR) -> None:
+        self.root = root
+        self.path = os.path.join(root, STORE_FILE)
+        self.nodes: List[Tuple[str, Any]] = []
+        self.roots: Dict[str, int] = {}
+        self._ids: Dict[Any, int] = {}            # content key -> node id
+        self._objects: Dict[int, Any] = {}        # materialised nodes (shared)
+        self._pending: List[str] = []
+        self.added_nodes = 0                      # nodes offered to intern (incl. duplicates)
+
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._load_record(json.loads(line))
+
+    # ---- interning ----
+
+    def _load_record(self, rec: List[Any]) -> None:
+        tag = rec[0]
+        if tag == "T":
+            self.roots[rec[1]] = rec[2]
+            return
+        payload = tuple(rec[1]) if tag in ("l", "d") else rec[1]
+        self._ids[self._key(tag, payload)] = len(self.nodes)
+        self.nodes.append((tag, payload))
+
+    @staticmethod
+    def _key(tag: str, payload: Any) -> Any:
+        if tag == "v":
+            # keep True / 1 / 1.0 apart
+            return (tag, type(payload).__name__, payload)
+        return (tag, payload)
+
+    def _node(self, tag: str, payload: Any) -> int:
+        self.added_nodes += 1
+        key = self._key(tag, payload)
+        nid = self._ids.get(key)
+        if nid is None:
+            nid = len(self.nodes)
+            self._ids[key] = nid
+            self.nodes.append((tag, payload))
+            stored = list(payload) if tag in ("l", "d") else payload
+            self._pending.append(json.dumps([tag, stored], ensure_ascii=False))
+        return nid
+
+    def intern(self, value: Any) -> int:
+        """Intern a JSON value bottom-up; returns its node id."""
+        if isinstance(value, str):
+            return self._node("s", value)
+        if isinstance(value, dict):
+            flat: List[int] = []
+            for k, v in value.items():
+                flat.append(self.intern(str(k)))
+                flat.append(self.intern(v))
+            return self._node("d", tuple(flat))
+        if isinstance(value, (list, tuple)):
+            return self._node("l", tuple(self.intern(v) for v in value))
+        return self._node("v", value)
+
+    def add(self, obj: Dict[str, Any]) -> int:
+        for key in REQUIRED_KEYS:
+            if key not in obj:
+                raise ValueError(f"Trace missing required key: {key}")
+        root = self.intern(obj)
+        tid = str(obj["trace_id"])
+        if self.roots.get(tid) != root:
+            self.roots[tid] = root
+            self._pending.append(json.dumps(["T", tid, root], ensure_ascii=False))
+        return root
+
+    def add_file(self, path: str) -> int:
+        with open(path, "r", encoding="utf-8") as f:
+            return self.add(json.load(f))
+
+    def add_dir(self, traces_dir: str = TRACES_DIR) -> int:
+        n = 0
+        for name in sorted(os.listdir(traces_dir)):
+            if name.endswith(".json"):
+                try:
+                    self.add_file(os.path.join(traces_dir, name))
+                    n += 1
+                except (OSError, ValueError):
+                    continue
+        return n
+
+    def flush(self) -> None:
+        """Append new nodes and trace records to the store file."""
+        if not self._pending:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(self._pending) + "\n")
+        self._pending = []
+
+    # ---- rehydration ----
+
+    def materialize(self, nid: int) -> Any:
+        obj = self._objects.get(nid)
+        if obj is not None or nid in self._objects:
+            return obj
+        tag, payload = self.nodes[nid]
+        if tag == "s" or tag == "v":
+            obj = payload
+        elif tag == "l":
+            obj = [self.materialize(c) for c in payload]
+        else:
+            obj = {self.materialize(payload[i]): self.materialize(payload[i + 1])
+                   for i in range(0, len(payload), 2)}
+        self._objects[nid] = obj
+        return obj
+
+    def _fields(self, nid: int) -> Dict[str, int]:
+        tag, payload = self.nodes[nid]
+        if tag != "d":
+            raise ValueError("trace root is not an object")
+        return {self.materialize(payload[i]): payload[i + 1] for i in range(0, len(payload), 2)}
+
+    def load_trace(self, trace_id: str) -> Trace:
+        if trace_id not in self.roots:
+            raise KeyError(f"Unknown trace_id: {trace_id}")
+        fields = self._fields(self.roots[trace_id])
+        for key in REQUIRED_KEYS:
+            if key not in fields:
+                raise ValueError(f"Trace missing required key: {key}")
+        tag, event_ids = self.nodes[fields["events"]]
+        if tag != "l":
+            raise ValueError("Trace 'events' is not a list")
+        return Trace(
+            trace_id=str(self.materialize(fields["trace_id"])),
+            title=str(self.materialize(fields["title"])),
+            version=str(self.materialize(fields["version"])),
+            created_utc=str(self.materialize(fields["created_utc"])),
+            source_text=str(self.materialize(fields["source_text"])),
+            events=LazyEvents(self, list(event_ids)),
+        )
+
+    def list_traces(self) -> List[Tuple[str, str]]:
+        return [(tid, str(self.materialize(self._fields(root)["title"])))
+                for tid, root in sorted(self.roots.items())]
+
+    def stats(self) -> Dict[str, int]:
+        kinds: Dict[str, int] = {}
+        for tag, _ in self.nodes:
+            kinds[tag] = kinds.get(tag, 0) + 1
+        return {
+            "traces": len(self.roots),
+            "unique_nodes": len(self.nodes),
+            "strings": kinds.get("s", 0),
+            "dicts": kinds.get("d", 0),
+            "lists": kinds.get("l", 0),
+            "scalars": kinds.get("v", 0),
+            "bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+        }
+
+
+def open_store(root: str = STORE_DIR) -> TraceStore:
+    return TraceStore(root)
+
+
+# -------------------------
+#   CLI
+# -------------------------
+
+def main(argv: List[str]) -> int:
+    args = list(argv[1:])
+    root = pop_option(args, "--store", STORE_DIR)
+    if not args or args[0] not in ("build", "stats"):
+        eprint(__doc__.split("Run:")[1].rstrip())
+        return 2
+
+    store = TraceStore(root)
+    if args[0] == "build":
+        traces_dir = args[1] if len(args) > 1 else TRACES_DIR
+        raw = sum(os.path.getsize(os.path.join(traces_dir, n))
+                  for n in os.listdir(traces_dir) if n.endswith(".json"))
+        n = store.add_dir(traces_dir)
+        store.flush()
+        st = store.stats()
+        print(f"Stored {n} trace files ({raw} bytes of JSON) -> {st['bytes']} bytes, "
+              f"{st['unique_nodes']} unique of {store.added_nodes} nodes")
+        return 0
+
+    for key, value in store.stats().items():
+        print(f"  {key:13} {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv))
@@ -0,0 +1,204 @@
+# beam_search.py
+
+"""
+Beam search over the operator lattice.
+
+run_lattice follows ONE greedy path per mode. This explores every branch the
+mined transitions allow and keeps the top-K partial branches, ranked by
+
+    compute_score(counts) = RESOLVED - 2*BLOCKED - OPEN
+
+on EXPECTED counts (enact is stochastic: BUT / IF block with BLOCK_PROB), so
+branch rankings are deterministic.
+
+- Admissible bound: a backward DP over the transition graph (plus the forced
+  THEN pivot) gives, for each operator and number of remaining steps, the best
+  and worst achievable score gain. A partial branch is pruned when even its
+  best completion cannot beat the K-th best guaranteed completion.
+- Shared prefixes: a beam is a node pointing at its parent (op, counts, repeat
+  count), never a copy of 32-float frames. Frames are only materialised for the
+  K branches reported.
+
+The escape rule is kept: an operator may not repeat more than max_repeat times
+in a row; if the graph forces a self-loop, the branch pivots to THEN.
+"""
+
+import sys
+
+from frame_engine import OPERATORS, build_lattice, set_pathway
+from resolver import BLOCK_PROB, enact_likely
+from main import compute_score
+
+
+def step_gain(op):
+    """Expected score change when a frame enacts op (it stops counting as OPEN)."""
+    p_block = BLOCK_PROB.get(op, 0.0)
+    return (1.0 - p_block) - 2.0 * p_block + 1.0
+
+
+def allowed_next(op, transitions, repeat_count, max_repeat):
+    """Operators the lattice may move to after op (mirrors choose_next_operator's constraints)."""
+    options = transitions.get(op, []) or ["WE"]
+    if repeat_count >= max_repeat:
+        no_self = [o for o in options if o != op]
+        return no_self if no_self else ["THEN"]
+    return list(options)
+
+
+def gain_bounds(transitions, max_steps):
+    """
+    hi[k][op] / lo[k][op]: best / worst total gain of the next k enacted frames
+    after op. Computed on a relaxed graph (every transition plus op -> THEN,
+    repeats unconstrained), a superset of real moves, so hi is admissible and
+    lo never overestimates.
+    """
+    relaxed = {}
+    for op in OPERATORS:
+        nxt = set(transitions.get(op, []) or ["WE"])
+        nxt.add("THEN")
+        relaxed[op] = sorted(nxt)
+
+    hi = [dict((op, 0.0) for op in OPERATORS)]
+    lo = [dict((op, 0.0) for op in OPERATORS)]
+    for k in range(1, max_steps + 1):
+        hi.append(dict(
+            (op, max(step_gain(n) + hi[k - 1][n] for n in relaxed[op])) for op in OPERATORS))
+        lo.append(dict(
+            (op, min(step_gain(n) + lo[k - 1][n] for n in relaxed[op])) for op in OPERATORS))
+    return hi, lo
+
+
+class Branch(object):
+    """One beam: a node in a shared prefix tree."""
+
+    __slots__ = ("parent", "op", "frame", "repeat", "resolved", "blocked")
+
+    def __init__(self, parent, op, frame, repeat, resolved, blocked):
+        self.parent = parent
+        self.op = op
+        self.frame = frame          # lattice index this op was written to
+        self.repeat = repeat
+        self.resolved = resolved    # expected RESOLVED count so far
+        self.blocked = blocked      # expected BLOCKED count so far
+
+    def counts(self, total_steps, enacted):
+        return {
+            "OPEN": total_steps - enacted,
+            "RESOLVED": self.resolved,
+            "BLOCKED": self.blocked,
+        }
+
+    def ops(self):
+        """Operator sequence for frames 1..frame (walks the shared prefix)."""
+        out = []
+        node = self
+        while node is not None:
+            out.append(node.op)
+            node = node.parent
+        out.reverse()
+        return out
+
+    def to_lattice(self, total_steps, branch_id=0):
+        """Materialise frames: ops as chosen, each enacted frame in its most likely state."""
+        frames = build_lattice(total_steps=total_steps, branch_id=branch_id)
+        for t, op in enumerate(self.ops(), start=1):
+            set_pathway(frames[t], op=op)
+            if t < total_steps - 1:
+                set_pathway(frames[t], state=enact_likely(op))
+        return frames
+
+
+def _enact_into(parent, op, frame, repeat, enact):
+    resolved = parent.resolved if parent is not None else 0.0
+    blocked = parent.blocked if parent is not None else 0.0
+    if enact:
+        p_block = BLOCK_PROB.get(op, 0.0)
+        resolved += 1.0 - p_block
+        blocked += p_block
+    return Branch(parent, op, frame, repeat, resolved, blocked)
+
+
+def beam_search(transitions, total_steps=8, k=3, start_op="WE", beam_width=None,
+                max_repeat=3, stats=None):
+    """
+    Return the best k complete branches as (score, counts, Branch), best first.
+
+    Frames 1..T-2 are enacted and frame T-1 only receives the final op, exactly
+    as in run_lattice. beam_width (default 4*k) bounds the partial branches kept
+    per step; beam_width=0 keeps every branch the bound does not prune, making
+    the search exhaustive. If stats is a dict, it receives "expanded" and
+    "pruned" counts.
+    """
+    if total_steps < 3:
+        raise ValueError("total_steps must be >= 3")
+    if beam_width is not None and beam_width < 0:
+        raise ValueError("beam_width must be >= 0 (0 = unbounded)")
+    width = 4 * k if beam_width is None else (beam_width or None)
+    last_enacted = total_steps - 2
+    hi, lo = gain_bounds(transitions, last_enacted)
+
+    beams = [_enact_into(None, start_op, 1, 1, True)]
+    expanded = 0
+    pruned = 0
+    for t in range(2, total_steps):
+        enact = t <= last_enacted
+        enacted = t if enact else last_enacted
+        remaining = last_enacted - enacted
+
+        candidates = []
+        for b in beams:
+            for op in allowed_next(b.op, transitions, b.repeat, max_repeat):
+                repeat = b.repeat + 1 if op == b.op else 1
+                child = _enact_into(b, op, t, repeat, enact)
+                g = compute_score(child.counts(total_steps, enacted))
+                candidates.append((g + hi[remaining][op], g + lo[remaining][op], child))
+
+        # Prune: a branch whose best completion is below the k-th best
+        # guaranteed completion can never make the final top k.
+        floors = sorted((c[1] for c in candidates), reverse=True)
+        threshold = floors[k - 1] if len(floors) >= k else float("-inf")
+        survivors = [c for c in candidates if c[0] >= threshold - 1e-9]
+        expanded += len(candidates)
+        pruned += len(candidates) - len(survivors)
+
+        # stable sort: ties keep expansion order, so results are deterministic
+        survivors.sort(key=lambda c: -c[0])
+        beams = [c[2] for c in survivors[:width]]
+
+    results = []
+    for b in beams:
+        counts = b.counts(total_steps, last_enacted)
+        results.append((compute_score(counts), counts, b))
+    results.sort(key=lambda r: -r[0])
+    if stats is not None:
+        stats["expanded"] = expanded
+        stats["pruned"] = pruned
+    return results[:k]
+
+
+def main(argv=None):
+    from transitions import mine_transitions, mine_transitions_from_file
+    from main import CORPUS
+
+    argv = sys.argv if argv is None else argv
+    path = argv[1] if len(argv) > 1 else None
+    total_steps = int(argv[2]) if len(argv) > 2 else 8
+    k = int(argv[3]) if len(argv) > 3 else 3
+
+    transitions = mine_transitions_from_file(path) if path else mine_transitions(CORPUS)
+
+    stats = {}
+    print("\n=== Beam search: top %d branches, lattice length %d ===" % (k, total_steps))
+    for rank, (score, counts, branch) in enumerate(
+            beam_search(transitions, total_steps, k, stats=stats), start=1):
+        pretty = dict((name, round(v, 2)) for name, v in counts.items())
+        print("%d. score=%6.2f | %s" % (rank, score, pretty))
+        ops = branch.ops()
+        if len(ops) > 24:
+            ops = ops[:12] + ["..."] + ops[-6:]
+        print("   ops: %s" % " -> ".join(ops))
+    print("(expanded %d partial branches, pruned %d by bound)" % (stats["expanded"], stats["pruned"]))
+
+
+if __name__ == "__main__":
+    main()
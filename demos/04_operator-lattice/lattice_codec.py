@@ -0,0 +1,199 @@
+# lattice_codec.py
+
+"""
+Compact, lossless encoding for stored lattices.
+
+A frame is 32 floats, but frame_engine only writes the 4 pathway channels and
+those hold small discrete values. Each frame is packed as one record:
+
+    uint8 op      0 = unset (0.0), else OPERATORS index + 1
+    int8  state   -1 / 0 / 1 (BLOCKED / OPEN / RESOLVED)
+    uint16 pos    frame position index (uint32 for lattices over 65535 frames)
+    uint16 branch branch id (channel value * 100)
+
+Everything else is stored sparsely as (frame, channel, float64) overrides:
+non-zero data / control band values, and any pathway value that is not exactly
+what the record decodes to. Round-trips are bit-exact, so get_pathway (and any
+other reader) sees the same frames. A default lattice costs 6 bytes per frame
+instead of 32 floats.
+
+    data = pack_lattice(frames)
+    frames2 = unpack_lattice(data)          # == frames
+    packed = PackedLattice(data)            # stays packed in RAM
+    packed.pathway(t)                       # == get_pathway(frames[t], T)
+"""
+
+import math
+import struct
+
+from frame_engine import (
+    NUM_CHANNELS, OPERATORS,
+    CH_PATH_OP, CH_PATH_POS, CH_PATH_STATE, CH_PATH_BRANCH,
+    encode_op, encode_pos, get_pathway, new_frame,
+)
+
+MAGIC = b"OPLT"
+VERSION = 1
+
+# magic, version, wide-pos flag, frame count, override count
+_HEADER = struct.Struct("<4sBBII")
+_RECORD = struct.Struct("<BbHH")
+_RECORD_WIDE = struct.Struct("<BbIH")
+_OVERRIDE = struct.Struct("<IBd")
+
+_PATHWAY = (CH_PATH_OP, CH_PATH_POS, CH_PATH_STATE, CH_PATH_BRANCH)
+_SPARSE = [ch for ch in range(NUM_CHANNELS) if ch not in _PATHWAY]
+
+_OP_VALUES = [0.0] + [encode_op(op) for op in OPERATORS]
+_OP_CODES = dict((v, i) for i, v in enumerate(_OP_VALUES))
+
+
+def _same(a, b):
+    """Bit-level float equality (tells 0.0 from -0.0; NaN never matches)."""
+    return a == b and (a != 0.0 or math.copysign(1.0, a) == math.copysign(1.0, b))
+
+
+def _record_struct(total_steps):
+    return _RECORD_WIDE if total_steps > 0xFFFF else _RECORD
+
+
+def _decode_record(rec, total_steps):
+    """Channel values (op, state, pos, branch) a record stands for."""
+    op, state, pos, branch = rec
+    return _OP_VALUES[op], float(state), encode_pos(pos, total_steps), float(branch) / 100.0
+
+
+# ---- Encoding ----
+
+def pack_lattice(frames):
+    """Serialize a lattice (list of 32-float frames) to bytes."""
+    T = len(frames)
+    record = _record_struct(T)
+    pos_max = 0xFFFFFFFF if record is _RECORD_WIDE else 0xFFFF
+
+    records = bytearray(record.size * T)
+    overrides = []
+    for t, frame in enumerate(frames):
+        if len(frame) != NUM_CHANNELS:
+            raise ValueError("frame %d has %d channels, expected %d" % (t, len(frame), NUM_CHANNELS))
+        v_op = frame[CH_PATH_OP]
+        v_pos = frame[CH_PATH_POS]
+        v_state = frame[CH_PATH_STATE]
+        v_branch = frame[CH_PATH_BRANCH]
+
+        op = _OP_CODES.get(v_op, 0)
+        state = int(v_state) if v_state in (-1.0, 0.0, 1.0) else 0
+        pos = _clamp(_round(v_pos * (T - 1)) if T > 1 else 0, 0, pos_max)
+        branch = _clamp(_round(v_branch * 100.0), 0, 0xFFFF)
+
+        rec = (op, state, pos, branch)
+        record.pack_into(records, t * record.size, *rec)
+
+        for ch, value, decoded in zip((CH_PATH_OP, CH_PATH_STATE, CH_PATH_POS, CH_PATH_BRANCH),
+                                      (v_op, v_state, v_pos, v_branch),
+                                      _decode_record(rec, T)):
+            if not _same(value, decoded):
+                overrides.append((t, ch, value))
+        for ch in _SPARSE:
+            value = frame[ch]
+            if value != 0.0 or math.copysign(1.0, value) < 0:
+                overrides.append((t, ch, value))
+
+    out = bytearray(_HEADER.pack(MAGIC, VERSION, record is _RECORD_WIDE, T, len(overrides)))
+    out += records
+    for t, ch, value in overrides:
+        out += _OVERRIDE.pack(t, ch, value)
+    return bytes(out)
+
+
+def _round(x):
+    return int(round(x)) if not (math.isnan(x) or math.isinf(x)) else 0
+
+
+def _clamp(x, lo, hi):
+    return lo if x < lo else hi if x > hi else x
+
+
+# ---- Decoding ----
+
+class PackedLattice(object):
+    """
+    A lattice kept in its packed form. pathway(t) decodes one frame's pathway
+    fields without inflating anything; frame(t) / to_frames() rebuild floats.
+    """
+
+    def __init__(self, data):
+        magic, version, wide, T, n_overrides = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError("not a packed lattice")
+        if version != VERSION:
+            raise ValueError("unsupported packed lattice version %d" % version)
+        self.data = data
+        self.total_steps = T
+        self._record = _RECORD_WIDE if wide else _RECORD
+        self._records_at = _HEADER.size
+        self._overrides_at = self._records_at + self._record.size * T
+
+        self.overrides = {}
+        at = self._overrides_at
+        for _ in range(n_overrides):
+            t, ch, value = _OVERRIDE.unpack_from(data, at)
+            self.overrides.setdefault(t, []).append((ch, value))
+            at += _OVERRIDE.size
+
+    def __len__(self):
+        return self.total_steps
+
+    def nbytes(self):
+        return len(self.data)
+
+    def _raw(self, t):
+        if not 0 <= t < self.total_steps:
+            raise IndexError("frame index out of range")
+        return self._record.unpack_from(self.data, self._records_at + t * self._record.size)
+
+    def frame(self, t):
+        """Rebuild frame t as 32 floats (bit-identical to the original)."""
+        op, state, pos, branch = _decode_record(self._raw(t), self.total_steps)
+        frame = new_frame()
+        frame[CH_PATH_OP] = op
+        frame[CH_PATH_STATE] = state
+        frame[CH_PATH_POS] = pos
+        frame[CH_PATH_BRANCH] = branch
+        for ch, value in self.overrides.get(t, ()):
+            frame[ch] = value
+        return frame
+
+    def pathway(self, t):
+        """Same result as get_pathway(frames[t], total_steps)."""
+        if t in self.overrides:
+            return get_pathway(self.frame(t), self.total_steps)
+        op, state, pos, branch = self._raw(t)
+        return {
+            "op": OPERATORS[op - 1] if op else OPERATORS[0],
+            "pos": pos,
+            "state": ("OPEN", "RESOLVED", "BLOCKED")[state],
+            "branch": branch,
+        }
+
+    def to_frames(self):
+        return [self.frame(t) for t in range(self.total_steps)]
+
+
+def unpack_lattice(data):
+    """Inverse of pack_lattice: a list of 32-float frames."""
+    return PackedLattice(data).to_frames()
+
+
+def save_lattice(path, frames):
+    data = pack_lattice(frames)
+    with open(path, "wb") as f:
+        f.write(data)
+    return len(data)
+
+
+def load_lattice(path, packed=False):
+    """Read a packed lattice file; packed=True returns a PackedLattice instead of frames."""
+    with open(path, "rb") as f:
+        data = f.read()
+    return PackedLattice(data) if packed else unpack_lattice(data)
@@ -0,0 +1,151 @@
+# lattice_profiler.py
+
+"""
+Profiling hooks for resolver.run_lattice.
+
+    profiler = LatticeProfiler()
+    run_lattice(frames, transitions, mode="exploratory", hooks=profiler)
+    profiler.summary()                        # per-phase timings + event counts
+    profiler.write_chrome_trace("trace.json") # open in chrome://tracing / Perfetto
+
+Phases (per step): decode, enact, choose, encode, plus fast_forward when a
+cycle is skipped. Events: escape_rule, blocked_pivot, fallback_we,
+forced_then, cycle_detected.
+
+Trace events are kept up to max_trace_events (totals and counters are always
+exact); the rest are counted as dropped.
+
+Run:
+  python lattice_profiler.py [corpus_file] [total_steps] [trace.json]
+"""
+
+import json
+import sys
+import time
+
+
+class LatticeProfiler(object):
+    """Hooks object for run_lattice: accumulates phase timings and event counters."""
+
+    def __init__(self, trace=True, max_trace_events=200000):
+        self.trace = trace
+        self.max_trace_events = max_trace_events
+        self.origin = time.perf_counter()
+        self.phase_calls = {}
+        self.phase_total = {}
+        self.events = {}
+        self.trace_events = []
+        self.dropped = 0
+        self._run = 0
+
+    # ---- hook interface ----
+
+    def phase(self, name, start, end):
+        self.phase_calls[name] = self.phase_calls.get(name, 0) + 1
+        self.phase_total[name] = self.phase_total.get(name, 0.0) + (end - start)
+        if self.trace:
+            self._record({
+                "name": name, "cat": "run_lattice", "ph": "X",
+                "ts": (start - self.origin) * 1e6, "dur": (end - start) * 1e6,
+                "pid": 0, "tid": self._run,
+            })
+
+    def event(self, name):
+        self.events[name] = self.events.get(name, 0) + 1
+        if self.trace:
+            self._record({
+                "name": name, "cat": "event", "ph": "i", "s": "t",
+                "ts": (time.perf_counter() - self.origin) * 1e6,
+                "pid": 0, "tid": self._run,
+            })
+
+    # ---- bookkeeping ----
+
+    def next_run(self):
+        """Put the following run on its own trace row (tid)."""
+        self._run += 1
+
+    def _record(self, ev):
+        if len(self.trace_events) < self.max_trace_events:
+            self.trace_events.append(ev)
+        else:
+            self.dropped += 1
+
+    def reset(self):
+        self.__init__(self.trace, self.max_trace_events)
+
+    def summary(self):
+        total = sum(self.phase_total.values())
+        phases = {}
+        for name, secs in self.phase_total.items():
+            calls = self.phase_calls[name]
+            phases[name] = {
+                "calls": calls,
+                "total_s": secs,
+                "mean_us": secs / calls * 1e6,
+                "share": (secs / total) if total else 0.0,
+            }
+        return {
+            "steps": self.phase_calls.get("decode", 0),
+            "total_s": total,
+            "phases": phases,
+            "events": dict(self.events),
+            "trace_events": len(self.trace_events),
+            "trace_dropped": self.dropped,
+        }
+
+    def chrome_trace(self):
+        return {
+            "traceEvents": list(self.trace_events),
+            "displayTimeUnit": "ms",
+            "otherData": {"summary": self.summary()},
+        }
+
+    def write_chrome_trace(self, path):
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+
+def print_summary(summary):
+    print("steps=%d  timed=%.3fs" % (summary["steps"], summary["total_s"]))
+    for name in ("decode", "enact", "choose", "encode", "fast_forward"):
+        info = summary["phases"].get(name)
+        if info:
+            print("  %-12s %8d calls  %8.3f us/call  %5.1f%%"
+                  % (name, info["calls"], info["mean_us"], 100.0 * info["share"]))
+    for name, n in sorted(summary["events"].items()):
+        print("  event %-20s %d" % (name, n))
+
+
+def main(argv=None):
+    import random
+
+    from frame_engine import build_lattice
+    from main import CORPUS
+    from resolver import run_lattice
+    from transitions import mine_transitions, mine_transitions_from_file
+
+    argv = sys.argv if argv is None else argv
+    path = argv[1] if len(argv) > 1 and argv[1] != "-" else None
+    total_steps = int(argv[2]) if len(argv) > 2 else 10000
+    trace_path = argv[3] if len(argv) > 3 else "lattice_trace.json"
+
+    transitions = mine_transitions_from_file(path) if path else mine_transitions(CORPUS)
+
+    random.seed(0)
+    profiler = LatticeProfiler()
+    for branch_id, mode in enumerate(("conservative", "exploratory")):
+        frames = build_lattice(total_steps=total_steps, branch_id=branch_id)
+        run_lattice(frames, transitions, start_op="WE", mode=mode, hooks=profiler)
+        profiler.next_run()
+
+    print("\n=== run_lattice profile: conservative + exploratory, %d steps each ===" % total_steps)
+    print_summary(profiler.summary())
+
+    profiler.write_chrome_trace(trace_path)
+    print("\nChrome trace: %s (%d events, %d dropped)"
+          % (trace_path, len(profiler.trace_events), profiler.dropped))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,12 @@ import random
 
 from frame_engine import build_lattice, get_pathway
 from transitions import mine_transitions, mine_transitions_from_file
-from resolver import run_lattice
+from resolver import run_lattice_scored
+try:
+    from aurora_metrics import METRICS  # demos/metrics, when on sys.path (see its README)
+except ImportError:  # no metrics registry: instrumentation stays off
+    from types import SimpleNamespace
+    METRICS = SimpleNamespace(enabled=False)
 
 CORPUS = """
 1. We define the frame.
@@ -19,18 +24,6 @@ CORPUS = """
 CORPUS_FILE = "corpus.txt"
 
 
-def score_branch(frames):
-    """Return counts of OPEN / RESOLVED / BLOCKED."""
-    from frame_engine import decode_state
-
-    counts = {"OPEN": 0, "RESOLVED": 0, "BLOCKED": 0}
-    for t in range(len(frames)):
-        state = decode_state(frames[t][26])  # CH_PATH_STATE = 26
-        if state in counts:
-            counts[state] += 1
-    return counts
-
-
 def compute_score(counts):
     """
     score = RESOLVED - 2*BLOCKED - OPEN
@@ -41,12 +34,6 @@ def compute_score(counts):
     return resolved - 2 * blocked - open_
 
 
-def get_final_op(frames):
-    """Operator of the final frame."""
-    info = get_pathway(frames[-1], total_steps=len(frames))
-    return info["op"]
-
-
 def interpret_final_op(op):
     """Human-readable stance."""
     explanations = {
@@ -59,18 +46,25 @@ def interpret_final_op(op):
     return explanations.get(op, "Unknown stance.")
 
 
-def print_branch(label, frames):
+def print_branch(label, run):
+    """Print a LatticeRun frame by frame; counts come from the run, not a rescan."""
     print("\n=== Branch: %s ===" % label)
-    T = len(frames)
-    for t, frame in enumerate(frames):
+    T = len(run.frames)
+    for t, frame in enumerate(run.frames):
         info = get_pathway(frame, total_steps=T)
         print(
             "t=%d: pos=%d | op=%-8s | state=%-9s | branch=%d"
             % (t, info["pos"], info["op"], info["state"], info["branch"])
         )
-    counts = score_branch(frames)
+    counts = run.counts
     score = compute_score(counts)
     print("Summary for %s: %s | score = %d" % (label, counts, score))
+    if METRICS.enabled:
+        branch = " ".join(label.split())
+        METRICS.gauge("lattice_branch_score", "Branch score (compute_score)").set(score, branch=branch)
+        for state, n in counts.items():
+            METRICS.gauge("lattice_branch_state_count", "Branch frame counts by state").set(
+                n, branch=branch, state=state)
     return counts, score
 
 
@@ -94,21 +88,21 @@ def main():
 
     # Conservative
     frames_conservative = build_lattice(total_steps=total_steps, branch_id=0)
-    frames_conservative = run_lattice(
+    run_conservative = run_lattice_scored(
         frames_conservative, transitions, start_op="WE", mode="conservative"
     )
 
     # Exploratory
     frames_exploratory = build_lattice(total_steps=total_steps, branch_id=1)
-    frames_exploratory = run_lattice(
+    run_exploratory = run_lattice_scored(
         frames_exploratory, transitions, start_op="WE", mode="exploratory"
     )
 
-    cons_counts, cons_score = print_branch("Conservative (branch 0)", frames_conservative)
-    expl_counts, expl_score = print_branch("Exploratory  (branch 1)", frames_exploratory)
+    cons_counts, cons_score = print_branch("Conservative (branch 0)", run_conservative)
+    expl_counts, expl_score = print_branch("Exploratory  (branch 1)", run_exploratory)
 
-    final_cons_op = get_final_op(frames_conservative)
-    final_expl_op = get_final_op(frames_exploratory)
+    final_cons_op = run_conservative.final_op
+    final_expl_op = run_exploratory.final_op
 
     print("\n=== Branch Comparison ===")
     print("Conservative score:", cons_score, "with counts", cons_counts)
@@ -5,49 +5,93 @@ Resolver: applies operators over the frame lattice.
 
 Adds an escape rule: if the same operator repeats 3 times, force a pivot.
 This prevents sink attractors like IF -> IF -> IF forever.
+
+Instrumentation: run_lattice / choose_next_operator accept hooks=None. A hooks
+object provides
+    phase(name, start, end)  per-step timings (perf_counter seconds) for
+                             "decode", "enact", "choose", "encode",
+                             "fast_forward"
+    event(name)              "escape_rule", "blocked_pivot", "fallback_we",
+                             "forced_then", "cycle_detected"
+(see lattice_profiler.LatticeProfiler). With hooks=None nothing is timed.
 """
 
 import random
+import time
+from counter_rng import uniform
 from frame_engine import (
-    CH_PATH_OP, CH_PATH_STATE,
+    CH_PATH_OP, CH_PATH_STATE, CH_PATH_BRANCH,
     encode_op, decode_op,
     encode_state, decode_state,
 )
 
+try:
+    from aurora_metrics import METRICS  # demos/metrics, when on sys.path (see its README)
+except ImportError:  # no metrics registry: instrumentation stays off
+    from types import SimpleNamespace
+    METRICS = SimpleNamespace(enabled=False)
+
+
+# Probability that enacting an operator blocks (all others always resolve).
+BLOCK_PROB = {"BUT": 0.2, "IF": 0.3}
 
-def enact(op):
+
+def enact(op, u=None):
     """
     Toy execution semantics.
     - WE, THEN, BECAUSE always succeed.
     - BUT sometimes blocks.
     - IF sometimes blocks.
+
+    u: uniform draw in [0, 1) to use; default draws from the global RNG.
     """
-    if op == "BUT":
-        return "BLOCKED" if random.random() < 0.2 else "RESOLVED"
-    if op == "IF":
-        return "BLOCKED" if random.random() < 0.3 else "RESOLVED"
+    if op in BLOCK_PROB:
+        if u is None:
+            u = random.random()
+        return "BLOCKED" if u < BLOCK_PROB[op] else "RESOLVED"
+    return "RESOLVED"
+
+
+def enact_at(op, seed, branch, step):
+    """enact with the counter-based draw for (seed, branch, step): no RNG state."""
+    if op in BLOCK_PROB:
+        return enact(op, uniform(seed, branch, step))
     return "RESOLVED"
 
 
-def choose_next_operator(prev_op, prev_state, transitions, mode, repeat_count, max_repeat=3):
+def enact_likely(op):
+    """Deterministic semantics: the most likely outcome of enact (no RNG draw)."""
+    return "BLOCKED" if BLOCK_PROB.get(op, 0.0) > 0.5 else "RESOLVED"
+
+
+def choose_next_operator(prev_op, prev_state, transitions, mode, repeat_count, max_repeat=3,
+                         hooks=None):
     options = transitions.get(prev_op, [])
     if not options:
         options = ["WE"]
+        if hooks is not None:
+            hooks.event("fallback_we")
 
     # If we are blocked, try a local pivot first
     if prev_state == "BLOCKED":
         for candidate in ("BUT", "THEN"):
             if candidate in options and candidate != prev_op:
+                if hooks is not None:
+                    hooks.event("blocked_pivot")
                 return candidate
 
     # ✅ Escape rule: break self-loop attractors
     if repeat_count >= max_repeat:
+        if hooks is not None:
+            hooks.event("escape_rule")
         # try to remove self-loop
         options_no_self = [op for op in options if op != prev_op]
         if options_no_self:
             options = options_no_self
         else:
             # graph forces a self-loop (e.g. IF -> IF), so hard pivot
+            if hooks is not None:
+                hooks.event("forced_then")
             return "THEN"
 
     # Ranking preferences by mode
@@ -66,16 +110,83 @@ def choose_next_operator(prev_op, prev_state, transitions, mode, repeat_count, m
     return options[0]
 
 
-def run_lattice(frames, transitions, start_op="WE", mode="conservative"):
+class LatticeRun(object):
+    """
+    Result of run_lattice_scored: the lattice plus what the resolver counted
+    while writing it, so scoring needs no post-run scan.
+
+    counts   OPEN / RESOLVED / BLOCKED over all frames (as decoded from CH_PATH_STATE)
+    final_op operator of the final frame (the stance)
+    """
+
+    __slots__ = ("frames", "counts", "final_op")
+
+    def __init__(self, frames, counts, final_op):
+        self.frames = frames
+        self.counts = counts
+        self.final_op = final_op
+
+    def __repr__(self):
+        return "LatticeRun(T=%d, counts=%r, final_op=%r)" % (
+            len(self.frames), self.counts, self.final_op)
+
+
+def run_lattice(frames, transitions, start_op="WE", mode="conservative",
+                fast_forward=False, deterministic=False, stats=None, hooks=None,
+                seed=None):
+    """Walk the lattice in place and return it (see run_lattice_scored)."""
+    return run_lattice_scored(frames, transitions, start_op, mode,
+                              fast_forward, deterministic, stats, hooks, seed).frames
+
+
+def run_lattice_scored(frames, transitions, start_op="WE", mode="conservative",
+                       fast_forward=False, deterministic=False, stats=None, hooks=None,
+                       seed=None):
+    """
+    Walk the lattice, enacting each OPEN frame and choosing the next operator.
+    Returns a LatticeRun with running OPEN / RESOLVED / BLOCKED counts and the
+    final op.
+
+    fast_forward: once the chain state (op, state, repeat_count) repeats with
+    no RNG draw in between, the rest of the path is periodic; the remaining
+    pathway band is filled from the cycle instead of stepped. Frames and RNG
+    state are identical to step-by-step execution (cycles containing BUT / IF
+    draw from the RNG and are never skipped). Requires the remaining frames to
+    be OPEN, as build_lattice leaves them; otherwise it just keeps stepping.
+
+    deterministic: enact with enact_likely instead of drawing from the RNG, so
+    every path becomes periodic and fast_forward always applies.
+
+    If stats is a dict and a cycle was used, it receives "cycle_start",
+    "cycle_length" and "fast_forwarded" (number of steps not executed).
+
+    hooks: optional instrumentation (see module docstring).
+
+    seed: draw enact outcomes from counter_rng keyed by (seed, frame branch
+    id, step) instead of the global RNG. The outcome of step t is then fixed
+    by (seed, branch, t) alone, independent of call order or process.
+    """
     T = len(frames)
+    clock = time.perf_counter
+    t_run = clock() if METRICS.enabled else 0.0
 
     # Seed the first actionable frame (t=1)
     frames[1][CH_PATH_OP] = encode_op(start_op)
 
     last_op = None
     repeat_count = 0
+    counts = {"OPEN": 0, "RESOLVED": 0, "BLOCKED": 0}
+    for t in (0, T - 1):
+        counts[decode_state(frames[t][CH_PATH_STATE])] += 1
 
-    for t in range(1, T - 1):
+    # Cycle detection: chain states seen since the last RNG draw.
+    seen = {}
+    trail = []
+
+    t = 1
+    while t < T - 1:
+        if hooks is not None:
+            t_decode = clock()
         frame = frames[t]
 
         op = decode_op(frame[CH_PATH_OP])
@@ -88,14 +199,110 @@ def run_lattice(frames, transitions, start_op="WE", mode="conservative"):
             last_op = op
             repeat_count = 1
 
+        if hooks is not None:
+            t_enact = clock()
+            hooks.phase("decode", t_decode, t_enact)
+
         # Enact if OPEN
         if state == "OPEN":
-            new_state = enact(op)
+            if deterministic:
+                new_state = enact_likely(op)
+            else:
+                if op in BLOCK_PROB:
+                    seen.clear()
+                    del trail[:]
+                if seed is None:
+                    new_state = enact(op)
+                else:
+                    branch = int(round(frame[CH_PATH_BRANCH] * 100.0))
+                    new_state = enact_at(op, seed, branch, t)
             frame[CH_PATH_STATE] = encode_state(new_state)
             state = new_state
 
+        if hooks is not None:
+            t_choose = clock()
+            hooks.phase("enact", t_enact, t_choose)
+
         # Choose next op with escape rule
-        next_op = choose_next_operator(op, state, transitions, mode, repeat_count)
+        next_op = choose_next_operator(op, state, transitions, mode, repeat_count, hooks=hooks)
+
+        if hooks is not None:
+            t_encode = clock()
+            hooks.phase("choose", t_choose, t_encode)
+
         frames[t + 1][CH_PATH_OP] = encode_op(next_op)
+        counts[state] += 1
+
+        if hooks is not None:
+            hooks.phase("encode", t_encode, clock())
+
+        if fast_forward:
+            key = (op, state, repeat_count)
+            if key in seen and _all_open(frames, t + 1, T - 1):
+                cycle = trail[seen[key] + 1:] + [(op, state)]
+                if hooks is not None:
+                    hooks.event("cycle_detected")
+                    t_fill = clock()
+                _fill_cycle(frames, t + 1, cycle)
+                _add_cycle_counts(counts, cycle, T - 2 - t)
+                if hooks is not None:
+                    hooks.phase("fast_forward", t_fill, clock())
+                if stats is not None:
+                    stats["cycle_start"] = t - len(cycle) + 1
+                    stats["cycle_length"] = len(cycle)
+                    stats["fast_forwarded"] = T - 2 - t
+                break
+            if key in seen:
+                fast_forward = False  # a frame ahead is not OPEN: just step
+            seen[key] = len(trail)
+            trail.append((op, state))
+
+        t += 1
+
+    if METRICS.enabled:
+        _publish_run(mode, T, clock() - t_run, stats)
+    return LatticeRun(frames, counts, decode_op(frames[T - 1][CH_PATH_OP]))
+
+
+def _publish_run(mode, steps, secs, stats):
+    METRICS.counter("lattice_runs_total", "run_lattice calls").inc(mode=mode)
+    METRICS.counter("lattice_steps_total", "Lattice steps walked").inc(steps, mode=mode)
+    METRICS.histogram("lattice_run_seconds", "run_lattice duration").observe(secs, mode=mode)
+    METRICS.gauge("lattice_steps_per_second", "Lattice steps per second, last run").set(
+        steps / secs if secs > 0 else 0.0, mode=mode)
+    if stats and stats.get("fast_forwarded"):
+        METRICS.counter("lattice_fast_forwarded_steps_total",
+                        "Steps filled from a detected cycle").inc(stats["fast_forwarded"], mode=mode)
+
+
+def _all_open(frames, lo, hi):
+    for t in range(lo, hi):
+        if frames[t][CH_PATH_STATE] != 0.0:
+            return False
+    return True
+
+
+def _fill_cycle(frames, t0, cycle):
+    """
+    Continue a periodic path from step t0: step t0 + i repeats cycle[i % L].
+    Writes the enacted state of frames t0..T-2 and the op of frames t0..T-1.
+    """
+    T = len(frames)
+    L = len(cycle)
+    ops = [encode_op(op) for op, _ in cycle]
+    states = [encode_state(state) for _, state in cycle]
+    i = 0
+    for t in range(t0, T - 1):
+        frame = frames[t]
+        frame[CH_PATH_STATE] = states[i]
+        frames[t + 1][CH_PATH_OP] = ops[(i + 1) % L]
+        i += 1
+        if i == L:
+            i = 0
+
 
-    return frames
+def _add_cycle_counts(counts, cycle, n):
+    """Closed form: n more steps of the cycle = n // L full cycles + a prefix."""
+    full, rem = divmod(n, len(cycle))
+    for i, (_, state) in enumerate(cycle):
+        counts[state] += full + (1 if i < rem else 0)
@@ -0,0 +1,172 @@
+# shared_lattice.py
+
+"""
+Shared-memory lattices for multi-process analysis.
+
+The owner publishes a lattice once into multiprocessing.shared_memory (in the
+lattice_codec packed format); analysis workers attach by name and read it in
+place: no pickling, no per-process copy of the 32-float frames.
+
+    owner = SharedLattice.publish(frames)        # owner.name -> workers
+    view = SharedLattice.attach(owner.name)      # in any process
+    view.lattice.pathway(t)                      # PackedLattice, read-only
+    view.close()
+    owner.close()                                # also unlinks the segment
+
+Lifecycle:
+- The owner unlinks the segment on close(), when it is garbage collected, or
+  at interpreter exit; if the owner process dies, multiprocessing's resource
+  tracker still removes it.
+- Attached views only close their mapping. They never register the segment
+  with a resource tracker, so a worker exiting cannot unlink the owner's data.
+- Views are read-only memoryviews. Release anything derived from them before
+  close(), or the mapping cannot be closed.
+
+Run:
+  python shared_lattice.py [total_steps] [workers]
+"""
+
+import sys
+import weakref
+from multiprocessing import resource_tracker, shared_memory
+
+from lattice_codec import PackedLattice, pack_lattice
+
+
+def _open_untracked(name):
+    """Attach to an existing segment without registering it for cleanup."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Before 3.13, attaching registers the segment too, and the attaching
+    # process's tracker would unlink it when that process exits.
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def _release(shm, views, unlink):
+    for view in views:
+        view.release()
+    del views[:]
+    shm.close()
+    if unlink:
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SharedLattice(object):
+    """A packed lattice living in a named shared-memory segment."""
+
+    def __init__(self, shm, owner):
+        self.name = shm.name
+        self.owner = owner
+        self._shm = shm
+        self._views = []
+
+        buf = shm.buf.toreadonly()
+        self._views.append(buf)
+        self.lattice = PackedLattice(buf)
+        self._finalizer = weakref.finalize(self, _release, shm, self._views, owner)
+
+    @classmethod
+    def publish(cls, frames, name=None):
+        """Pack frames into a new segment; the returned object owns it."""
+        data = pack_lattice(frames)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=len(data))
+        shm.buf[:len(data)] = data
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """Read-only, zero-copy view of a published lattice."""
+        return cls(_open_untracked(name), owner=False)
+
+    @property
+    def closed(self):
+        return not self._finalizer.alive
+
+    def __len__(self):
+        return len(self.lattice)
+
+    def close(self):
+        """Detach; the owner also unlinks the segment."""
+        self.lattice = None
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self):
+        return "SharedLattice(name=%r, owner=%r, closed=%r)" % (self.name, self.owner, self.closed)
+
+
+# ---- Analysis workers ----
+
+def _analyse(job):
+    """Worker: attach by name, score the lattice and read its final stance."""
+    from main import compute_score
+
+    label, name = job
+    with SharedLattice.attach(name) as view:
+        lattice = view.lattice
+        counts = {"OPEN": 0, "RESOLVED": 0, "BLOCKED": 0}
+        for t in range(len(lattice)):
+            counts[lattice.pathway(t)["state"]] += 1
+        final_op = lattice.pathway(len(lattice) - 1)["op"]
+    return label, counts, compute_score(counts), final_op
+
+
+def main(argv=None):
+    import random
+    from multiprocessing import Pool
+
+    from frame_engine import build_lattice
+    from main import CORPUS, interpret_final_op
+    from resolver import run_lattice_scored
+    from transitions import mine_transitions
+
+    argv = sys.argv if argv is None else argv
+    total_steps = int(argv[1]) if len(argv) > 1 else 100000
+    workers = int(argv[2]) if len(argv) > 2 else 2
+
+    random.seed(0)
+    transitions = mine_transitions(CORPUS)
+    runs = {}
+    for branch_id, mode in enumerate(("conservative", "exploratory")):
+        frames = build_lattice(total_steps=total_steps, branch_id=branch_id)
+        runs[mode] = run_lattice_scored(frames, transitions, start_op="WE", mode=mode)
+
+    owners = dict((mode, SharedLattice.publish(run.frames)) for mode, run in runs.items())
+    try:
+        print("\n=== Shared lattices (%d frames each) ===" % total_steps)
+        for mode, owner in owners.items():
+            print("%-12s %s  %d bytes" % (mode, owner.name, owner.lattice.nbytes()))
+
+        jobs = [(mode, owner.name) for mode, owner in owners.items()]
+        pool = Pool(workers)
+        try:
+            results = pool.map(_analyse, jobs)
+        finally:
+            pool.close()
+            pool.join()
+
+        print("\n=== Worker analysis ===")
+        for label, counts, score, final_op in results:
+            assert counts == runs[label].counts and final_op == runs[label].final_op
+            print("%-12s score=%d counts=%s" % (label, score, counts))
+            print("%-12s final=%s - %s" % ("", final_op, interpret_final_op(final_op)))
+    finally:
+        for owner in owners.values():
+            owner.close()
+
+
+if __name__ == "__main__":
+    main()
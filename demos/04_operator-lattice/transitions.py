@@ -1,8 +1,15 @@
 # transitions.py
 
 import re
+import time
 from frame_engine import OPERATORS
 
+try:
+    from aurora_metrics import METRICS  # demos/metrics, when on sys.path (see its README)
+except ImportError:  # no metrics registry: instrumentation stays off
+    from types import SimpleNamespace
+    METRICS = SimpleNamespace(enabled=False)
+
 # Map tokens → operator label
 TOKEN_TO_OP = {
     "we":      "WE",
@@ -57,10 +64,12 @@ def _extract_steps(text):
     return steps
 
 
-def mine_transitions_from_text(corpus_text):
+def mine_transitions_from_text(corpus_text, debug=True):
     """
     Returns: dict mapping OP -> list of allowed next OP values.
+    debug=False skips the per-step DEBUG listing (large corpora, benchmarks).
     """
+    t0 = time.perf_counter() if METRICS.enabled else 0.0
     steps = _extract_steps(corpus_text)
 
     ops = []
@@ -69,9 +78,10 @@ def mine_transitions_from_text(corpus_text):
         if op:
             ops.append(op)
 
-    print("DEBUG: mined operator steps:")
-    for i, (step, op) in enumerate(zip(steps, ops), start=1):
-        print("  %d. %r -> %s" % (i, step, op))
+    if debug:
+        print("DEBUG: mined operator steps:")
+        for i, (step, op) in enumerate(zip(steps, ops), start=1):
+            print("  %d. %r -> %s" % (i, step, op))
 
     transitions = {}
     for op in OPERATORS:
@@ -86,13 +96,20 @@ def mine_transitions_from_text(corpus_text):
         if not transitions[op]:
             transitions[op] = OPERATORS[:]
 
+    if METRICS.enabled:
+        secs = time.perf_counter() - t0
+        METRICS.counter("miner_steps_total", "Operator steps mined").inc(len(ops))
+        METRICS.histogram("miner_seconds", "mine_transitions_from_text duration").observe(secs)
+        METRICS.gauge("miner_steps_per_second", "Steps mined per second, last corpus").set(
+            len(ops) / secs if secs > 0 else 0.0)
+
     return transitions
 
 
-def mine_transitions_from_file(path):
+def mine_transitions_from_file(path, debug=True):
     with open(path, "r", encoding="utf-8") as f:
         text = f.read()
-    return mine_transitions_from_text(text)
+    return mine_transitions_from_text(text, debug=debug)
 
 
 # Backwards compatibility for main.py if it still calls mine_transitions()
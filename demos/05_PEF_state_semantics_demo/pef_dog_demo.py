@@ -11,48 +11,266 @@ Demo idea:
   - "where is the dog" requires location info. If absent -> STOP + request info.
 """
 
-from dataclasses import dataclass, asdict
+from array import array
 import json
 import re
-from typing import Dict, List, Optional, Tuple
+import sys
+import threading
+import time
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+try:
+    from aurora_metrics import METRICS  # demos/metrics, when on sys.path (see its README)
+except ImportError:  # no metrics registry: instrumentation stays off
+    from types import SimpleNamespace
+    METRICS = SimpleNamespace(enabled=False)
+
+
+# -------------------------
+#   Entity interning
+# -------------------------
+
+# Approximate cost of one table entry besides the string itself (dict slot,
+# name and refcount list slots; CPython 3.11, measured with tracemalloc).
+ENTITY_BYTES = 80
+NO_ENTITY = -1
+
+
+class EntityTable:
+    """
+    Reference-counted string <-> int table for owner names, events and
+    locations. PEF state holds only the ids, one reference per stored id; a
+    PEF releases its references when it is freed, so a string lives only as
+    long as some PEF uses it, and freed ids are reused. `nbytes` is the
+    table's approximate memory, for budgets (see pef_pool).
+    """
+
+    __slots__ = ("_ids", "_names", "_refs", "_free", "_lock", "nbytes")
+
+    def __init__(self) -> None:
+        self._ids: Dict[str, int] = {}
+        self._names: List[Optional[str]] = []
+        self._refs: List[int] = []
+        self._free: List[int] = []
+        # Re-entrant: a PEF freed by the cycle collector while this thread
+        # holds the lock releases its ids from inside the same thread.
+        self._lock = threading.RLock()
+        self.nbytes = 0
+
+    def acquire(self, name: str) -> int:
+        """Id of `name`, inserting it if needed; takes one reference."""
+        with self._lock:
+            i = self._ids.get(name)
+            if i is not None:
+                self._refs[i] += 1
+                return i
+            if self._free:
+                i = self._free.pop()
+                self._names[i] = name
+                self._refs[i] = 1
+            else:
+                i = len(self._names)
+                self._names.append(name)
+                self._refs.append(1)
+            self._ids[name] = i
+            self.nbytes += ENTITY_BYTES + sys.getsizeof(name)
+            return i
+
+    def release(self, ids: Iterable[int]) -> None:
+        """Drop one reference per id; unreferenced strings are removed."""
+        with self._lock:
+            for i in ids:
+                self._refs[i] -= 1
+                if self._refs[i] == 0:
+                    name = self._names[i]
+                    del self._ids[name]
+                    self._names[i] = None
+                    self._free.append(i)
+                    self.nbytes -= ENTITY_BYTES + sys.getsizeof(name)
+
+    def lookup(self, name: str) -> int:
+        """Id of a string already in the table, NO_ENTITY otherwise (takes no reference)."""
+        return self._ids.get(name, NO_ENTITY)
+
+    def name(self, i: int) -> str:
+        return self._names[i]
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+# Table for PEFs created without one; pef_pool gives each pool its own.
+ENTITIES = EntityTable()
+
+
+def _find(table: array, key: int) -> int:
+    """Index of `key` in the key column of an interleaved [key, value, ...] table, or -1."""
+    i = 0
+    while True:
+        try:
+            i = table.index(key, i)
+        except ValueError:
+            return -1
+        if not i & 1:
+            return i
+        i += 1
+
+
+def dog_owner(dog_id: str) -> Optional[str]:
+    """ "jane_dog" -> "jane" """
+    return dog_id[:-4] if dog_id.endswith("_dog") else None
 
 
 # -------------------------
 #   PEF: echo-traces (not a timeline)
 # -------------------------
 
-@dataclass
 class PEF:
-    owners_with_dogs: Dict[str, int]            # e.g. {"jane": 1, "sally": 1}
-    last_event_about_dog: Optional[str] = None  # e.g. "ran_away"
-    locations: Dict[str, str] = None            # e.g. {"jane_dog": "park"} (rare in this toy)
+    """
+    Echo-traces of one conversation, as ids in an EntityTable:
 
-    def __post_init__(self):
-        if self.locations is None:
-            self.locations = {}
+      owners  array('i') [owner, count, owner, count, ...]  in first-mention order
+      locs    array('i') [owner, location, ...]              one pair per owner's dog
+      event   last event about the dog (e.g. "ran_away"), NO_ENTITY if none
+
+    Tables stay None until their first entry. owners_with_dogs, locations and
+    last_event_about_dog are read-only views built on access; change state
+    through ingest (or add_owner / set_location / set_event).
+    """
+
+    __slots__ = ("table", "owners", "locs", "event")
+
+    def __init__(
+        self,
+        owners_with_dogs: Optional[Dict[str, int]] = None,   # e.g. {"jane": 1, "sally": 1}
+        last_event_about_dog: Optional[str] = None,          # e.g. "ran_away"
+        locations: Optional[Dict[str, str]] = None,          # e.g. {"jane_dog": "park"}
+        table: Optional[EntityTable] = None,
+    ) -> None:
+        self.table = ENTITIES if table is None else table
+        self.owners: Optional[array] = None
+        self.locs: Optional[array] = None
+        self.event = NO_ENTITY
+        if last_event_about_dog is not None:
+            set_event(self, last_event_about_dog)
+        for name, n in (owners_with_dogs or {}).items():
+            if n > 0:
+                add_owner(self, name, n)
+        for dog_id, loc in (locations or {}).items():
+            owner = dog_owner(dog_id)
+            if owner is None:
+                raise ValueError(f"location key must look like '<owner>_dog', got {dog_id!r}")
+            set_location(self, owner, loc)
+
+    def __del__(self) -> None:
+        ids: List[int] = [] if self.event == NO_ENTITY else [self.event]
+        if self.owners is not None:
+            ids.extend(self.owners[::2])
+        if self.locs is not None:
+            ids.extend(self.locs)
+        if ids:
+            self.table.release(ids)
+
+    def _owners_dict(self) -> Dict[str, int]:
+        t, name = self.owners or (), self.table.name
+        return {name(t[i]): t[i + 1] for i in range(0, len(t), 2)}
+
+    def _locations_dict(self) -> Dict[str, str]:
+        t, name = self.locs or (), self.table.name
+        return {f"{name(t[i])}_dog": name(t[i + 1]) for i in range(0, len(t), 2)}
+
+    @property
+    def owners_with_dogs(self) -> Mapping[str, int]:
+        return MappingProxyType(self._owners_dict())
+
+    @property
+    def locations(self) -> Mapping[str, str]:
+        return MappingProxyType(self._locations_dict())
+
+    @property
+    def last_event_about_dog(self) -> Optional[str]:
+        return None if self.event == NO_ENTITY else self.table.name(self.event)
+
+    def to_dict(self) -> Dict:
+        return {
+            "owners_with_dogs": self._owners_dict(),
+            "last_event_about_dog": self.last_event_about_dog,
+            "locations": self._locations_dict(),
+        }
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PEF):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        d = self.to_dict()
+        return (f"PEF(owners_with_dogs={d['owners_with_dogs']!r}, "
+                f"last_event_about_dog={d['last_event_about_dog']!r}, locations={d['locations']!r})")
+
+
+def add_owner(pef: PEF, name: str, n: int = 1) -> None:
+    t = pef.table
+    if pef.owners is not None:
+        i = _find(pef.owners, t.lookup(name))
+        if i >= 0:
+            pef.owners[i + 1] += n
+            return
+        pef.owners.extend((t.acquire(name), n))
+    else:
+        pef.owners = array("i", (t.acquire(name), n))
+
+
+def set_location(pef: PEF, owner: str, loc: str) -> None:
+    t = pef.table
+    if pef.locs is not None:
+        i = _find(pef.locs, t.lookup(owner))
+        if i >= 0:
+            old = pef.locs[i + 1]
+            if t.name(old) != loc:
+                pef.locs[i + 1] = t.acquire(loc)
+                t.release((old,))
+            return
+        pef.locs.extend((t.acquire(owner), t.acquire(loc)))
+    else:
+        pef.locs = array("i", (t.acquire(owner), t.acquire(loc)))
+
+
+def set_event(pef: PEF, event: str) -> None:
+    t = pef.table
+    old = pef.event
+    if old != NO_ENTITY:
+        if t.name(old) == event:
+            return
+        t.release((old,))
+    pef.event = t.acquire(event)
+
+
+_OWNS_A_DOG = re.compile(r"^(\w+)\s+had\s+a\s+dog\.?$")
+_DOG_RAN_AWAY = re.compile(r"^the\s+dog\s+ran\s+away\.?$")
+_DOG_IS_AT = re.compile(r"^(\w+)'s\s+dog\s+is\s+at\s+the\s+(.+?)\.?$")
+_WHERE_IS_THE_DOG = re.compile(r"^where\s+is\s+the\s+dog\??$")
 
 
 def ingest(pef: PEF, sentence: str) -> None:
     s = sentence.strip().lower()
 
     # Ownership: "jane had a dog"
-    m = re.match(r"^(\w+)\s+had\s+a\s+dog\.?$", s)
+    m = _OWNS_A_DOG.match(s)
     if m:
-        name = m.group(1)
-        pef.owners_with_dogs[name] = pef.owners_with_dogs.get(name, 0) + 1
+        add_owner(pef, m.group(1))
         return
 
     # Dog event: "the dog ran away"
-    if re.match(r"^the\s+dog\s+ran\s+away\.?$", s):
-        pef.last_event_about_dog = "ran_away"
+    if _DOG_RAN_AWAY.match(s):
+        set_event(pef, "ran_away")
         return
 
     # Location fact (optional extension): "jane's dog is at the park"
-    m2 = re.match(r"^(\w+)'s\s+dog\s+is\s+at\s+the\s+(.+?)\.?$", s)
+    m2 = _DOG_IS_AT.match(s)
     if m2:
-        name = m2.group(1)
-        loc = m2.group(2)
-        pef.locations[f"{name}_dog"] = loc
+        set_location(pef, m2.group(1), m2.group(2))
         return
 
 
@@ -60,10 +278,35 @@ def ingest(pef: PEF, sentence: str) -> None:
 #   Reconstruction helpers
 # -------------------------
 
+def _candidate_owners(pef: PEF) -> List[int]:
+    # Each owner yields a dog token per dog in this toy model, in first-mention order.
+    t = pef.owners or ()
+    return [t[i] for i in range(0, len(t), 2) for _ in range(t[i + 1])]
+
+
+def _resolve_the_dog(pef: PEF) -> Tuple[str, int]:
+    """'the dog' over ids: (status, owner id of the unique dog or NO_ENTITY)."""
+    t = pef.owners
+    if not t:
+        return ("stop_no_dog_in_pef", NO_ENTITY)
+    if len(t) == 2 and t[1] == 1:
+        return ("resolved_unique", t[0])
+    return ("stop_ambiguous_definite_description", NO_ENTITY)
+
+
+def _location_of(pef: PEF, owner: int) -> int:
+    if pef.locs is None or owner == NO_ENTITY:
+        return NO_ENTITY
+    i = _find(pef.locs, owner)
+    return NO_ENTITY if i < 0 else pef.locs[i + 1]
+
+
+def _dog_name(pef: PEF, owner: int) -> str:
+    return f"{pef.table.name(owner)}_dog"
+
+
 def candidate_dogs(pef: PEF) -> List[str]:
-    # Each owner yields a dog token in this toy model.
-    # NOTE: dict iteration preserves insertion order in modern Python, which is fine for a demo.
-    return [f"{name}_dog" for name, n in pef.owners_with_dogs.items() for _ in range(n)]
+    return [_dog_name(pef, o) for o in _candidate_owners(pef)]
 
 
 def resolve_definite_description_the_dog(pef: PEF) -> Tuple[str, Optional[str], List[str]]:
@@ -71,16 +314,8 @@ def resolve_definite_description_the_dog(pef: PEF) -> Tuple[str, Optional[str],
     Constraint: 'the dog' must refer to exactly one candidate in scope.
     If not unique -> STOP.
     """
-    cands = candidate_dogs(pef)
-
-    if len(cands) == 0:
-        return ("stop_no_dog_in_pef", None, cands)
-
-    if len(cands) == 1:
-        return ("resolved_unique", cands[0], cands)
-
-    # More than one dog exists -> cannot uniquely resolve "the dog"
-    return ("stop_ambiguous_definite_description", None, cands)
+    status, owner = _resolve_the_dog(pef)
+    return (status, None if owner == NO_ENTITY else _dog_name(pef, owner), candidate_dogs(pef))
 
 
 def answer_where_is_x(pef: PEF, dog_id: str) -> Tuple[str, Optional[str]]:
@@ -88,8 +323,10 @@ def answer_where_is_x(pef: PEF, dog_id: str) -> Tuple[str, Optional[str]]:
     Constraint: A 'where' answer requires an explicit location fact.
     No inference allowed.
     """
-    if dog_id in pef.locations:
-        return ("answered", pef.locations[dog_id])
+    owner = dog_owner(dog_id)
+    loc = _location_of(pef, NO_ENTITY if owner is None else pef.table.lookup(owner))
+    if loc != NO_ENTITY:
+        return ("answered", pef.table.name(loc))
     return ("stop_missing_location_fact", None)
 
 
@@ -98,23 +335,84 @@ def answer_where_is_x(pef: PEF, dog_id: str) -> Tuple[str, Optional[str]]:
 # -------------------------
 
 def handle_query(pef: PEF, query: str) -> Dict:
+    if not METRICS.enabled:
+        return _handle_query(pef, query)
+    t0 = time.perf_counter()
+    result = _handle_query(pef, query)
+    METRICS.histogram("pef_query_seconds", "handle_query latency").observe(time.perf_counter() - t0)
+    METRICS.counter("pef_queries_total", "PEF queries by status").inc(status=result["status"])
+    return result
+
+
+def handle_queries(pef: PEF, queries: Iterable[str]) -> List[Dict]:
+    """
+    handle_query over a batch of queries against one PEF, results in input order.
+
+    Queries are grouped by normalized form (lowercase, whitespace collapsed)
+    and each form is matched once; "the dog" is resolved at most once per
+    batch. Queries in the same group share one result dict, so treat the
+    results as read-only.
+    """
+    t0 = time.perf_counter() if METRICS.enabled else 0.0
+    by_form: Dict[str, Dict] = {}
+    where: Optional[Dict] = None
+    unsupported: Optional[Dict] = None
+    results: List[Dict] = []
+    for query in queries:
+        # Raw strings are memoized alongside their normalized forms, so exact
+        # repeats skip normalization (normalizing is idempotent, so keys agree).
+        result = by_form.get(query)
+        if result is None:
+            q = " ".join(query.lower().split())
+            result = by_form.get(q)
+            if result is None:
+                if _WHERE_IS_THE_DOG.match(q):
+                    if where is None:
+                        where = _where_is_the_dog(pef)
+                    result = where
+                else:
+                    if unsupported is None:
+                        unsupported = _unsupported_query()
+                    result = unsupported
+                by_form[q] = result
+            by_form[query] = result
+        results.append(result)
+
+    if METRICS.enabled:
+        METRICS.histogram("pef_query_batch_seconds", "handle_queries latency").observe(time.perf_counter() - t0)
+        counter = METRICS.counter("pef_queries_total", "PEF queries by status")
+        for r in (where, unsupported):
+            if r is not None:
+                counter.inc(sum(1 for x in results if x is r), status=r["status"])
+    return results
+
+
+def _handle_query(pef: PEF, query: str) -> Dict:
     q = query.strip().lower()
 
     # We only support "where is the dog?" in this toy.
-    if not re.match(r"^where\s+is\s+the\s+dog\??$", q):
-        return {
-            "status": "stop_unsupported_query",
-            "explanation": "This demo only supports the query: 'where is the dog?'",
-        }
+    if not _WHERE_IS_THE_DOG.match(q):
+        return _unsupported_query()
+    return _where_is_the_dog(pef)
+
+
+def _unsupported_query() -> Dict:
+    return {
+        "status": "stop_unsupported_query",
+        "explanation": "This demo only supports the query: 'where is the dog?'",
+    }
+
 
-    # Step 1: resolve "the dog"
-    ref_status, dog_id, cands = resolve_definite_description_the_dog(pef)
+def _where_is_the_dog(pef: PEF) -> Dict:
+    # Step 1: resolve "the dog" (over ids; names are rendered only for the result)
+    ref_status, owner = _resolve_the_dog(pef)
 
     if ref_status != "resolved_unique":
         # STOP — need clarification before even attempting a 'where' answer
+        cands = _candidate_owners(pef)
 
         if ref_status == "stop_ambiguous_definite_description":
-            owners = [c.split("_")[0].capitalize() for c in cands]
+            owners = [pef.table.name(c).capitalize() for c in cands]
 
             if len(owners) == 2:
                 clarification = f"Which dog do you mean — {owners[0]}'s dog or {owners[1]}'s dog?"
@@ -131,25 +429,25 @@ def handle_query(pef: PEF, query: str) -> Dict:
                 if ref_status == "stop_ambiguous_definite_description"
                 else "No dog exists in PEF, so 'the dog' cannot refer."
             ),
-            "candidates": cands,
+            "candidates": [_dog_name(pef, c) for c in cands],
             "clarification_question": clarification,
         }
 
     # Step 2: answer where (requires location fact)
-    where_status, loc = answer_where_is_x(pef, dog_id)
+    loc = _location_of(pef, owner)
 
-    if where_status != "answered":
+    if loc == NO_ENTITY:
         return {
-            "status": where_status,
-            "referent": dog_id,
+            "status": "stop_missing_location_fact",
+            "referent": _dog_name(pef, owner),
             "explanation": "No location fact exists in PEF for that referent. Constraints forbid guessing.",
             "clarification_question": "Do you know where the dog was last seen, or is there a location clue?",
         }
 
     return {
         "status": "answered",
-        "referent": dog_id,
-        "answer": loc,
+        "referent": _dog_name(pef, owner),
+        "answer": pef.table.name(loc),
     }
 
 
@@ -179,7 +477,7 @@ def main():
     print(
         json.dumps(
             {
-                "pef": asdict(pef),
+                "pef": pef.to_dict(),
                 "context": context_lines,
                 "query": query,
                 "result": result,
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+PEF Pool — one PEF per conversation, under a memory budget
+
+pef_dog_demo works on a single PEF. A service keeps one per conversation
+(tenant). PEFPool holds them:
+
+- resident PEFs live in an LRU, accounted with an approximate byte size
+  (including the pool's table of the strings they reference); when the
+  budget is exceeded the least recently used ones are evicted
+- evicted PEFs that changed since they were loaded are encoded in a compact
+  binary form (`encode_pef`, typically 10-40 bytes) and spilled to an SQLite
+  table; writes are batched into one transaction per `write_batch` spills
+- the next `ingest` / `handle_query` for an evicted tenant reloads it
+  transparently (a reload); unknown tenants start with an empty PEF
+
+`stats()` reports hits, misses (new tenants), reloads, evictions, spill
+writes and reload latency. Only the LRU is held in memory, so the number of
+tenants is bounded by disk, not RAM.
+
+Run:
+  python pef_pool.py STREAM [--budget 64MB] [--db PATH]
+
+STREAM holds "conv_id<TAB>sentence" lines, e.g. from
+  python ../bench/workload.py pef stream.txt --size 100MB --conversations 1000000
+Lines whose sentence is a query ("where is ...") go to handle_query, all
+others to ingest.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pef_dog_demo import METRICS, PEF, EntityTable, handle_queries, handle_query, ingest
+
+# Approximate resident cost of an empty PEF plus its LRU entry (CPython 3.11,
+# measured with tracemalloc); the id tables are added at their allocated size.
+# The strings behind the ids live in the pool's EntityTable and are charged to
+# the budget through its nbytes, not per tenant.
+BASE_BYTES = 240
+
+CODEC_VERSION = 1
+_EVENTS = (None, "ran_away")        # last_event_about_dog values with a one-byte code
+
+
+def pef_nbytes(pef: PEF) -> int:
+    n = BASE_BYTES
+    if pef.owners is not None:
+        n += sys.getsizeof(pef.owners)
+    if pef.locs is not None:
+        n += sys.getsizeof(pef.locs)
+    return n
+
+
+# -------------------------
+#   Compact codec
+# -------------------------
+
+def _put_varint(out: bytearray, n: int) -> None:
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _put_str(out: bytearray, s: str) -> None:
+    data = s.encode("utf-8")
+    _put_varint(out, len(data))
+    out += data
+
+
+def _get_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    n = shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+
+def _get_str(data: bytes, pos: int) -> Tuple[str, int]:
+    n, pos = _get_varint(data, pos)
+    return data[pos:pos + n].decode("utf-8"), pos + n
+
+
+def encode_pef(pef: PEF) -> bytes:
+    """
+    version:u8  event:u8 [str if event == 255]
+    n_owners:varint (name:str count:varint)*
+    n_locations:varint (key:str value:str)*
+    (str = varint length + UTF-8; location keys are "<owner>_dog"); table order is preserved.
+    """
+    name = pef.table.name
+    out = bytearray((CODEC_VERSION,))
+    ev = pef.last_event_about_dog
+    if ev in _EVENTS:
+        out.append(_EVENTS.index(ev))
+    else:
+        out.append(255)
+        _put_str(out, ev)
+    t = pef.owners or ()
+    _put_varint(out, len(t) // 2)
+    for i in range(0, len(t), 2):
+        _put_str(out, name(t[i]))
+        _put_varint(out, t[i + 1])
+    t = pef.locs or ()
+    _put_varint(out, len(t) // 2)
+    for i in range(0, len(t), 2):
+        _put_str(out, name(t[i]) + "_dog")
+        _put_str(out, name(t[i + 1]))
+    return bytes(out)
+
+
+def decode_pef(data: bytes, table: Optional[EntityTable] = None) -> PEF:
+    if data[0] != CODEC_VERSION:
+        raise ValueError(f"unsupported PEF encoding version {data[0]}")
+    pef = PEF(table=table)
+    acquire = pef.table.acquire
+    code = data[1]
+    pos = 2
+    if code == 255:
+        ev, pos = _get_str(data, pos)
+    else:
+        ev = _EVENTS[code]
+    if ev is not None:
+        pef.event = acquire(ev)
+    n, pos = _get_varint(data, pos)
+    if n:
+        owners = pef.owners = array("i")
+        for _ in range(n):
+            name, pos = _get_str(data, pos)
+            count, pos = _get_varint(data, pos)
+            owners.append(acquire(name))
+            owners.append(count)
+    n, pos = _get_varint(data, pos)
+    if n:
+        locs = pef.locs = array("i")
+        for _ in range(n):
+            key, pos = _get_str(data, pos)
+            loc, pos = _get_str(data, pos)
+            locs.append(acquire(key[:-4]))
+            locs.append(acquire(loc))
+    return pef
+
+
+# -------------------------
+#   Pool
+# -------------------------
+
+class PEFPool:
+    """
+    LRU of resident PEFs keyed by tenant id, spilling to SQLite.
+
+    max_bytes:   budget for resident PEFs (pef_nbytes estimate) and their strings
+    path:        SQLite file; None = temporary file removed by close()
+    write_batch: evictions buffered per spill transaction
+    """
+
+    def __init__(self, max_bytes: int = 64 << 20, path: Optional[str] = None,
+                 write_batch: int = 1024) -> None:
+        self.max_bytes = max_bytes
+        self.write_batch = write_batch
+        self._temp = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="pef_pool_", suffix=".sqlite")
+            os.close(fd)
+        self.path = path
+        self._db = sqlite3.connect(path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS pef (tenant TEXT PRIMARY KEY, data BLOB NOT NULL) WITHOUT ROWID")
+
+        # tenant -> [pef, nbytes, dirty]
+        self._lru: "OrderedDict[str, list]" = OrderedDict()
+        self._pending: Dict[str, bytes] = {}       # evicted, not yet written
+        self.resident_bytes = 0
+        # Strings of resident PEFs only: evicted PEFs release their ids.
+        self.entities = EntityTable()
+
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.evictions = 0
+        self.spilled = 0
+        self.reload_seconds = 0.0
+        self.reload_max = 0.0
+
+    # ---- access ----
+
+    def _entry(self, tenant: str) -> list:
+        entry = self._lru.get(tenant)
+        if entry is not None:
+            self._lru.move_to_end(tenant)
+            self.hits += 1
+            return entry
+        return self._admit(tenant)
+
+    def get(self, tenant: str) -> PEF:
+        """
+        The tenant's live PEF, reloaded or created as needed; marks it most
+        recently used. The caller may change it, so it is marked changed and
+        will be written back on eviction. Its byte estimate is only refreshed
+        by the next ingest(); prefer ingest() / handle_query() for access.
+        """
+        entry = self._entry(tenant)
+        entry[2] = True
+        return entry[0]
+
+    def ingest(self, tenant: str, sentence: str) -> None:
+        entry = self._entry(tenant)
+        pef = entry[0]
+        entity_bytes = self.entities.nbytes
+        ingest(pef, sentence)
+        entry[2] = True
+        nbytes = pef_nbytes(pef)
+        if nbytes != entry[1] or self.entities.nbytes > entity_bytes:
+            self.resident_bytes += nbytes - entry[1]
+            entry[1] = nbytes
+            self._enforce_budget()
+
+    # Queries only read the PEF, so they do not mark it changed.
+
+    def handle_query(self, tenant: str, query: str) -> Dict:
+        return handle_query(self._entry(tenant)[0], query)
+
+    def handle_queries(self, tenant: str, queries: Iterable[str]) -> List[Dict]:
+        return handle_queries(self._entry(tenant)[0], queries)
+
+    def drop(self, tenant: str) -> None:
+        """Forget a tenant (resident and spilled state)."""
+        entry = self._lru.pop(tenant, None)
+        if entry is not None:
+            self.resident_bytes -= entry[1]
+        self._pending.pop(tenant, None)
+        self._db.execute("DELETE FROM pef WHERE tenant = ?", (tenant,))
+
+    def __contains__(self, tenant: str) -> bool:
+        if tenant in self._lru or tenant in self._pending:
+            return True
+        return self._db.execute("SELECT 1 FROM pef WHERE tenant = ?", (tenant,)).fetchone() is not None
+
+    # ---- residency ----
+
+    def _admit(self, tenant: str) -> list:
+        t0 = time.perf_counter()
+        data = self._pending.pop(tenant, None)
+        # dirty: state that is not on disk yet. Pending data never reached the
+        # table; a new tenant's empty PEF needs no row until it changes.
+        dirty = data is not None
+        if data is None:
+            row = self._db.execute("SELECT data FROM pef WHERE tenant = ?", (tenant,)).fetchone()
+            data = row[0] if row is not None else None
+        if data is None:
+            pef = PEF(table=self.entities)
+            self.misses += 1
+        else:
+            pef = decode_pef(data, self.entities)
+            secs = time.perf_counter() - t0
+            self.reloads += 1
+            self.reload_seconds += secs
+            self.reload_max = max(self.reload_max, secs)
+            if METRICS.enabled:
+                METRICS.histogram("pef_pool_reload_seconds", "PEFPool reload latency").observe(secs)
+        entry = [pef, pef_nbytes(pef), dirty]
+        self._lru[tenant] = entry
+        self.resident_bytes += entry[1]
+        self._enforce_budget()
+        return entry
+
+    def _enforce_budget(self) -> None:
+        entities = self.entities
+        while self.resident_bytes + entities.nbytes > self.max_bytes and len(self._lru) > 1:
+            tenant, (pef, nbytes, dirty) = self._lru.popitem(last=False)
+            self.resident_bytes -= nbytes
+            self.evictions += 1
+            if dirty:
+                self._pending[tenant] = encode_pef(pef)
+                if len(self._pending) >= self.write_batch:
+                    self._write_pending()
+            del pef     # last reference: releases its ids before the next check
+        if METRICS.enabled:
+            METRICS.gauge("pef_pool_resident_bytes", "PEFPool resident bytes (estimate)").set(
+                self.resident_bytes + entities.nbytes)
+
+    def _write_pending(self) -> None:
+        if not self._pending:
+            return
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany("INSERT OR REPLACE INTO pef (tenant, data) VALUES (?, ?)",
+                                 self._pending.items())
+        self.spilled += len(self._pending)
+        self._pending.clear()
+
+    def flush(self) -> None:
+        """Write every changed PEF (resident or pending) to disk; residents stay loaded."""
+        for tenant, entry in self._lru.items():
+            if entry[2]:
+                self._pending[tenant] = encode_pef(entry[0])
+                entry[2] = False
+        self._write_pending()
+
+    def close(self) -> None:
+        if self._db is None:
+            return
+        if not self._temp:
+            self.flush()
+        self._db.close()
+        self._db = None
+        if self._temp:
+            for suffix in ("", "-wal", "-shm"):
+                try:
+                    os.remove(self.path + suffix)
+                except FileNotFoundError:
+                    pass
+
+    def __enter__(self) -> "PEFPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ---- stats ----
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def stats(self) -> Dict[str, float]:
+        accesses = self.hits + self.misses + self.reloads
+        return {
+            "resident": len(self._lru),
+            "resident_bytes": self.resident_bytes,
+            "entities": len(self.entities),
+            "entity_bytes": self.entities.nbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+            "hit_rate": self.hits / accesses if accesses else 0.0,
+            "evictions": self.evictions,
+            "spilled": self.spilled,
+            "reload_mean_us": self.reload_seconds / self.reloads * 1e6 if self.reloads else 0.0,
+            "reload_max_us": self.reload_max * 1e6,
+        }
+
+
+# -------------------------
+#   CLI
+# -------------------------
+
+def run_stream(pool: PEFPool, lines: Iterable[str]) -> Tuple[int, int]:
+    n_ingest = n_query = 0
+    for line in lines:
+        tenant, sep, sentence = line.rstrip("\n").partition("\t")
+        if not sep:
+            continue
+        if sentence.lstrip().lower().startswith("where "):
+            pool.handle_query(tenant, sentence)
+            n_query += 1
+        else:
+            pool.ingest(tenant, sentence)
+            n_ingest += 1
+    return n_ingest, n_query
+
+
+def parse_size(text: str) -> int:
+    """'512', '64KB', '10MB', '20GB' -> bytes (binary units, as ../bench/workload.py)."""
+    t = text.strip().upper().rstrip("B")
+    for suffix, mult in (("K", 1 << 10), ("M", 1 << 20), ("G", 1 << 30), ("T", 1 << 40)):
+        if t.endswith(suffix):
+            return int(float(t[:-1]) * mult)
+    return int(t)
+
+
+def main(argv: List[str]) -> int:
+    args = list(argv[1:])
+    budget = 64 << 20
+    db: Optional[str] = None
+    if "--budget" in args:
+        i = args.index("--budget")
+        budget = parse_size(args[i + 1])
+        del args[i:i + 2]
+    if "--db" in args:
+        i = args.index("--db")
+        db = args[i + 1]
+        del args[i:i + 2]
+    if not args:
+        print(__doc__.split("Run:")[1].rstrip(), file=sys.stderr)
+        return 2
+
+    t0 = time.perf_counter()
+    with PEFPool(max_bytes=budget, path=db) as pool, open(args[0], "r", encoding="utf-8") as f:
+        n_ingest, n_query = run_stream(pool, f)
+        secs = time.perf_counter() - t0
+        print(f"{n_ingest} ingests, {n_query} queries in {secs:.2f}s "
+              f"({(n_ingest + n_query) / secs:.0f} ops/s), budget {budget} bytes")
+        for key, value in pool.stats().items():
+            print(f"  {key:15} {value:.3f}" if isinstance(value, float) else f"  {key:15} {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv))
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+bench.py
+
+Benchmark suite for the demo engines. Times the core paths of each demo and
+compares them against a stored JSON baseline, so scaling curves can be
+tracked as inputs grow.
+
+Benchmarks (name = group.case[size]):
+
+  lattice.build_lattice[n]      frame_engine.build_lattice(n)
+  lattice.get_pathway[n]        get_pathway over every frame of an n-step lattice
+  lattice.run_lattice[...]      resolver.run_lattice per corpus_examples/ file and mode
+  transitions.mine[n]           mine_transitions_from_text on an n-line synthetic corpus
+  trace.load_trace[id]          trace_player.load_trace per shipped trace
+  trace.replay[id]              headless trace_player.replay (first option, no output)
+  pef.ingest[n]                 pef_dog_demo.ingest over an n-sentence context stream
+  pef.handle_query[n]           handle_query after ingesting n sentences
+  pef.handle_queries[n]         handle_queries on a 1000-query batch after ingesting n sentences
+  gate.run_case[regime]         demo_epistemic_gate.run_case per regime
+
+Each benchmark reports the best and median per-call time over `repeat`
+rounds. Sized benchmarks also report time per item, which is the scaling
+curve.
+
+Run:
+  python bench.py run [--quick] [-k SUBSTR] [--save PATH] [--baseline PATH] [--threshold 0.15]
+  python bench.py compare BASELINE RESULT [--threshold 0.15]
+  python bench.py list
+
+`run` compares against --baseline (default: baseline.json next to this file,
+if present) and exits 1 when any benchmark is slower than baseline by more
+than the threshold. `--save` writes the results as a new baseline.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEMOS = os.path.dirname(HERE)
+LATTICE_DIR = os.path.join(DEMOS, "04_operator-lattice")
+TRACE_DIR = os.path.join(DEMOS, "03_aurora_trace_player_demo", "02_trace_player")
+PEF_DIR = os.path.join(DEMOS, "05_PEF_state_semantics_demo")
+GATE_DIR = os.path.join(DEMOS, "epistemic_legitimacy_pronoun_binding")
+
+for _path in (LATTICE_DIR, TRACE_DIR, PEF_DIR, GATE_DIR):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+import demo_epistemic_gate as gate                                   # noqa: E402
+import pef_dog_demo as pef                                           # noqa: E402
+import trace_player                                                  # noqa: E402
+from frame_engine import build_lattice, get_pathway                  # noqa: E402
+from resolver import run_lattice                                     # noqa: E402
+from transitions import mine_transitions_from_file, mine_transitions_from_text  # noqa: E402
+from workload import corpus_lines, pef_lines                         # noqa: E402
+
+BASELINE_PATH = os.path.join(HERE, "baseline.json")
+RESULT_VERSION = 1
+CORPUS_DIR = os.path.join(LATTICE_DIR, "corpus_examples")
+
+
+# -------------------------
+#   Benchmark definition
+# -------------------------
+
+@dataclass
+class Bench:
+    """
+    One benchmark. `setup()` runs untimed before every call and its result is
+    passed to `fn`, so benchmarks that mutate their input (run_lattice) get a
+    fresh one each time.
+    """
+    name: str
+    fn: Callable[[Any], Any]
+    setup: Callable[[], Any] = lambda: None
+    size: Optional[int] = None          # items per call, for per-item times
+    unit: str = ""
+
+
+def _time(bench: Bench, min_time: float, repeat: int) -> Dict[str, Any]:
+    def one_round(number: int) -> float:
+        # like timeit: no collector pauses inside timed calls
+        total = 0.0
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for _ in range(number):
+                arg = bench.setup()
+                t0 = time.perf_counter()
+                bench.fn(arg)
+                total += time.perf_counter() - t0
+        finally:
+            if enabled:
+                gc.enable()
+        return total
+
+    # calibrate: grow `number` until a round takes at least min_time
+    number = 1
+    while True:
+        secs = one_round(number)
+        if secs >= min_time or number >= 1 << 20:
+            break
+        number = max(number * 2, int(number * min_time / max(secs, 1e-9) * 1.2))
+
+    per_call = [one_round(number) / number for _ in range(repeat)]
+    best = min(per_call)
+    result = {
+        "best_s": best,
+        "median_s": statistics.median(per_call),
+        "number": number,
+        "repeat": repeat,
+    }
+    if bench.size:
+        result["size"] = bench.size
+        result["unit"] = bench.unit
+        result["per_item_us"] = best / bench.size * 1e6
+    return result
+
+
+# -------------------------
+#   Inputs
+# -------------------------
+
+def synthetic_corpus(lines: int, seed: int = 0) -> str:
+    """Numbered corpus of `lines` steps (workload.corpus_lines, default operator mix)."""
+    return "\n".join(itertools.islice(corpus_lines(seed), lines))
+
+
+def pef_stream(sentences: int, seed: int = 0) -> List[str]:
+    """Context sentences for pef_dog_demo.ingest (workload.pef_lines, no queries)."""
+    return list(itertools.islice(pef_lines(seed, query_ratio=0.0), sentences))
+
+
+def pef_query_batch(queries: int = 1_000, seed: int = 0) -> List[str]:
+    """A batch of "where is the dog?" spellings mixed with unsupported queries."""
+    rng = random.Random(seed)
+    forms = ("where is the dog?", "Where is the dog?", "where is the dog",
+             "WHERE IS THE DOG?", "where is the cat?", "who has a dog?")
+    return [rng.choice(forms) for _ in range(queries)]
+
+
+def _first_option(options: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return options[0]
+
+
+def _discard(*args: Any, **kwargs: Any) -> None:
+    pass
+
+
+# -------------------------
+#   Suite
+# -------------------------
+
+def suite(quick: bool = False) -> List[Bench]:
+    lattice_sizes = [1_000, 10_000] if quick else [1_000, 10_000, 100_000]
+    run_steps = 2_000 if quick else 10_000
+    corpus_sizes = [100, 1_000, 10_000] if quick else [100, 1_000, 10_000, 100_000]
+    pef_sizes = [100, 1_000] if quick else [100, 1_000, 10_000]
+
+    benches: List[Bench] = []
+
+    for n in lattice_sizes:
+        benches.append(Bench(f"lattice.build_lattice[{n}]", lambda _, n=n: build_lattice(n),
+                             size=n, unit="frame"))
+        frames = build_lattice(n)
+        benches.append(Bench(f"lattice.get_pathway[{n}]",
+                             lambda _, frames=frames, n=n: [get_pathway(f, n) for f in frames],
+                             size=n, unit="frame"))
+
+    for name in sorted(os.listdir(CORPUS_DIR)):
+        if not name.endswith(".txt"):
+            continue
+        transitions = mine_transitions_from_file(os.path.join(CORPUS_DIR, name), debug=False)
+        for mode in ("conservative", "exploratory"):
+            def setup(steps: int = run_steps) -> List[List[float]]:
+                random.seed(0)
+                return build_lattice(steps)
+            benches.append(Bench(
+                f"lattice.run_lattice[{name[:-4]},{mode},{run_steps}]",
+                lambda frames, t=transitions, m=mode: run_lattice(frames, t, start_op="WE", mode=m),
+                setup=setup, size=run_steps, unit="step"))
+
+    for n in corpus_sizes:
+        text = synthetic_corpus(n)
+        benches.append(Bench(f"transitions.mine[{n}]",
+                             lambda _, text=text: mine_transitions_from_text(text, debug=False),
+                             size=n, unit="line"))
+
+    for tid, _, fname in trace_player.list_traces():
+        path = os.path.join(trace_player.TRACES_DIR, fname)
+        benches.append(Bench(f"trace.load_trace[{tid}]", lambda _, p=path: trace_player.load_trace(p)))
+        tr = trace_player.load_trace(path)
+        benches.append(Bench(f"trace.replay[{tid}]",
+                             lambda _, tr=tr: trace_player.replay(tr, chooser=_first_option, out=_discard)))
+
+    batch = pef_query_batch()
+    for n in pef_sizes:
+        stream = pef_stream(n)
+
+        def ingest_all(state: pef.PEF, stream: List[str] = stream) -> pef.PEF:
+            for sentence in stream:
+                pef.ingest(state, sentence)
+            return state
+
+        benches.append(Bench(f"pef.ingest[{n}]", ingest_all,
+                             setup=lambda: pef.PEF(owners_with_dogs={}), size=n, unit="sentence"))
+        state = ingest_all(pef.PEF(owners_with_dogs={}))
+        benches.append(Bench(f"pef.handle_query[{n}]",
+                             lambda _, s=state: pef.handle_query(s, "where is the dog?")))
+        benches.append(Bench(f"pef.handle_queries[{n}]", lambda _, s=state: pef.handle_queries(s, batch),
+                             size=len(batch), unit="query"))
+
+    for regime in ("none", "emma", "lucy", "both"):
+        benches.append(Bench(f"gate.run_case[{regime}]",
+                             lambda _, r=regime: [gate.run_case(seed, r) for seed in range(10)],
+                             size=10, unit="case"))
+    return benches
+
+
+# -------------------------
+#   Results and comparison
+# -------------------------
+
+def run_suite(benches: List[Bench], min_time: float, repeat: int,
+              log: Callable[[str], None] = print) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for b in benches:
+        results[b.name] = r = _time(b, min_time, repeat)
+        log(format_result(b.name, r))
+    return {
+        "version": RESULT_VERSION,
+        "created_utc": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def format_result(name: str, r: Dict[str, Any]) -> str:
+    line = f"  {name:56} {r['best_s'] * 1e3:11.3f} ms  (median {r['median_s'] * 1e3:.3f})"
+    if "per_item_us" in r:
+        line += f"  {r['per_item_us']:9.3f} us/{r['unit']}"
+    return line
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """Per-benchmark ratio current/baseline of best times; status regression/improved/ok/new."""
+    rows = []
+    base = baseline.get("results", {})
+    for name, r in current.get("results", {}).items():
+        b = base.get(name)
+        if b is None:
+            rows.append({"name": name, "status": "new", "ratio": None})
+            continue
+        ratio = r["best_s"] / b["best_s"] if b["best_s"] else float("inf")
+        if ratio > 1.0 + threshold:
+            status = "regression"
+        elif ratio < 1.0 / (1.0 + threshold):
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append({"name": name, "status": status, "ratio": ratio})
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]], threshold: float) -> int:
+    print(f"\nComparison with baseline (threshold {threshold:.0%}):")
+    regressions = 0
+    for row in rows:
+        if row["status"] == "ok":
+            continue
+        ratio = "" if row["ratio"] is None else f"{row['ratio']:.2f}x"
+        print(f"  {row['status']:10} {row['name']:56} {ratio}")
+        regressions += row["status"] == "regression"
+    ok = sum(1 for row in rows if row["status"] == "ok")
+    print(f"  {ok} within threshold, {regressions} regressions")
+    return regressions
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        obj = json.load(f)
+    if obj.get("version") != RESULT_VERSION:
+        raise ValueError(f"{path}: unsupported benchmark result version")
+    return obj
+
+
+def save_results(obj: Dict[str, Any], path: str) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+# -------------------------
+#   CLI
+# -------------------------
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_run = sub.add_parser("run", help="run the suite")
+    p_run.add_argument("--quick", action="store_true", help="smaller sizes, shorter rounds")
+    p_run.add_argument("-k", dest="filter", default="", help="only benchmarks whose name contains this")
+    p_run.add_argument("--repeat", type=int, default=5)
+    p_run.add_argument("--min-time", type=float, default=0.2, help="seconds per round")
+    p_run.add_argument("--baseline", default=BASELINE_PATH)
+    p_run.add_argument("--save", default="", help="write results to this path")
+    p_run.add_argument("--threshold", type=float, default=0.15)
+
+    p_cmp = sub.add_parser("compare", help="compare two result files")
+    p_cmp.add_argument("baseline")
+    p_cmp.add_argument("result")
+    p_cmp.add_argument("--threshold", type=float, default=0.15)
+
+    sub.add_parser("list", help="list benchmark names")
+
+    args = parser.parse_args()
+
+    if args.cmd == "list":
+        for b in suite():
+            print(b.name)
+        return 0
+
+    if args.cmd == "compare":
+        rows = compare(load_results(args.baseline), load_results(args.result), args.threshold)
+        return 1 if print_comparison(rows, args.threshold) else 0
+
+    benches = [b for b in suite(args.quick) if args.filter in b.name]
+    min_time = args.min_time / 4 if args.quick else args.min_time
+    repeat = min(args.repeat, 3) if args.quick else args.repeat
+    print(f"Running {len(benches)} benchmarks (python {platform.python_version()})")
+    current = run_suite(benches, min_time, repeat)
+
+    regressions = 0
+    if os.path.exists(args.baseline):
+        rows = compare(load_results(args.baseline), current, args.threshold)
+        regressions = print_comparison(rows, args.threshold)
+    if args.save:
+        save_results(current, args.save)
+        print(f"\nSaved results -> {args.save}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+workload.py
+
+Seeded generator of large synthetic inputs for the demo engines:
+
+  corpus  operator-annotated corpora for the transition miner, in numbered
+          ("1. ..."), <STEP>...</STEP> or plain-line format, with a
+          controllable operator mix (WE / THEN / BECAUSE / BUT / IF) and share
+          of operator-free lines
+  traces  trace JSON following 02_trace_player/schema.md (a directory of
+          files, or one trace per line for .jsonl output)
+  pef     context streams for pef_dog_demo.ingest (ownership, dog events,
+          location facts, noise, "where is the dog?" queries), optionally
+          interleaved across conversations as "conv_id<TAB>sentence"
+  gate    stream_source.lazy_stream gate streams, one per paragraph, each
+          ending with the ambiguous sentence
+
+Everything is produced by generators and written line by line, so memory
+stays flat from KB to tens of GB. The same seed and options always give
+byte-identical output.
+
+Run:
+  python workload.py corpus OUT --size 100MB [--format numbered|step|plain] [--mix THEN=3,BUT=1] [--neutral 0.1]
+  python workload.py traces OUT_DIR|OUT.jsonl --count 10000
+  python workload.py pef OUT --size 1GB [--owners 50] [--conversations 1000] [--query-ratio 0.05]
+  python workload.py gate OUT --size 1GB [--noise 1000] [--regime mix]
+
+Every command takes --seed (default 0) and either --size (B, KB, MB, GB) or
+--count (lines; traces for `traces`).
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEMOS = os.path.dirname(HERE)
+LATTICE_DIR = os.path.join(DEMOS, "04_operator-lattice")
+GATE_DIR = os.path.join(DEMOS, "epistemic_legitimacy_pronoun_binding")
+
+for _path in (LATTICE_DIR, GATE_DIR):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+from demo_epistemic_gate import NOISE_POOL           # noqa: E402
+from frame_engine import OPERATORS                    # noqa: E402
+from stream_source import REGIME_ATOMS, lazy_stream   # noqa: E402
+from transitions import detect_operator               # noqa: E402
+
+CORPUS_DIR = os.path.join(LATTICE_DIR, "corpus_examples")
+FORMATS = ("numbered", "step", "plain")
+
+
+def parse_size(text: str) -> int:
+    """'512', '64KB', '10MB', '20GB' -> bytes (binary units)."""
+    t = text.strip().upper().rstrip("B")
+    for suffix, mult in (("K", 1 << 10), ("M", 1 << 20), ("G", 1 << 30), ("T", 1 << 40)):
+        if t.endswith(suffix):
+            return int(float(t[:-1]) * mult)
+    return int(t)
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """'THEN=3,BUT=1' -> weights; unnamed operators keep weight 1."""
+    mix = {op: 1.0 for op in OPERATORS}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        op, _, weight = part.partition("=")
+        op = op.strip().upper()
+        if op not in mix:
+            raise ValueError(f"unknown operator {op!r} (expected one of {', '.join(OPERATORS)})")
+        mix[op] = float(weight)
+    return mix
+
+
+# -------------------------
+#   Operator corpora
+# -------------------------
+
+# Slot words avoid the operator tokens (we/then/because/but/if), so each
+# sentence's first operator token is the one its template starts with.
+_SUBJECTS = ("the model", "the draft", "the estimate", "the plan", "the dataset", "the review",
+             "the prototype", "the schedule", "the hypothesis", "the audit")
+_VERBS = ("revise", "check", "extend", "simplify", "measure", "document", "compare", "test",
+          "rank", "merge")
+_STATES = ("looks incomplete", "holds up", "drifts", "fails a check", "needs more data",
+           "conflicts with the spec", "stays stable", "changes scope")
+
+OP_TEMPLATES: Dict[str, Tuple[str, ...]] = {
+    "WE": ("We {verb} {subj}.", "We {verb} {subj} and note the outcome."),
+    "THEN": ("Then we {verb} {subj}.", "Then {subj} gets a second pass."),
+    "BECAUSE": ("Because {subj} {state}, we {verb} {obj}.",),
+    "BUT": ("But {subj} {state}, so we {verb} {obj}.",),
+    "IF": ("If {subj} {state}, we {verb} {obj}.",),
+}
+NEUTRAL_TEMPLATES = ("{Subj} {state}.", "Notes on {subj} are filed for later.")
+
+
+def _example_sentences() -> Dict[str, List[str]]:
+    """corpus_examples/ lines grouped by detected operator."""
+    pools: Dict[str, List[str]] = {op: [] for op in OPERATORS}
+    for name in sorted(os.listdir(CORPUS_DIR)):
+        with open(os.path.join(CORPUS_DIR, name), "r", encoding="utf-8") as f:
+            for line in f:
+                op = detect_operator(line)
+                if op:
+                    pools[op].append(line.strip())
+    return pools
+
+
+def _sentence(rng: random.Random, template: str) -> str:
+    subj = rng.choice(_SUBJECTS)
+    return template.format(subj=subj, Subj=subj.capitalize(), obj=rng.choice(_SUBJECTS),
+                           verb=rng.choice(_VERBS), state=rng.choice(_STATES))
+
+
+def corpus_lines(
+    seed: int = 0,
+    fmt: str = "numbered",
+    mix: Optional[Dict[str, float]] = None,
+    neutral: float = 0.1,
+    example_ratio: float = 0.3,
+) -> Iterator[str]:
+    """
+    Endless corpus lines. Each step's operator is drawn from `mix`; a share
+    `neutral` of steps carries no operator. `example_ratio` of operator steps
+    reuse real corpus_examples/ sentences, the rest are templated.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+    weights = mix or {op: 1.0 for op in OPERATORS}
+    ops: List[Optional[str]] = [op for op in OPERATORS if weights.get(op, 0) > 0]
+    w = [weights[op] for op in ops]
+    if neutral >= 1.0 or not ops:
+        ops, w = [None], [1.0]
+    elif neutral > 0:
+        # None = operator-free step, weighted so it makes up `neutral` of all steps
+        ops.append(None)
+        w.append(sum(w) * neutral / (1.0 - neutral))
+    cum = list(itertools.accumulate(w))
+    examples = _example_sentences()
+    rng = random.Random(seed)
+
+    i = 0
+    while True:
+        for op in rng.choices(ops, cum_weights=cum, k=4096):
+            i += 1
+            if op is None:
+                text = _sentence(rng, rng.choice(NEUTRAL_TEMPLATES))
+            elif examples[op] and rng.random() < example_ratio:
+                text = rng.choice(examples[op])
+            else:
+                text = _sentence(rng, rng.choice(OP_TEMPLATES[op]))
+            if fmt == "numbered":
+                yield f"{i}. {text}"
+            elif fmt == "step":
+                yield f"<STEP>{text}</STEP>"
+            else:
+                yield text
+
+
+# -------------------------
+#   Traces (schema.md)
+# -------------------------
+
+_NAMES = ("Emma", "Lucy", "Ava", "Mia", "James", "Jenny", "Omar", "Sally", "Noah", "Iris")
+_RELATIONS = ("sister", "brother", "cousin", "friend", "neighbour")
+_OBJECTS = ("book", "bike", "laptop", "scarf", "umbrella")
+_INSTRUMENTS = ("telescope", "camera", "map", "flashlight")
+
+
+def _trace_events(rng: random.Random, a: str, b: str) -> Tuple[str, str, List[Dict[str, Any]]]:
+    kind = rng.choice(("pronoun_antecedent", "possessive", "attachment"))
+    if kind == "pronoun_antecedent":
+        rel = rng.choice(_RELATIONS)
+        span = f"her {rel}"
+        text = f"{a} told {b} that her {rel} was arriving."
+        cands = [f"{a}'s {rel}", f"{b}'s {rel}"]
+        question = f"Please clarify: does “{span}” refer to {a}’s {rel} or {b}’s {rel}?"
+        title = f"{a}, {b}, and “{span}”"
+    elif kind == "possessive":
+        obj = rng.choice(_OBJECTS)
+        span = f"her {obj}"
+        text = f"{a} borrowed {b}'s {obj}. Later she lost her {obj}."
+        cands = [f"{a}'s {obj}", f"{b}'s {obj}"]
+        question = f"Please clarify: whose {obj} was lost?"
+        title = f"Possessive binding: {a}, {b}, {obj}"
+    else:
+        inst = rng.choice(_INSTRUMENTS)
+        span = f"with a {inst}"
+        text = f"{a} saw {b} with a {inst}."
+        cands = [f"{a} had the {inst}", f"{b} had the {inst}"]
+        question = f"Please clarify: who had the {inst}?"
+        title = f"Attachment: {a}, {b}, {inst}"
+
+    events: List[Dict[str, Any]] = [
+        {"t": "utterance", "id": "e1", "data": {"speaker": "user", "text": text}},
+        {"t": "ambiguity_detected", "id": "e2",
+         "data": {"kind": kind, "span": span, "candidates": cands, "question": question}},
+    ]
+    options = [{"key": k, "answer": f"It is {c}.", "binds": {span: c}}
+               for k, c in zip("AB", cands)]
+    unresolved = rng.random() < 0.25
+    if unresolved:
+        options.append({"key": "C", "answer": "I can’t tell from the text.", "binds": {span: "UNRESOLVED"}})
+    events.append({"t": "clarification_options", "id": "e3", "data": {"options": options}})
+    events.append({"t": "binding_committed", "id": "e4",
+                   "data": {"binding": {span: "<CHOICE>"}, "commit_policy": "bind_then_commit"}})
+    events.append({"t": "resolved_interpretation", "id": "e5",
+                   "data": {"interpretation": f"{text} ({span} = <CHOICE>)",
+                            "facts": [f"binding({span}, <CHOICE>)"]}})
+    stance = "refusal_resolved" if not unresolved else rng.choice(("refusal_resolved", "refusal_unresolved"))
+    events.append({"t": "terminal_stance", "id": "e6",
+                   "data": {"stance": stance, "notes": "Synthetic trace (workload.py)."}})
+    return title, text, events
+
+
+def trace_objects(seed: int = 0, version: str = "1.0") -> Iterator[Dict[str, Any]]:
+    """Endless schema-conformant trace objects with ids synth_000001, ..."""
+    rng = random.Random(seed)
+    for i in itertools.count(1):
+        a, b = rng.sample(_NAMES, 2)
+        title, text, events = _trace_events(rng, a, b)
+        day = 1 + rng.randrange(28)
+        yield {
+            "trace_id": f"synth_{i:06d}",
+            "title": title,
+            "version": version,
+            "created_utc": f"2025-12-{day:02d}T{rng.randrange(24):02d}:{rng.randrange(60):02d}:00Z",
+            "source_text": text,
+            "entities": {},
+            "events": events,
+        }
+
+
+# -------------------------
+#   PEF and gate streams
+# -------------------------
+
+def _owner_names(n: int) -> List[str]:
+    """n distinct single-word lowercase names (pef_dog_demo matches \\w+)."""
+    base = [name.lower() for name in _NAMES]
+    if n <= len(base):
+        return base[:n]
+    return base + [f"owner{i}" for i in range(n - len(base))]
+
+
+def pef_lines(
+    seed: int = 0,
+    owners: int = 8,
+    conversations: int = 0,
+    query_ratio: float = 0.05,
+    noise: float = 0.4,
+) -> Iterator[str]:
+    """
+    Endless PEF context sentences: "<name> had a dog.", "The dog ran away.",
+    "<name>'s dog is at the <place>.", noise, and "where is the dog?" queries
+    (ingest ignores them). With conversations > 0 each line is prefixed with a
+    conversation id and a tab, ids drawn uniformly from conv0..conv{n-1}.
+    """
+    rng = random.Random(seed)
+    names = _owner_names(owners)
+    places = ("park", "beach", "vet", "garden", "river", "market")
+    while True:
+        r = rng.random()
+        if r < query_ratio:
+            text = "where is the dog?"
+        elif r < query_ratio + noise:
+            text = rng.choice(NOISE_POOL)
+        else:
+            r = rng.random()
+            name = rng.choice(names)
+            if r < 0.5:
+                text = f"{name.capitalize()} had a dog."
+            elif r < 0.7:
+                text = "The dog ran away."
+            else:
+                text = f"{name.capitalize()}'s dog is at the {rng.choice(places)}."
+        if conversations:
+            yield f"conv{rng.randrange(conversations)}\t{text}"
+        else:
+            yield text
+
+
+def gate_lines(
+    seed: int = 0,
+    noise: int = 1000,
+    regime: str = "mix",
+    template_ratio: float = 0.5,
+) -> Iterator[str]:
+    """
+    Endless gate streams (stream_source.lazy_stream), separated by blank lines.
+    regime "mix" draws each stream's regime; evidence lands at a random position.
+    """
+    regimes = list(REGIME_ATOMS)
+    if regime != "mix" and regime not in regimes:
+        raise ValueError("regime must be one of: mix, " + ", ".join(regimes))
+    rng = random.Random(seed)
+    for i in itertools.count():
+        r = rng.choice(regimes) if regime == "mix" else regime
+        pos = rng.randrange(noise + 1)
+        yield from lazy_stream(seed=seed * 1_000_003 + i, n_noise=noise, regime=r,
+                               positions=[pos], template_ratio=template_ratio)
+        yield ""
+
+
+# -------------------------
+#   Streaming writers
+# -------------------------
+
+def write_lines(lines: Iterable[str], path: str, size: Optional[int] = None,
+                count: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Write lines until `size` bytes or `count` lines (whichever is given) are
+    reached; returns (lines, bytes). The last line is never cut.
+    """
+    if size is None and count is None:
+        raise ValueError("give a size or a count")
+    n = written = 0
+    buf: List[bytes] = []
+    pending = 0
+    with open(path, "wb") as f:
+        for line in lines:
+            data = (line + "\n").encode("utf-8")
+            buf.append(data)
+            pending += len(data)
+            written += len(data)
+            n += 1
+            done = (size is not None and written >= size) or (count is not None and n >= count)
+            if pending >= 1 << 20 or done:
+                f.write(b"".join(buf))
+                buf = []
+                pending = 0
+            if done:
+                break
+    return n, written
+
+
+def write_traces(objs: Iterable[Dict[str, Any]], out: str, size: Optional[int] = None,
+                 count: Optional[int] = None) -> Tuple[int, int]:
+    """Traces as one JSON file each in directory `out`, or as JSON lines if out ends in .jsonl."""
+    if out.endswith(".jsonl"):
+        return write_lines((json.dumps(o, ensure_ascii=False) for o in objs), out, size, count)
+    if size is None and count is None:
+        raise ValueError("give a size or a count")
+    os.makedirs(out, exist_ok=True)
+    n = written = 0
+    for obj in objs:
+        data = json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+        with open(os.path.join(out, obj["trace_id"] + ".json"), "wb") as f:
+            f.write(data)
+        n += 1
+        written += len(data)
+        if (size is not None and written >= size) or (count is not None and n >= count):
+            break
+    return n, written
+
+
+# -------------------------
+#   CLI
+# -------------------------
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    def add(name: str, help_text: str) -> argparse.ArgumentParser:
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("out")
+        p.add_argument("--seed", type=int, default=0)
+        p.add_argument("--size", type=parse_size, default=None, help="e.g. 64KB, 10MB, 20GB")
+        p.add_argument("--count", type=int, default=None)
+        return p
+
+    p = add("corpus", "operator-annotated corpus")
+    p.add_argument("--format", choices=FORMATS, default="numbered")
+    p.add_argument("--mix", type=parse_mix, default=None, help="operator weights, e.g. THEN=3,BUT=1")
+    p.add_argument("--neutral", type=float, default=0.1, help="share of operator-free lines")
+
+    add("traces", "schema.md traces (directory, or .jsonl)")
+
+    p = add("pef", "PEF context streams")
+    p.add_argument("--owners", type=int, default=8)
+    p.add_argument("--conversations", type=int, default=0)
+    p.add_argument("--query-ratio", type=float, default=0.05)
+
+    p = add("gate", "gate streams")
+    p.add_argument("--noise", type=int, default=1000, help="noise lines per stream")
+    p.add_argument("--regime", default="mix")
+
+    args = parser.parse_args()
+    if args.size is None and args.count is None:
+        parser.error("one of --size or --count is required")
+
+    t0 = time.perf_counter()
+    if args.cmd == "corpus":
+        n, nbytes = write_lines(corpus_lines(args.seed, args.format, args.mix, args.neutral),
+                                args.out, args.size, args.count)
+    elif args.cmd == "traces":
+        n, nbytes = write_traces(trace_objects(args.seed), args.out, args.size, args.count)
+    elif args.cmd == "pef":
+        n, nbytes = write_lines(pef_lines(args.seed, args.owners, args.conversations, args.query_ratio),
+                                args.out, args.size, args.count)
+    else:
+        n, nbytes = write_lines(gate_lines(args.seed, args.noise, args.regime),
+                                args.out, args.size, args.count)
+    secs = time.perf_counter() - t0
+    unit = "traces" if args.cmd == "traces" else "lines"
+    print(f"{args.cmd}: {n} {unit}, {nbytes} bytes in {secs:.2f}s "
+          f"({nbytes / max(secs, 1e-9) / (1 << 20):.1f} MB/s) -> {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+binding_gate.py
+
+N-candidate generalisation of `demo_epistemic_gate.gate_legitimate`.
+
+The toy gate hardcodes two bindings (Emma's / Lucy's sister) as boolean fields.
+Here the candidate set is arbitrary: an inverted index maps each evidence phrase
+to the candidates it supports, and one compiled scan per sentence feeds it.
+Deciding costs O(evidence) — the text scanned plus the postings hit — instead of
+O(candidates x sentences).
+
+`StreamingGate` applies the same gate incrementally to a live stream: one
+sentence at a time, with the current decision available at any point.
+
+The invariant is unchanged:
+    resolve ⇔ |SupportedBindings| = 1
+    refuse  ⇔ |SupportedBindings| ≠ 1
+
+This is still a TOY. It is not Aurora.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from demo_epistemic_gate import (
+    Decision,
+    EvidenceScanner,
+    Interpretation,
+    context_lines,
+    count_decision,
+    normalize,
+)
+
+
+class CandidateIndex:
+    """
+    Inverted index: evidence phrase -> ids of the candidate bindings it supports.
+
+    By default each candidate is evidenced by its own binding phrase
+    (e.g. "Emma's sister"); extra phrases can be attached with `add_evidence`.
+    """
+
+    def __init__(
+        self,
+        candidates: Iterable[str],
+        evidence: Optional[Dict[str, Iterable[str]]] = None,
+    ) -> None:
+        self.candidates: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self.postings: Dict[str, List[int]] = {}
+        # Scanner atoms map phrase -> phrase; the postings do the fan-out.
+        self.scanner = EvidenceScanner(atoms={}, pressure_keywords=[])
+
+        for binding in candidates:
+            self.add_candidate(binding)
+        for binding, phrases in (evidence or {}).items():
+            for phrase in phrases:
+                self.add_evidence(phrase, binding)
+
+    def __len__(self) -> int:
+        return len(self.candidates)
+
+    def add_candidate(self, binding: str) -> int:
+        if binding in self._ids:
+            return self._ids[binding]
+        cid = len(self.candidates)
+        self.candidates.append(binding)
+        self._ids[binding] = cid
+        self.add_evidence(binding, binding)
+        return cid
+
+    def add_evidence(self, phrase: str, binding: str) -> None:
+        """Attach an evidence phrase to a candidate (registering the candidate if new)."""
+        cid = self.add_candidate(binding)
+        key = normalize(phrase).lower()
+        posting = self.postings.setdefault(key, [])
+        if cid not in posting:
+            posting.append(cid)
+        self.scanner.add_atom(key, key)
+
+    def lookup(self, sentence: str) -> Set[int]:
+        """Candidate ids supported by one sentence (one scan + postings lookups)."""
+        hits, _ = self.scanner.scan(sentence)
+        out: Set[int] = set()
+        for phrase in hits:
+            out.update(self.postings[phrase])
+        return out
+
+
+class IndexedGate:
+    """Epistemic legitimacy gate over an arbitrary candidate set."""
+
+    def __init__(self, index: CandidateIndex, span: str = "her sister") -> None:
+        self.index = index
+        self.span = span
+
+    @classmethod
+    def for_candidates(cls, candidates: Iterable[str], **kwargs) -> "IndexedGate":
+        return cls(CandidateIndex(candidates), **kwargs)
+
+    def supported_ids(self, stream: Iterable[str]) -> Set[int]:
+        """Ids supported by prefix evidence (excluding the ambiguous sentence)."""
+        supported: Set[int] = set()
+        for line in context_lines(stream):
+            supported |= self.index.lookup(line)
+        return supported
+
+    def supported_bindings(self, stream: Iterable[str]) -> List[str]:
+        return [self.index.candidates[i] for i in sorted(self.supported_ids(stream))]
+
+    def decide(self, stream: Iterable[str]) -> Decision:
+        return count_decision(self.decision_for(self.supported_ids(stream)))
+
+    def decision_for(self, supported_ids: Set[int]) -> Decision:
+        """
+        Build the Decision from a supported-id set.
+
+        The resolve/refuse choice only looks at |supported|; listing the
+        interpretations is the one O(candidates) step and happens once.
+        """
+        candidates = self.index.candidates
+        supported = [candidates[i] for i in sorted(supported_ids)]
+        interps = [
+            asdict(Interpretation(b, True, i in supported_ids))
+            for i, b in enumerate(candidates)
+        ]
+        meta = {"supported_bindings": supported, "candidate_count": len(candidates)}
+
+        if len(supported) == 0:
+            return Decision(
+                engine="GATE",
+                status="REFUSE_AMBIGUOUS_UNCONSTRAINED",
+                resolved_to=None,
+                explanation=(
+                    f"Ambiguity detected ('{self.span}' can bind to any of {len(candidates)} candidates). "
+                    "No prior context supports any binding, so a single conclusion is not licensed."
+                ),
+                interpretations=interps,
+                meta=meta,
+            )
+
+        if len(supported) == 1:
+            return Decision(
+                engine="GATE",
+                status="RESOLVED_BY_CONTEXT",
+                resolved_to=supported[0],
+                explanation=(
+                    f"Ambiguity detected. Prior context uniquely supports {supported[0]}, "
+                    "so collapse is licensed."
+                ),
+                interpretations=interps,
+                meta=meta,
+            )
+
+        return Decision(
+            engine="GATE",
+            status="REFUSE_AMBIGUOUS_SUPPORTED",
+            resolved_to=None,
+            explanation=(
+                f"Ambiguity detected. Prior context supports {len(supported)} bindings, "
+                "so collapse is not licensed. Refusal/clarification is the correct outcome."
+            ),
+            interpretations=interps,
+            meta=meta,
+        )
+
+
+# -------------------------
+#   STREAMING (INCREMENTAL) GATE
+# -------------------------
+
+_UNCONSTRAINED = "REFUSE_AMBIGUOUS_UNCONSTRAINED"
+_RESOLVED = "RESOLVED_BY_CONTEXT"
+_SUPPORTED = "REFUSE_AMBIGUOUS_SUPPORTED"
+
+
+@dataclass(frozen=True)
+class GateEvent:
+    """Emitted by StreamingGate only when the decision changes."""
+    position: int                  # number of sentences consumed when the change happened
+    previous_status: str
+    status: str
+    resolved_to: Optional[str]
+    supported_bindings: Tuple[str, ...]
+
+
+class StreamingGate:
+    """
+    Incremental gate for live streams.
+
+    Every pushed sentence is treated as prior context; `decision()` answers
+    "what would the gate say if the ambiguous sentence arrived now?".
+    Each push costs one scan of that sentence plus its postings (O(1) amortized
+    in the history length); history is never rescanned. The full Decision is
+    only rebuilt when asked for after a change.
+    """
+
+    def __init__(self, gate: IndexedGate) -> None:
+        self.gate = gate
+        self.position = 0
+        self._supported: Set[int] = set()
+        self._status = _UNCONSTRAINED
+        self._decision: Optional[Decision] = None
+
+    @classmethod
+    def for_candidates(cls, candidates: Iterable[str], **kwargs) -> "StreamingGate":
+        return cls(IndexedGate.for_candidates(candidates, **kwargs))
+
+    @property
+    def status(self) -> str:
+        return self._status
+
+    @property
+    def resolved_to(self) -> Optional[str]:
+        if self._status != _RESOLVED:
+            return None
+        return self.gate.index.candidates[next(iter(self._supported))]
+
+    def supported_bindings(self) -> List[str]:
+        return [self.gate.index.candidates[i] for i in sorted(self._supported)]
+
+    def push(self, sentence: str) -> Optional[GateEvent]:
+        """Consume one sentence; return a GateEvent only if the decision changed."""
+        self.position += 1
+        new = self.gate.index.lookup(sentence) - self._supported
+        if not new:
+            return None
+
+        self._supported |= new
+        self._decision = None
+        previous = self._status
+        self._status = _RESOLVED if len(self._supported) == 1 else _SUPPORTED
+
+        # A third (fourth, ...) supported binding changes the support set but not
+        # the decision: it was and stays REFUSE_AMBIGUOUS_SUPPORTED.
+        if self._status == previous:
+            return None
+        return GateEvent(
+            position=self.position,
+            previous_status=previous,
+            status=self._status,
+            resolved_to=self.resolved_to,
+            supported_bindings=tuple(self.supported_bindings()),
+        )
+
+    def feed(self, sentences: Iterable[str]) -> Iterator[GateEvent]:
+        """Push every sentence, yielding only the decision changes."""
+        for sentence in sentences:
+            event = self.push(sentence)
+            if event is not None:
+                yield event
+
+    def decision(self) -> Decision:
+        """
+        Current Decision; rebuilt only after the support set changed. It is
+        counted in gate_decisions_total when rebuilt, so polling does not add to it.
+        """
+        if self._decision is None:
+            self._decision = count_decision(self.gate.decision_for(self._supported))
+        return self._decision
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+clarification_engine.py
+
+Precompiled clarification resolver for a fixed candidate set.
+
+`demo_epistemic_gate.apply_clarification` re-splits and re-lowercases every
+binding and substring-scans all candidates on each call. This engine does that
+work once per candidate set:
+
+- owner names ("Emma" from "Emma's sister") are compiled into ONE word-bounded
+  trie regex, so a clarification is matched in O(text) against all candidates,
+  and "Emmanuel" no longer matches "Emma"
+- `/bind <binding>` is an exact dictionary lookup, falling back to name matching
+- recent clarification texts are memoized in an LRU cache
+
+Returns a binding only when exactly one candidate is identified; otherwise None
+(further clarification required), as in `apply_clarification`.
+"""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set
+
+from demo_epistemic_gate import normalize, trie_regex
+
+
+def owner_name(binding: str) -> str:
+    """"Emma's sister" -> "Emma" (the whole binding if it has no possessive)."""
+    return normalize(binding).split("'s")[0].strip()
+
+
+class ClarificationEngine:
+    """Built once per candidate set; `resolve` is memoized per clarification text."""
+
+    def __init__(self, candidate_bindings: Iterable[str], cache_size: int = 4096) -> None:
+        self.candidates: List[str] = list(candidate_bindings)
+        self._by_binding: Dict[str, int] = {}
+        self._by_name: Dict[str, Set[int]] = {}
+        for cid, binding in enumerate(self.candidates):
+            self._by_binding.setdefault(normalize(binding).lower(), cid)
+            name = owner_name(binding).lower()
+            if name:
+                self._by_name.setdefault(name, set()).add(cid)
+
+        if self._by_name:
+            self._names = re.compile(r"\b(?:%s)\b" % trie_regex(self._by_name))
+        else:
+            self._names = re.compile(r"(?!)")
+
+        self.resolve = lru_cache(maxsize=cache_size)(self._resolve)
+
+    def cache_info(self):
+        return self.resolve.cache_info()
+
+    def extract(self, text: str) -> List[str]:
+        """Bindings whose owner name appears as a whole word in `text` (candidate order)."""
+        return [self.candidates[i] for i in sorted(self._match_ids(normalize(text).lower()))]
+
+    def _match_ids(self, text_lower: str) -> Set[int]:
+        ids: Set[int] = set()
+        m = self._names.search(text_lower)
+        while m is not None:
+            ids |= self._by_name[m.group()]
+            # restart one past the match start so overlapping names are not hidden
+            m = self._names.search(text_lower, m.start() + 1)
+        return ids
+
+    def _resolve(self, clarification: str) -> Optional[str]:
+        text = normalize(clarification).strip()
+
+        # /bind shortcut: exact binding first, then fall through to name matching.
+        if text.startswith("/bind"):
+            entity = text[5:].strip().lower()
+            cid = self._by_binding.get(entity)
+            if cid is not None:
+                return self.candidates[cid]
+            text = entity
+
+        ids = self._match_ids(text.lower())
+        if len(ids) == 1:
+            return self.candidates[next(iter(ids))]
+        return None
+
+
+def test_engine() -> None:
+    """Same cases as demo_epistemic_gate.test_clarification, plus word-boundary cases."""
+    engine = ClarificationEngine(["Emma's sister", "Lucy's sister"])
+
+    test_cases = [
+        ("Emma", "Emma's sister"),
+        ("Lucy", "Lucy's sister"),
+        ("It's Emma's sister", "Emma's sister"),
+        ("I mean Lucy", "Lucy's sister"),
+        ("/bind Emma's sister", "Emma's sister"),
+        ("/bind Lucy", "Lucy's sister"),
+        ("both", None),  # Multiple matches
+        ("neither", None),  # No matches
+        ("", None),  # Empty
+        ("Emmanuel", None),  # word boundary: not Emma
+        ("Emma and Lucy", None),  # both named
+        ("LUCY’s", "Lucy's sister"),
+    ]
+
+    print("\n" + "=" * 72)
+    print("TESTING: ClarificationEngine (precompiled, word-bounded, memoized)")
+    print("=" * 72 + "\n")
+
+    for _ in range(2):  # second pass is served from the LRU cache
+        for input_text, expected in test_cases:
+            result = engine.resolve(input_text)
+            status = "✓" if result == expected else "✗"
+            print(f"{status} Input: {input_text!r:30} -> {result!r:20} (expected: {expected!r})")
+        print()
+
+    print(engine.cache_info())
+    print()
+
+
+if __name__ == "__main__":
+    test_engine()
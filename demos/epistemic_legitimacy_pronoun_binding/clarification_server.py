@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+clarification_server.py
+
+Local asyncio server for the STOP → clarify → bind loop, with many concurrent
+clarification sessions.
+
+Protocol: one JSON object per line over TCP.
+
+  {"op": "open", "context": [...lines, ambiguous sentence],
+   "candidates": ["Emma's sister", "Lucy's sister"], "span": "her sister"}
+      (context: a list of lines, or one string as a single line;
+       candidates: optional list of at least two distinct strings)
+      -> {"status": "RESOLVED", "bindings": {span: binding}}     (gate licensed)
+      -> {"status": "STOP", "session": id, "gate_status": ...,
+          "question": ..., "candidates": [...]}                 (session opened)
+
+  {"op": "clarify", "session": id, "text": "I mean Lucy"}
+      -> {"status": "BOUND", "session": id, "bindings": {span: binding}}
+      -> {"status": "STOP", "session": id, "question": ...}     (still ambiguous)
+      -> {"status": "UNKNOWN_SESSION", "session": id}           (expired/evicted)
+
+  {"op": "close", "session": id}   -> {"status": "CLOSED", ...}
+  {"op": "stats"}                  -> counters
+
+The gate is `binding_gate.IndexedGate`; clarifications are matched with
+`clarification_engine.ClarificationEngine` (the `apply_clarification` rules:
+bind only when exactly one candidate is identified). Gates and engines are
+shared per candidate set. Sessions live in one LRU-ordered table: idle sessions
+expire after `ttl` seconds, and the table is capped at `max_sessions`
+(oldest-idle evicted first), so memory stays bounded.
+
+Run:
+  python clarification_server.py serve [--port 8765]
+  python clarification_server.py load [--sessions 20000] [--concurrency 200]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import secrets
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from binding_gate import IndexedGate
+from clarification_engine import ClarificationEngine
+
+DEFAULT_CANDIDATES = ("Emma's sister", "Lucy's sister")
+DEFAULT_SPAN = "her sister"
+
+
+class Session:
+    __slots__ = ("sid", "span", "candidates", "engine", "bindings", "last_seen")
+
+    def __init__(self, sid: str, span: str, candidates: Tuple[str, ...],
+                 engine: ClarificationEngine, now: float) -> None:
+        self.sid = sid
+        self.span = span
+        self.candidates = candidates
+        self.engine = engine
+        self.bindings: Dict[str, str] = {}
+        self.last_seen = now
+
+
+def parse_candidates(value: object) -> Tuple[str, ...]:
+    """The "candidates" field of an open request: absent -> defaults, else >= 2 distinct strings."""
+    if value is None:
+        return DEFAULT_CANDIDATES
+    if not isinstance(value, list) or not all(isinstance(c, str) for c in value):
+        raise ValueError("candidates must be a list of strings")
+    if len(set(value)) < 2:
+        raise ValueError("candidates must name at least two distinct bindings")
+    return tuple(value)
+
+
+def parse_context(value: object) -> List[str]:
+    """The "context" field of an open request: absent -> [], a string is one line, else a list of strings."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    if not isinstance(value, list) or not all(isinstance(line, str) for line in value):
+        raise ValueError("context must be a string or a list of strings")
+    return list(value)
+
+
+def clarification_question(span: str, candidates: Tuple[str, ...]) -> str:
+    if len(candidates) == 2:
+        return f"Please clarify: does '{span}' mean {candidates[0]} or {candidates[1]}?"
+    return f"Please clarify: does '{span}' mean {', '.join(candidates[:-1])}, or {candidates[-1]}?"
+
+
+class SessionManager:
+    """Open sessions keyed by id, ordered by last activity (oldest first)."""
+
+    def __init__(self, ttl: float = 300.0, max_sessions: int = 100_000,
+                 max_candidate_sets: int = 1024) -> None:
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_candidate_sets = max_candidate_sets
+        self.sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._engines: "OrderedDict[Tuple[str, ...], Tuple[IndexedGate, ClarificationEngine]]" = OrderedDict()
+        self.counters = {
+            "opened": 0, "resolved_by_gate": 0, "bound": 0, "still_ambiguous": 0,
+            "expired": 0, "evicted": 0, "closed": 0, "unknown_session": 0,
+        }
+
+    def _engines_for(self, candidates: Tuple[str, ...]) -> Tuple[IndexedGate, ClarificationEngine]:
+        pair = self._engines.get(candidates)
+        if pair is None:
+            pair = (IndexedGate.for_candidates(candidates), ClarificationEngine(candidates))
+            self._engines[candidates] = pair
+            if len(self._engines) > self.max_candidate_sets:
+                self._engines.popitem(last=False)
+        else:
+            self._engines.move_to_end(candidates)
+        return pair
+
+    def open(self, context: List[str], candidates: Tuple[str, ...], span: str) -> Dict:
+        gate, engine = self._engines_for(candidates)
+        decision = gate.decide(context)
+        if decision.resolved_to is not None:
+            self.counters["resolved_by_gate"] += 1
+            return {"status": "RESOLVED", "gate_status": decision.status,
+                    "bindings": {span: decision.resolved_to}}
+
+        now = time.monotonic()
+        sid = secrets.token_urlsafe(12)
+        self.sessions[sid] = Session(sid, span, candidates, engine, now)
+        self.counters["opened"] += 1
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+            self.counters["evicted"] += 1
+        return {"status": "STOP", "session": sid, "gate_status": decision.status,
+                "question": clarification_question(span, candidates),
+                "candidates": list(candidates)}
+
+    def clarify(self, sid: str, text: str) -> Dict:
+        session = self.sessions.get(sid)
+        if session is None:
+            self.counters["unknown_session"] += 1
+            return {"status": "UNKNOWN_SESSION", "session": sid}
+
+        binding = session.engine.resolve(text)
+        if binding is None:
+            session.last_seen = time.monotonic()
+            self.sessions.move_to_end(sid)
+            self.counters["still_ambiguous"] += 1
+            return {"status": "STOP", "session": sid,
+                    "question": clarification_question(session.span, session.candidates)}
+
+        session.bindings[session.span] = binding
+        del self.sessions[sid]
+        self.counters["bound"] += 1
+        return {"status": "BOUND", "session": sid, "bindings": dict(session.bindings)}
+
+    def close(self, sid: str) -> Dict:
+        if self.sessions.pop(sid, None) is None:
+            self.counters["unknown_session"] += 1
+            return {"status": "UNKNOWN_SESSION", "session": sid}
+        self.counters["closed"] += 1
+        return {"status": "CLOSED", "session": sid}
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Drop idle sessions; O(expired) because the table is activity-ordered."""
+        cutoff = (time.monotonic() if now is None else now) - self.ttl
+        n = 0
+        while self.sessions:
+            sid, session = next(iter(self.sessions.items()))
+            if session.last_seen > cutoff:
+                break
+            del self.sessions[sid]
+            n += 1
+        self.counters["expired"] += n
+        return n
+
+    def stats(self) -> Dict:
+        return dict(self.counters, open_sessions=len(self.sessions),
+                    candidate_sets=len(self._engines))
+
+    def handle(self, req: Dict) -> Dict:
+        op = req.get("op")
+        if op == "open":
+            candidates = parse_candidates(req.get("candidates"))
+            context = parse_context(req.get("context"))
+            return self.open(context, candidates, str(req.get("span", DEFAULT_SPAN)))
+        if op == "clarify":
+            return self.clarify(str(req.get("session", "")), str(req.get("text", "")))
+        if op == "close":
+            return self.close(str(req.get("session", "")))
+        if op == "stats":
+            return self.stats()
+        return {"status": "BAD_REQUEST", "message": f"unknown op {op!r}"}
+
+
+# -------------------------
+#   SERVER
+# -------------------------
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[bytes]:
+    """Next request line (b"" at EOF), or None for a line over the stream limit, which is skipped."""
+    try:
+        return await reader.readuntil(b"\n")
+    except asyncio.IncompleteReadError as exc:
+        return exc.partial
+    except asyncio.LimitOverrunError as exc:
+        consumed = exc.consumed
+    while True:
+        await reader.read(consumed)
+        try:
+            await reader.readuntil(b"\n")
+            return None
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError as exc:
+            consumed = exc.consumed
+
+
+async def _serve_client(manager: SessionManager, reader: asyncio.StreamReader,
+                        writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:
+            line = await _read_request(reader)
+            if line is None:
+                resp = {"status": "BAD_REQUEST", "message": "request line too long"}
+            else:
+                if not line:
+                    break
+                try:
+                    resp = manager.handle(json.loads(line))
+                except (ValueError, TypeError, AttributeError) as exc:
+                    resp = {"status": "BAD_REQUEST", "message": str(exc)}
+            writer.write(json.dumps(resp, ensure_ascii=True).encode("ascii") + b"\n")
+            await writer.drain()
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        writer.close()
+
+
+class ClarificationServer:
+    """TCP front end for a SessionManager, plus the idle-session reaper."""
+
+    def __init__(self, manager: SessionManager) -> None:
+        self.manager = manager
+        self.server: Optional[asyncio.AbstractServer] = None
+        self._reaper: Optional[asyncio.Task] = None
+        self._clients: set = set()
+
+    @property
+    def port(self) -> int:
+        return self.server.sockets[0].getsockname()[1]
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765) -> "ClarificationServer":
+        self.server = await asyncio.start_server(self._on_client, host, port, limit=1 << 20)
+        self._reaper = asyncio.create_task(self._reap())
+        return self
+
+    async def _on_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._clients.add(task)
+        try:
+            await _serve_client(self.manager, reader, writer)
+        finally:
+            self._clients.discard(task)
+
+    async def _reap(self) -> None:
+        interval = max(0.05, self.manager.ttl / 4)
+        while True:
+            await asyncio.sleep(interval)
+            self.manager.expire()
+
+    async def close(self) -> None:
+        if self._reaper is not None:
+            self._reaper.cancel()
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for task in list(self._clients):
+            task.cancel()
+        await asyncio.gather(*self._clients, return_exceptions=True)
+
+
+async def serve(host: str, port: int, ttl: float, max_sessions: int) -> None:
+    server = await ClarificationServer(SessionManager(ttl=ttl, max_sessions=max_sessions)).start(host, port)
+    print(f"Clarification server on {host}:{port} (ttl={ttl}s, max_sessions={max_sessions})")
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.close()
+
+
+# -------------------------
+#   LOAD GENERATOR
+# -------------------------
+
+_CONTEXT_BOTH = [
+    "This is a mess. I'm not even sure what to think anymore.",
+    "Emma's sister and Lucy's sister both live overseas.",
+    "Emma told Lucy that her sister was arriving.",
+]
+_ANSWERS = ["I mean Lucy", "Emma", "it's Lucy's", "/bind Emma's sister"]
+
+
+def _percentiles(samples: List[float]) -> str:
+    if not samples:
+        return "n/a"
+    s = sorted(samples)
+    pick = lambda q: s[min(len(s) - 1, int(q * len(s)))] * 1e3  # noqa: E731
+    return f"p50={pick(0.50):.2f}ms p95={pick(0.95):.2f}ms p99={pick(0.99):.2f}ms"
+
+
+async def _rpc(reader, writer, req: Dict) -> Dict:
+    writer.write(json.dumps(req).encode("ascii") + b"\n")
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+
+async def run_load(host: str, port: int, sessions: int, concurrency: int) -> Dict:
+    """
+    Phase 1 opens `sessions` sessions (all held open at once), phase 2 answers
+    every one of them with one vague and then one binding clarification.
+    """
+    conns = [await asyncio.open_connection(host, port, limit=1 << 20) for _ in range(concurrency)]
+    open_lat: List[float] = []
+    clarify_lat: List[float] = []
+    sids: List[str] = []
+
+    async def opener(conn, n):
+        reader, writer = conn
+        for _ in range(n):
+            t = time.perf_counter()
+            resp = await _rpc(reader, writer, {"op": "open", "context": _CONTEXT_BOTH})
+            open_lat.append(time.perf_counter() - t)
+            sids.append(resp["session"])
+
+    async def clarifier(conn, batch):
+        reader, writer = conn
+        for i, sid in enumerate(batch):
+            for text in ("both of them", _ANSWERS[i % len(_ANSWERS)]):
+                t = time.perf_counter()
+                resp = await _rpc(reader, writer, {"op": "clarify", "session": sid, "text": text})
+                clarify_lat.append(time.perf_counter() - t)
+            if resp["status"] != "BOUND":
+                raise AssertionError(f"session {sid} did not bind: {resp}")
+
+    per = [sessions // concurrency + (1 if i < sessions % concurrency else 0) for i in range(concurrency)]
+    t0 = time.perf_counter()
+    await asyncio.gather(*(opener(c, n) for c, n in zip(conns, per)))
+    t1 = time.perf_counter()
+    reader, writer = conns[0]
+    peak = await _rpc(reader, writer, {"op": "stats"})
+    await asyncio.gather(*(clarifier(c, sids[i::concurrency]) for i, c in enumerate(conns)))
+    t2 = time.perf_counter()
+    final = await _rpc(reader, writer, {"op": "stats"})
+
+    for _, w in conns:
+        w.close()
+        await w.wait_closed()
+
+    total = t2 - t0
+    print(f"\nClarification load: {sessions} sessions over {concurrency} connections")
+    print(f"  open phase    {t1 - t0:6.2f}s  peak open sessions={peak['open_sessions']}")
+    print(f"  clarify phase {t2 - t1:6.2f}s")
+    print(f"  throughput    {sessions / total:8.0f} sessions/s (open + 2 clarifications each)")
+    print(f"  open latency    {_percentiles(open_lat)}")
+    print(f"  clarify latency {_percentiles(clarify_lat)}")
+    print(f"  server stats  {final}\n")
+    return {"sessions": sessions, "seconds": total, "peak": peak, "final": final}
+
+
+async def _load_main(args) -> None:
+    if args.port:
+        await run_load(args.host, args.port, args.sessions, args.concurrency)
+        return
+    # self-contained: run server and load generator in one event loop
+    manager = SessionManager(ttl=args.ttl, max_sessions=max(args.sessions, 1))
+    server = await ClarificationServer(manager).start(args.host, 0)
+    try:
+        await run_load(args.host, server.port, args.sessions, args.concurrency)
+    finally:
+        await server.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_serve = sub.add_parser("serve", help="run the session server")
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=8765)
+    p_serve.add_argument("--ttl", type=float, default=300.0)
+    p_serve.add_argument("--max-sessions", type=int, default=100_000)
+
+    p_load = sub.add_parser("load", help="run the local load generator")
+    p_load.add_argument("--host", default="127.0.0.1")
+    p_load.add_argument("--port", type=int, default=0, help="existing server (default: start one in-process)")
+    p_load.add_argument("--sessions", type=int, default=20_000)
+    p_load.add_argument("--concurrency", type=int, default=200)
+    p_load.add_argument("--ttl", type=float, default=300.0)
+
+    args = parser.parse_args()
+    if args.cmd == "serve":
+        asyncio.run(serve(args.host, args.port, args.ttl, args.max_sessions))
+    else:
+        asyncio.run(_load_main(args))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
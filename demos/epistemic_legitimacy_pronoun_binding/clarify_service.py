@@ -0,0 +1,615 @@
+#!/usr/bin/env python3
+"""
+clarify_service.py
+
+Local asyncio HTTP clarify service speaking the web demo's worker protocol
+(`docs/demo.js`), so the STOP → clarify → bind → resolve flow can run on local
+hardware.
+
+Request (POST, any path):
+
+  {"context": ["James has a bird.", "Jenny has a bird.", "The bird is missing."],
+   "binding": null | "<option id>",
+   "session": true | "<id>"}                        (optional)
+
+Responses:
+
+  {"status": "STOP", "gate_verdict": "AMBIGUOUS_UNRESOLVED", "question": ...,
+   "options": [{"id": ..., "label": ...}, ...], "session": ...}   ("session" only if requested)
+  {"status": "RESOLVED", "gate_verdict": "ADMISSIBLE", "statement": ...}
+  {"status": "INVALID_BINDING" | "UNKNOWN", "gate_verdict": "INADMISSIBLE_UNSUPPORTED",
+   "message": ...}
+
+Every response also carries "scenario" and "engine_status" (the underlying
+engine's own status string).
+
+Engines:
+- definite descriptions ("X has a bird ... the bird") go through the PEF demo
+  (`pef_dog_demo.ingest` / `handle_query`). Its PEF tracks one entity type
+  ("dog"), so the scenario's noun is mapped onto it and back.
+- "her sister" goes through `gate_legitimate`.
+- the telescope (PP attachment) and trophy ("it") scenarios go through
+  `binding_gate.IndexedGate` with scenario-specific candidates.
+
+A context's analysis depends only on the context, so it is cached (LRU,
+`decision_cache.DecisionCache`) and shared by all sessions. Sessions are opt-in:
+a STOP for a request carrying "session" (true, or an id that has expired) opens
+one and returns its id, and a later request naming it is checked against the
+options that were offered. demo.js sends no session, so it never opens one;
+its binding is checked against the (cached) context analysis instead. Session
+ids are random tokens. Idle sessions expire after `ttl` seconds and the table
+is capped at `max_sessions`.
+
+Run:
+  python clarify_service.py serve [--port 8787]
+  python clarify_service.py load [--flows 20000] [--concurrency 64]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import secrets
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Pattern, Tuple
+
+from binding_gate import CandidateIndex, IndexedGate
+from clarification_server import _percentiles
+from decision_cache import DecisionCache
+from demo_epistemic_gate import METRICS, Decision, gate_legitimate, normalize
+
+PEF_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "05_PEF_state_semantics_demo")
+if PEF_DIR not in sys.path:
+    sys.path.insert(0, PEF_DIR)
+import pef_dog_demo  # noqa: E402
+
+VERDICT_STOP = "AMBIGUOUS_UNRESOLVED"
+VERDICT_OK = "ADMISSIBLE"
+VERDICT_BAD = "INADMISSIBLE_UNSUPPORTED"
+
+MAX_BODY = 64 * 1024
+
+
+@dataclass(frozen=True)
+class Option:
+    id: str
+    label: str
+    statement: str
+
+
+@dataclass(frozen=True)
+class Analysis:
+    """Everything a context decides; responses are assembled from it."""
+    scenario: str
+    status: str                    # STOP / RESOLVED / UNKNOWN
+    engine_status: str
+    question: Optional[str] = None
+    options: Tuple[Option, ...] = ()
+    statement: Optional[str] = None
+    message: Optional[str] = None
+
+    def option(self, binding: str) -> Optional[Option]:
+        key = binding.strip().lower()
+        for opt in self.options:
+            if key in (opt.id, opt.label.lower()):
+                return opt
+        return None
+
+
+# -------------------------
+#   DEFINITE DESCRIPTIONS (PEF engine)
+# -------------------------
+
+_OWNS = re.compile(r"^(\w+)\s+ha[sd]\s+an?\s+(\w+)\.?$", re.IGNORECASE)
+
+
+def _definite_noun(context: List[str]) -> Optional[str]:
+    """The noun of a 'X has a N ... the N' context, if any."""
+    nouns = [m.group(2).lower() for m in (_OWNS.match(line.strip()) for line in context) if m]
+    for noun in nouns:
+        the_n = re.compile(rf"\bthe\s+{re.escape(noun)}\b", re.IGNORECASE)
+        if any(the_n.search(line) for line in context):
+            return noun
+    return None
+
+
+def _swap_noun(text: str, noun: str, replacement: str) -> str:
+    return re.sub(rf"\b{re.escape(noun)}\b", replacement, text)
+
+
+def analyse_definite(context: List[str], noun: str) -> Analysis:
+    pef = pef_dog_demo.PEF(owners_with_dogs={})
+    for line in context:
+        s = _swap_noun(line.strip().lower(), noun, "dog")
+        s = re.sub(r"^(\w+)\s+has\s+an?\s+dog", r"\1 had a dog", s)
+        pef_dog_demo.ingest(pef, s)
+
+    result = pef_dog_demo.handle_query(pef, "where is the dog?")
+    status = result["status"]
+    scenario = f"definite_description:{noun}"
+
+    def statement(dog_id: str) -> str:
+        owner = pef_dog_demo.dog_owner(dog_id).capitalize()
+        where, loc = pef_dog_demo.answer_where_is_x(pef, dog_id)
+        if where == "answered":
+            return f"'The {noun}' is {owner}'s {noun}. It is at the {loc}."
+        return (f"'The {noun}' is {owner}'s {noun}. No location fact exists for it, "
+                "so where it is cannot be answered without guessing.")
+
+    if status == "stop_ambiguous_definite_description":
+        # An owner with several dogs appears once per dog; later ones get "<owner>_2", ...
+        options: List[Option] = []
+        seen: Dict[str, int] = {}
+        for c in result["candidates"]:
+            owner = pef_dog_demo.dog_owner(c)
+            seen[owner] = seen.get(owner, 0) + 1
+            oid = owner if seen[owner] == 1 else f"{owner}_{seen[owner]}"
+            options.append(Option(oid, f"{owner.capitalize()}'s {noun}", statement(c)))
+        return Analysis(scenario, "STOP", status,
+                        question=_swap_noun(result["clarification_question"], "dog", noun),
+                        options=tuple(options))
+    if "referent" in result:
+        return Analysis(scenario, "RESOLVED", status, statement=statement(result["referent"]))
+    return Analysis(scenario, "UNKNOWN", status,
+                    message=_swap_noun(result.get("explanation", ""), "dog", noun))
+
+
+# -------------------------
+#   BINDING AMBIGUITIES (gate engines)
+# -------------------------
+
+
+@dataclass(frozen=True)
+class GateScenario:
+    name: str
+    pattern: Pattern[str]          # matches the ambiguous (last) sentence
+    span: str
+    options: Tuple[Option, ...]    # label = candidate binding; statement may use {0}.. pattern groups
+    evidence: Tuple[Tuple[str, str], ...] = ()   # (phrase, option id)
+    decide: Optional[Callable[[List[str]], Decision]] = None
+
+    def gate(self) -> IndexedGate:
+        by_id = {o.id: o.label for o in self.options}
+        index = CandidateIndex([o.label for o in self.options])
+        for phrase, oid in self.evidence:
+            index.add_evidence(phrase, by_id[oid])
+        return IndexedGate(index, span=self.span)
+
+
+GATE_SCENARIOS: Tuple[GateScenario, ...] = (
+    GateScenario(
+        name="her_sister",
+        pattern=re.compile(r"\bher sister\b", re.IGNORECASE),
+        span="her sister",
+        options=(
+            Option("emma", "Emma's sister", "'Her sister' is bound to Emma's sister."),
+            Option("lucy", "Lucy's sister", "'Her sister' is bound to Lucy's sister."),
+        ),
+        decide=gate_legitimate,
+    ),
+    GateScenario(
+        name="telescope",
+        pattern=re.compile(r"\bsaw the (\w+) with the telescope\b", re.IGNORECASE),
+        span="with the telescope",
+        options=(
+            Option("instrument", "I used the telescope",
+                   "Reading: I used the telescope to see the {0}."),
+            Option("possession", "The one I saw had the telescope",
+                   "Reading: the {0} I saw was holding the telescope."),
+        ),
+        evidence=(
+            ("through the telescope", "instrument"),
+            ("through my telescope", "instrument"),
+            ("was holding a telescope", "possession"),
+            ("was carrying a telescope", "possession"),
+        ),
+    ),
+    GateScenario(
+        name="trophy",
+        pattern=re.compile(r"\btrophy\b.*\bsuitcase\b.*\bit was too (\w+)", re.IGNORECASE),
+        span="it",
+        options=(
+            Option("trophy", "the trophy", "'It' is bound to the trophy: the trophy was too {0}."),
+            Option("suitcase", "the suitcase", "'It' is bound to the suitcase: the suitcase was too {0}."),
+        ),
+    ),
+)
+
+_GATES: Dict[str, IndexedGate] = {}
+
+
+def analyse_gate(context: List[str], scenario: GateScenario, match: "re.Match[str]") -> Analysis:
+    groups = match.groups()
+    options = tuple(Option(o.id, o.label, o.statement.format(*groups)) for o in scenario.options)
+    if scenario.decide is not None:
+        decision = scenario.decide(context)
+    else:
+        gate = _GATES.get(scenario.name)
+        if gate is None:
+            gate = _GATES[scenario.name] = scenario.gate()
+        decision = gate.decide(context)
+
+    if decision.resolved_to is not None:
+        chosen = next(o for o in options if o.label == decision.resolved_to)
+        return Analysis(scenario.name, "RESOLVED", decision.status, options=(chosen,),
+                        statement=chosen.statement)
+    labels = [o.label for o in options]
+    question = (f"'{scenario.span}' is ambiguous here. Do you mean "
+                f"{', '.join(labels[:-1])} or {labels[-1]}?")
+    return Analysis(scenario.name, "STOP", decision.status, question=question, options=options)
+
+
+def analyse(context: List[str]) -> Analysis:
+    """Route a context to the engine that handles its ambiguity."""
+    if not context:
+        return Analysis("none", "UNKNOWN", "empty_context", message="Empty context.")
+    noun = _definite_noun(context)
+    if noun is not None:
+        return analyse_definite(context, noun)
+    last = normalize(context[-1])
+    for scenario in GATE_SCENARIOS:
+        m = scenario.pattern.search(last)
+        if m:
+            return analyse_gate(context, scenario, m)
+    return Analysis("none", "UNKNOWN", "unsupported_context", message="Unknown scenario.")
+
+
+# -------------------------
+#   SERVICE (sessions + cache)
+# -------------------------
+
+
+class ClarifySession:
+    __slots__ = ("sid", "analysis", "last_seen")
+
+    def __init__(self, sid: str, analysis: Analysis, now: float) -> None:
+        self.sid = sid
+        self.analysis = analysis
+        self.last_seen = now
+
+
+class ClarifyService:
+    """Protocol logic: cached context analyses plus an LRU/TTL session table."""
+
+    def __init__(self, ttl: float = 300.0, max_sessions: int = 100_000, cache_size: int = 4096) -> None:
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.cache = DecisionCache(maxsize=cache_size)
+        self.sessions: "OrderedDict[str, ClarifySession]" = OrderedDict()
+        self.counters = {"requests": 0, "stop": 0, "resolved": 0, "invalid_binding": 0,
+                         "unknown": 0, "bad_request": 0, "expired": 0, "evicted": 0}
+
+    def analysis_for(self, context: List[str]) -> Analysis:
+        return self.cache.get_or_build(tuple(context), lambda: analyse(context))
+
+    def _open_session(self, analysis: Analysis) -> str:
+        sid = secrets.token_urlsafe(12)
+        self.sessions[sid] = ClarifySession(sid, analysis, time.monotonic())
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+            self.counters["evicted"] += 1
+        return sid
+
+    def handle(self, req: Dict) -> Dict:
+        # Analyses are cached, so gate_decisions_total only sees cache misses;
+        # this counts every response the service gives.
+        resp = self._handle(req)
+        if METRICS.enabled:
+            METRICS.counter("clarify_responses_total", "Clarify responses by scenario and status").inc(
+                scenario=resp.get("scenario", ""), status=resp["status"])
+        return resp
+
+    def _handle(self, req: Dict) -> Dict:
+        self.counters["requests"] += 1
+        context = req.get("context")
+        binding = req.get("binding")
+        requested = req.get("session")
+        wants_session = requested is True or (isinstance(requested, str) and requested != "")
+        session = self.sessions.get(requested) if isinstance(requested, str) else None
+        if session is None and not isinstance(context, list):
+            self.counters["bad_request"] += 1
+            return {"status": "BAD_REQUEST", "gate_verdict": VERDICT_BAD,
+                    "message": "'context' must be a list of sentences"}
+
+        if session is not None:
+            analysis = session.analysis
+            session.last_seen = time.monotonic()
+            self.sessions.move_to_end(session.sid)
+        else:
+            analysis = self.analysis_for([str(line) for line in context])
+        base = {"scenario": analysis.scenario, "engine_status": analysis.engine_status}
+
+        if analysis.status == "UNKNOWN":
+            self.counters["unknown"] += 1
+            return dict(base, status="UNKNOWN", gate_verdict=VERDICT_BAD, message=analysis.message)
+
+        if binding is None:
+            if analysis.status == "RESOLVED":
+                self.counters["resolved"] += 1
+                return dict(base, status="RESOLVED", gate_verdict=VERDICT_OK, statement=analysis.statement)
+            self.counters["stop"] += 1
+            resp = dict(base, status="STOP", gate_verdict=VERDICT_STOP, question=analysis.question,
+                        options=[{"id": o.id, "label": o.label} for o in analysis.options])
+            if session is not None:
+                resp["session"] = session.sid
+            elif wants_session:
+                resp["session"] = self._open_session(analysis)
+            return resp
+
+        option = analysis.option(str(binding))
+        if option is None:
+            self.counters["invalid_binding"] += 1
+            return dict(base, status="INVALID_BINDING", gate_verdict=VERDICT_BAD,
+                        message=f"{binding!r} is not one of the offered bindings.")
+        if session is not None:
+            del self.sessions[session.sid]
+        self.counters["resolved"] += 1
+        return dict(base, status="RESOLVED", gate_verdict=VERDICT_OK, binding=option.id,
+                    statement=option.statement)
+
+    def expire(self, now: Optional[float] = None) -> int:
+        cutoff = (time.monotonic() if now is None else now) - self.ttl
+        n = 0
+        while self.sessions:
+            sid, session = next(iter(self.sessions.items()))
+            if session.last_seen > cutoff:
+                break
+            del self.sessions[sid]
+            n += 1
+        self.counters["expired"] += n
+        return n
+
+    def stats(self) -> Dict:
+        return dict(self.counters, open_sessions=len(self.sessions), cache=self.cache.stats())
+
+
+# -------------------------
+#   HTTP
+# -------------------------
+
+_REASONS = {200: "OK", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+            405: "Method Not Allowed", 413: "Payload Too Large"}
+_CORS = ("Access-Control-Allow-Origin: *\r\n"
+         "Access-Control-Allow-Methods: POST, GET, OPTIONS\r\n"
+         "Access-Control-Allow-Headers: Content-Type\r\n")
+
+
+def _http_response(code: int, payload: Optional[Dict], keep_alive: bool) -> bytes:
+    body = b"" if payload is None else json.dumps(payload, ensure_ascii=True).encode("ascii")
+    head = (f"HTTP/1.1 {code} {_REASONS[code]}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"{_CORS}"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("ascii") + body
+
+
+def route(service: ClarifyService, method: str, path: str, body: bytes) -> Tuple[int, Optional[Dict]]:
+    if method == "OPTIONS":
+        return 204, None
+    if method == "GET":
+        if path.rstrip("/") in ("/stats", "/health"):
+            return 200, service.stats()
+        return 404, {"status": "NOT_FOUND"}
+    if method != "POST":
+        return 405, {"status": "BAD_REQUEST", "message": f"method {method} not allowed"}
+    try:
+        req = json.loads(body or b"{}")
+        if not isinstance(req, dict):
+            raise ValueError("request body must be a JSON object")
+    except ValueError as exc:
+        service.counters["bad_request"] += 1
+        return 400, {"status": "BAD_REQUEST", "gate_verdict": VERDICT_BAD, "message": str(exc)}
+    return 200, service.handle(req)
+
+
+async def _serve_http(service: ClarifyService, reader: asyncio.StreamReader,
+                      writer: asyncio.StreamWriter) -> None:
+    """HTTP/1.1 with keep-alive; one request at a time per connection."""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            parts = request_line.decode("latin1").split()
+            headers: Dict[str, str] = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            if len(parts) != 3:
+                writer.write(_http_response(400, {"status": "BAD_REQUEST"}, False))
+                break
+            method, path, version = parts
+            length = int(headers.get("content-length", "0") or 0)
+            if length > MAX_BODY:
+                writer.write(_http_response(413, {"status": "BAD_REQUEST"}, False))
+                break
+            body = await reader.readexactly(length) if length else b""
+            keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+            code, payload = route(service, method, path, body)
+            writer.write(_http_response(code, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError, asyncio.CancelledError):
+        pass
+    finally:
+        writer.close()
+
+
+class ClarifyHTTPServer:
+    """asyncio front end for a ClarifyService, plus the idle-session reaper."""
+
+    def __init__(self, service: ClarifyService) -> None:
+        self.service = service
+        self.server: Optional[asyncio.AbstractServer] = None
+        self._reaper: Optional[asyncio.Task] = None
+        self._clients: set = set()
+
+    @property
+    def port(self) -> int:
+        return self.server.sockets[0].getsockname()[1]
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8787) -> "ClarifyHTTPServer":
+        self.server = await asyncio.start_server(self._on_client, host, port)
+        self._reaper = asyncio.create_task(self._reap())
+        return self
+
+    async def _on_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._clients.add(task)
+        try:
+            await _serve_http(self.service, reader, writer)
+        finally:
+            self._clients.discard(task)
+
+    async def _reap(self) -> None:
+        interval = max(0.05, self.service.ttl / 4)
+        while True:
+            await asyncio.sleep(interval)
+            self.service.expire()
+
+    async def close(self) -> None:
+        if self._reaper is not None:
+            self._reaper.cancel()
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for task in list(self._clients):
+            task.cancel()
+        await asyncio.gather(*self._clients, return_exceptions=True)
+
+
+async def serve(host: str, port: int, ttl: float, max_sessions: int) -> None:
+    server = await ClarifyHTTPServer(ClarifyService(ttl=ttl, max_sessions=max_sessions)).start(host, port)
+    print(f"Clarify service on http://{host}:{port} (point WORKER_URL in docs/demo.js here)")
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.close()
+
+
+# -------------------------
+#   LOAD GENERATOR
+# -------------------------
+
+# The web demo's scenarios (docs/demo.js SCENARIOS[*].context).
+DEMO_SCENARIOS: Dict[str, List[str]] = {
+    "bird_missing_v1": ["James has a bird.", "Jenny has a bird.", "The bird is missing."],
+    "telescope_v1": ["I saw the man with the telescope."],
+    "trophy_v1": ["The trophy didn't fit in the suitcase because it was too small."],
+}
+
+
+async def _post(reader, writer, host: str, req: Dict) -> Dict:
+    body = json.dumps(req).encode("ascii")
+    writer.write((f"POST / HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                  f"Content-Length: {len(body)}\r\n\r\n").encode("ascii") + body)
+    await writer.drain()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    return json.loads(await reader.readexactly(length))
+
+
+async def run_load(host: str, port: int, flows: int, concurrency: int) -> Dict:
+    """
+    Each flow is the demo's two calls: initial (binding null), then one binding.
+    Odd flows opt in to a session and send its id back; even flows are
+    stateless, like demo.js.
+    """
+    contexts = list(DEMO_SCENARIOS.values())
+    conns = [await asyncio.open_connection(host, port) for _ in range(concurrency)]
+    latencies: List[float] = []
+
+    async def worker(conn, flow_ids):
+        reader, writer = conn
+        for i in flow_ids:
+            context = contexts[i % len(contexts)]
+            t = time.perf_counter()
+            first_req = {"context": context, "binding": None}
+            if i % 2:
+                first_req["session"] = True
+            first = await _post(reader, writer, host, first_req)
+            latencies.append(time.perf_counter() - t)
+            if first["status"] != "STOP":
+                raise AssertionError(f"expected STOP, got {first}")
+            option = first["options"][i % len(first["options"])]["id"]
+            bind = {"context": context, "binding": option}
+            if i % 2:
+                bind["session"] = first["session"]   # half the flows resume their session
+            t = time.perf_counter()
+            second = await _post(reader, writer, host, bind)
+            latencies.append(time.perf_counter() - t)
+            if second["status"] != "RESOLVED":
+                raise AssertionError(f"expected RESOLVED, got {second}")
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker(c, range(k, flows, concurrency)) for k, c in enumerate(conns)))
+    secs = time.perf_counter() - t0
+
+    for _, w in conns:
+        w.close()
+        await w.wait_closed()
+
+    requests = 2 * flows
+    print(f"\nClarify service load: {flows} demo flows ({requests} requests) over {concurrency} connections")
+    print(f"  elapsed     {secs:6.2f}s")
+    print(f"  throughput  {requests / secs:8.0f} requests/s  ({flows / secs:.0f} flows/s)")
+    print(f"  latency     {_percentiles(latencies)}\n")
+    return {"flows": flows, "requests": requests, "seconds": secs}
+
+
+async def _load_main(args) -> None:
+    if args.port:
+        await run_load(args.host, args.port, args.flows, args.concurrency)
+        return
+    service = ClarifyService(ttl=args.ttl, max_sessions=max(args.flows, 1))
+    server = await ClarifyHTTPServer(service).start(args.host, 0)
+    try:
+        await run_load(args.host, server.port, args.flows, args.concurrency)
+        print(f"  server stats {service.stats()}\n")
+    finally:
+        await server.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_serve = sub.add_parser("serve", help="run the HTTP clarify service")
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=8787)
+    p_serve.add_argument("--ttl", type=float, default=300.0)
+    p_serve.add_argument("--max-sessions", type=int, default=100_000)
+
+    p_load = sub.add_parser("load", help="run the demo-flow load generator")
+    p_load.add_argument("--host", default="127.0.0.1")
+    p_load.add_argument("--port", type=int, default=0, help="existing service (default: start one in-process)")
+    p_load.add_argument("--flows", type=int, default=20_000)
+    p_load.add_argument("--concurrency", type=int, default=64)
+    p_load.add_argument("--ttl", type=float, default=300.0)
+
+    args = parser.parse_args()
+    if args.cmd == "serve":
+        asyncio.run(serve(args.host, args.port, args.ttl, args.max_sessions))
+    else:
+        asyncio.run(_load_main(args))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+columnar_results.py
+
+Columnar output mode for sweeps of the epistemic gate demo.
+
+`run_case` returns nested dicts (full stream text + `asdict` of both Decisions)
+and `main` dumps them with `json.dump(indent=2)`. At sweep scale that is large
+and slow to write and reload. Here each case becomes one row of flat columns:
+
+    seed, regime, vanilla_status, gate_status, heuristic, pressure, flags,
+    vanilla_resolved, gate_resolved, supported_mask,
+    stream_offsets / stream_refs   (CSR: stream lines as ids into LINE_TABLE)
+
+LINE_TABLE starts with the shared NOISE_POOL, so stream text is stored as
+references, never copied. Codes are indices into the vocabularies kept in
+`meta.json`.
+
+The file is an uncompressed NPZ (zip of .npy members), written with the stdlib
+only. Every column's data is 64-byte aligned inside the file, so
+`load_columnar` can memory-map it and hand out zero-copy memoryviews; with
+numpy available, `np.load(path)` reads the same file.
+
+Run:
+  python columnar_results.py [n_seeds] [out.npz]
+  python demo_epistemic_gate.py --columnar [out.npz]   (the demo's four cases)
+"""
+
+from __future__ import annotations
+
+import array
+import ast
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+import zipfile
+from typing import Dict, List, Optional, Tuple
+
+from demo_epistemic_gate import (
+    AMBIGUOUS_SENTENCE,
+    CTX_BOTH,
+    CTX_EMMA,
+    CTX_LUCY,
+    NOISE_POOL,
+    case_delta,
+    evaluate_case,
+)
+
+# -------------------------
+#   VOCABULARIES
+# -------------------------
+
+LINE_TABLE: List[str] = list(NOISE_POOL) + [CTX_EMMA, CTX_LUCY, CTX_BOTH, AMBIGUOUS_SENTENCE]
+REGIMES = ["none", "emma", "lucy", "both"]
+STATUSES = [
+    "collapsed_best_guess",
+    "REFUSE_AMBIGUOUS_UNCONSTRAINED",
+    "RESOLVED_BY_CONTEXT",
+    "REFUSE_AMBIGUOUS_SUPPORTED",
+]
+HEURISTICS = ["SUBJECT_BIAS", "RECENCY", "PRAGMATIC_LISTENER", "PRAGMATIC_SPEAKER"]
+BINDINGS = ["Emma's sister", "Lucy's sister"]
+
+# `flags` bit layout (the run_case "delta" block plus vanilla meta flags)
+FLAG_VANILLA_COLLAPSES = 1 << 0
+FLAG_GATE_REFUSES = 1 << 1
+FLAG_GATE_RESOLVES = 1 << 2
+FLAG_VANILLA_LICENSED = 1 << 3
+FLAG_CONTEXT_AVAILABLE = 1 << 4
+FLAG_CONTEXT_CONSIDERED = 1 << 5
+
+# column name -> array typecode
+COLUMNS: Dict[str, str] = {
+    "seed": "q",
+    "regime": "B",
+    "vanilla_status": "B",
+    "gate_status": "B",
+    "heuristic": "B",
+    "pressure": "H",
+    "flags": "B",
+    "vanilla_resolved": "b",   # index into BINDINGS, -1 = None
+    "gate_resolved": "b",
+    "supported_mask": "B",     # bit i set <=> BINDINGS[i] supported
+    "stream_offsets": "q",     # len = rows + 1
+    "stream_refs": "H",        # ids into LINE_TABLE
+}
+
+_NPY_DESCR = {"q": "<i8", "B": "|u1", "b": "|i1", "H": "<u2", "h": "<i2", "I": "<u4", "d": "<f8"}
+_ALIGN = 64
+
+_LINE_IDS = {line: i for i, line in enumerate(LINE_TABLE)}
+_STATUS_IDS = {s: i for i, s in enumerate(STATUSES)}
+_HEURISTIC_IDS = {h: i for i, h in enumerate(HEURISTICS)}
+_BINDING_IDS = {b: i for i, b in enumerate(BINDINGS)}
+
+
+# -------------------------
+#   WRITER
+# -------------------------
+
+
+class ColumnarWriter:
+    """Accumulates cases as typed arrays; `write` emits one aligned NPZ file."""
+
+    def __init__(self) -> None:
+        self.columns: Dict[str, array.array] = {k: array.array(t) for k, t in COLUMNS.items()}
+        self.columns["stream_offsets"].append(0)
+        self.rows = 0
+
+    def add_case(self, seed: int, regime: str) -> None:
+        """`run_case` (via the shared `evaluate_case` / `case_delta`), stored as one columnar row."""
+        stream, _, supported, van, gate = evaluate_case(seed, regime)
+        delta = case_delta(supported, van, gate)
+
+        flags = 0
+        if delta["vanilla_collapses"]:
+            flags |= FLAG_VANILLA_COLLAPSES
+        if delta["gate_refuses"]:
+            flags |= FLAG_GATE_REFUSES
+        if delta["gate_resolves"]:
+            flags |= FLAG_GATE_RESOLVES
+        if delta["vanilla_licensed"]:
+            flags |= FLAG_VANILLA_LICENSED
+        if van.meta["context_available"]:
+            flags |= FLAG_CONTEXT_AVAILABLE
+        if van.meta["context_considered"]:
+            flags |= FLAG_CONTEXT_CONSIDERED
+
+        mask = 0
+        for b in supported:
+            mask |= 1 << _BINDING_IDS[b]
+
+        c = self.columns
+        c["seed"].append(seed)
+        c["regime"].append(REGIMES.index(regime))
+        c["vanilla_status"].append(_STATUS_IDS[van.status])
+        c["gate_status"].append(_STATUS_IDS[gate.status])
+        c["heuristic"].append(_HEURISTIC_IDS[van.meta["heuristic"]])
+        c["pressure"].append(van.meta["pressure"])
+        c["flags"].append(flags)
+        c["vanilla_resolved"].append(_BINDING_IDS.get(van.resolved_to, -1))
+        c["gate_resolved"].append(_BINDING_IDS.get(gate.resolved_to, -1))
+        c["supported_mask"].append(mask)
+        c["stream_refs"].extend(_LINE_IDS[line] for line in stream)
+        c["stream_offsets"].append(len(c["stream_refs"]))
+        self.rows += 1
+
+    def write(self, path: str) -> None:
+        meta = {
+            "rows": self.rows,
+            "line_table": LINE_TABLE,
+            "regimes": REGIMES,
+            "statuses": STATUSES,
+            "heuristics": HEURISTICS,
+            "bindings": BINDINGS,
+            "flags": {
+                "vanilla_collapses": FLAG_VANILLA_COLLAPSES,
+                "gate_refuses": FLAG_GATE_REFUSES,
+                "gate_resolves": FLAG_GATE_RESOLVES,
+                "vanilla_licensed": FLAG_VANILLA_LICENSED,
+                "context_available": FLAG_CONTEXT_AVAILABLE,
+                "context_considered": FLAG_CONTEXT_CONSIDERED,
+            },
+        }
+        with open(path, "wb") as raw, zipfile.ZipFile(raw, "w", zipfile.ZIP_STORED) as zf:
+            for name, arr in self.columns.items():
+                member = name + ".npy"
+                # data offset = local header (30 + name) + npy preamble; pad the npy
+                # header so the raw column bytes land on an aligned file offset.
+                data_at = raw.tell() + 30 + len(member.encode("utf-8"))
+                zf.writestr(_zipinfo(member), _npy_bytes(arr, data_at))
+            zf.writestr(_zipinfo("meta.json"), json.dumps(meta, ensure_ascii=True))
+
+
+def _zipinfo(name: str) -> zipfile.ZipInfo:
+    info = zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0))
+    info.compress_type = zipfile.ZIP_STORED
+    return info
+
+
+def _npy_bytes(arr: array.array, data_at: int) -> bytes:
+    """Serialize `arr` as NPY v1.0 with its data starting at a 64-byte aligned offset."""
+    if sys.byteorder != "little":
+        arr = array.array(arr.typecode, arr)
+        arr.byteswap()
+    header = "{'descr': '%s', 'fortran_order': False, 'shape': (%d,), }" % (
+        _NPY_DESCR[arr.typecode], len(arr))
+    preamble = 10  # magic (6) + version (2) + header length (2)
+    pad = (-(data_at + preamble + len(header) + 1)) % _ALIGN
+    header = header + " " * pad + "\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1") + arr.tobytes()
+
+
+# -------------------------
+#   READER (memory-mapped)
+# -------------------------
+
+
+class ColumnarResults:
+    """Memory-mapped view of a columnar results file; columns are zero-copy memoryviews."""
+
+    def __init__(self, path: str) -> None:
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.columns: Dict[str, memoryview] = {}
+        self.meta: Dict = {}
+
+        buf = memoryview(self._mm)
+        with zipfile.ZipFile(self._file) as zf:
+            infos = zf.infolist()
+        for info in infos:
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{info.filename}: compressed members cannot be memory-mapped")
+            n_name, n_extra = struct.unpack_from("<HH", self._mm, info.header_offset + 26)
+            start = info.header_offset + 30 + n_name + n_extra
+            member = buf[start:start + info.file_size]
+            if info.filename == "meta.json":
+                self.meta = json.loads(bytes(member).decode("ascii"))
+            elif info.filename.endswith(".npy"):
+                self.columns[info.filename[:-4]] = _npy_view(member)
+
+    @property
+    def rows(self) -> int:
+        return int(self.meta.get("rows", 0))
+
+    def __getitem__(self, name: str) -> memoryview:
+        return self.columns[name]
+
+    def stream(self, row: int) -> List[str]:
+        """Rehydrate one row's stream text from LINE_TABLE references."""
+        lo, hi = self.columns["stream_offsets"][row], self.columns["stream_offsets"][row + 1]
+        table = self.meta["line_table"]
+        return [table[i] for i in self.columns["stream_refs"][lo:hi]]
+
+    def close(self) -> None:
+        for mv in self.columns.values():
+            mv.release()
+        self.columns.clear()
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self) -> "ColumnarResults":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _npy_view(member: memoryview) -> memoryview:
+    if bytes(member[:6]) != b"\x93NUMPY":
+        raise ValueError("not an NPY member")
+    (hlen,) = struct.unpack_from("<H", member, 8)
+    header = ast.literal_eval(bytes(member[10:10 + hlen]).decode("latin1"))
+    typecode = {v: k for k, v in _NPY_DESCR.items()}[header["descr"]]
+    data = member[10 + hlen:]
+    if sys.byteorder != "little" and array.array(typecode).itemsize > 1:
+        raise ValueError("memory-mapping little-endian columns requires a little-endian host")
+    return data.cast(typecode)
+
+
+def load_columnar(path: str) -> ColumnarResults:
+    return ColumnarResults(path)
+
+
+# -------------------------
+#   SWEEP CLI
+# -------------------------
+
+
+def sweep(n_seeds: int, out_path: str) -> Tuple[int, float]:
+    writer = ColumnarWriter()
+    t0 = time.perf_counter()
+    for seed in range(n_seeds):
+        for regime in REGIMES:
+            writer.add_case(seed=seed, regime=regime)
+    writer.write(out_path)
+    return writer.rows, time.perf_counter() - t0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv if argv is None else argv
+    n_seeds = int(argv[1]) if len(argv) > 1 else 1000
+    out_path = argv[2] if len(argv) > 2 else "demo_results.npz"
+
+    rows, secs = sweep(n_seeds, out_path)
+    print(f"Wrote {out_path}: {rows} rows, {os.path.getsize(out_path)} bytes in {secs:.2f}s")
+
+    with load_columnar(out_path) as res:
+        gate_status = res["gate_status"]
+        counts = [0] * len(STATUSES)
+        for code in gate_status:
+            counts[code] += 1
+        print("Gate decisions by status:")
+        for name, n in zip(STATUSES, counts):
+            if n:
+                print(f"  {name:32} {n}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
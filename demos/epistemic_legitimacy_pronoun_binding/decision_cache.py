@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+decision_cache.py
+
+Memoized gate/vanilla decisions keyed by evidence fingerprint.
+
+Many different noisy streams reduce to the same evidence state. The Decision
+for a stream depends only on:
+
+    GATE     the set of supported bindings
+    VANILLA  the set of supported bindings, the pressure level and the seed
+
+so each stream is scanned once (`scan_stream`) to get that fingerprint, and
+the Decision — explanation strings, `asdict` interpretation lists and all —
+is only built on a cache miss. Hits return the same shared Decision object.
+
+Sharing is safe: Decision freezes its `interpretations` / `meta` containers
+(tuples and FrozenDicts), so writing to a cached decision raises TypeError.
+
+Run:
+  python decision_cache.py [n_seeds]
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, FrozenSet, Hashable, List, Optional, Tuple
+
+from demo_epistemic_gate import (
+    Decision,
+    PEFState,
+    count_decision,
+    gate_decision,
+    gate_legitimate,
+    high_entropy_stream,
+    inject_context,
+    scan_stream,
+    supported_bindings,
+    vanilla_collapse,
+    vanilla_decision,
+)
+
+Fingerprint = Tuple[FrozenSet[str], int]
+
+
+class DecisionCache:
+    """Bounded LRU of Decisions with hit/miss counters."""
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be >= 1")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Decision]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_build(self, key: Hashable, build: Callable[[], Decision]) -> Decision:
+        entries = self._entries
+        decision = entries.get(key)
+        if decision is not None:
+            self.hits += 1
+            entries.move_to_end(key)
+            return decision
+
+        self.misses += 1
+        decision = build()
+        entries[key] = decision
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+        return decision
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, object]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+
+def fingerprint(pef: PEFState, pressure: int) -> Fingerprint:
+    return frozenset(supported_bindings(pef)), pressure
+
+
+def cached_decisions(
+    stream, seed: int, cache: DecisionCache
+) -> Tuple[Decision, Decision]:
+    """(vanilla, gate) for one stream, from a single scan and the shared cache."""
+    pef, pressure = scan_stream(stream)
+    supported, _ = fp = fingerprint(pef, pressure)
+    van = cache.get_or_build(("VANILLA", fp, seed), lambda: vanilla_decision(pef, pressure, seed))
+    gate = cache.get_or_build(("GATE", supported), lambda: gate_decision(pef))
+    return count_decision(van), count_decision(gate)
+
+
+def cached_gate_legitimate(stream, cache: DecisionCache) -> Decision:
+    pef, pressure = scan_stream(stream)
+    supported, _ = fingerprint(pef, pressure)
+    return count_decision(cache.get_or_build(("GATE", supported), lambda: gate_decision(pef)))
+
+
+def cached_vanilla_collapse(stream, seed: int, cache: DecisionCache) -> Decision:
+    pef, pressure = scan_stream(stream)
+    fp = fingerprint(pef, pressure)
+    van = cache.get_or_build(("VANILLA", fp, seed), lambda: vanilla_decision(pef, pressure, seed))
+    return count_decision(van)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Compare uncached vs cached decisions over a seed x regime sweep. Every
+    stream is decided once (distinct seeds, no replays), so every hit comes
+    from streams that share a fingerprint.
+    """
+    argv = sys.argv if argv is None else argv
+    n_seeds = int(argv[1]) if len(argv) > 1 else 2000
+
+    streams = [
+        (seed, inject_context(high_entropy_stream(seed=seed), regime=regime)[0])
+        for seed in range(n_seeds)
+        for regime in ("none", "emma", "lucy", "both")
+    ]
+
+    t0 = time.perf_counter()
+    for seed, stream in streams:
+        vanilla_collapse(stream, seed=seed)
+        gate_legitimate(stream)
+    t1 = time.perf_counter()
+
+    cache = DecisionCache(maxsize=2 * len(streams))     # no evictions: misses = distinct keys
+    for seed, stream in streams:
+        van, gate = cached_decisions(stream, seed, cache)
+    t2 = time.perf_counter()
+
+    for seed, stream in streams[:40]:
+        van, gate = cached_decisions(stream, seed, cache)
+        assert van == vanilla_collapse(stream, seed=seed)
+        assert gate == gate_legitimate(stream)
+
+    n = len(streams)
+    gate_keys = sum(1 for key in cache._entries if key[0] == "GATE")
+    van_keys = len(cache) - gate_keys
+    print(f"\nDecision cache: {n} (vanilla, gate) pairs over {n} distinct streams ({n_seeds} seeds)")
+    print(f"  uncached {(t1 - t0) / n * 1e6:7.1f} us/pair")
+    print(f"  cached   {(t2 - t1) / n * 1e6:7.1f} us/pair")
+    print(f"  gate     hit rate {1 - gate_keys / n:7.2%}  ({gate_keys} distinct fingerprints)")
+    print(f"  vanilla  hit rate {1 - van_keys / n:7.2%}  ({van_keys} distinct fingerprints; keyed by seed too)")
+    print(f"  overall  hit rate {1 - len(cache) / (2 * n):7.2%}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
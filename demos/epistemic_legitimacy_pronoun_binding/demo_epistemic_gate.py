@@ -16,9 +16,18 @@ Based on the same pronoun-binding ambiguity pattern used in prior empirical demo
 from __future__ import annotations
 
 from dataclasses import dataclass, asdict
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Iterable, Iterator, Optional, Set, Tuple
 import json
 import random
+import re
+import sys
+import timeit
+
+try:
+    from aurora_metrics import METRICS  # demos/metrics, when on sys.path (see its README)
+except ImportError:  # no metrics registry: instrumentation stays off
+    from types import SimpleNamespace
+    METRICS = SimpleNamespace(enabled=False)
 
 # -------------------------
 #   CORE DATA STRUCTURES
@@ -39,15 +48,48 @@ class Interpretation:
     context_supported: bool
 
 
-@dataclass
+class FrozenDict(dict):
+    """Read-only, hashable dict: writes raise TypeError."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError(f"{type(self).__name__} is read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __hash__(self) -> int:
+        return hash(tuple(self.items()))
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return FrozenDict((k, _freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+@dataclass(frozen=True)
 class Decision:
+    """
+    Engine output. Decisions are shared (cached, reused by StreamingGate), so
+    the containers are frozen too: interpretations becomes a tuple of
+    FrozenDicts, meta a FrozenDict with lists turned into tuples.
+    """
     engine: str
     status: str
     resolved_to: Optional[str]
     explanation: str
-    interpretations: List[Dict]
+    interpretations: Tuple[Dict, ...]
     meta: Dict[str, object]
 
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "interpretations", _freeze(self.interpretations))
+        object.__setattr__(self, "meta", _freeze(self.meta))
+
 # -------------------------
 #   INPUT STREAM GENERATION
 # -------------------------
@@ -127,19 +169,144 @@ def normalize(s: str) -> str:
     return s.replace("’", "'").strip()
 
 
-def update_pef(state: PEFState, sentence: str) -> None:
-    t = normalize(sentence).lower()
-    if "emma's sister" in t:
+# -------------------------
+#   EVIDENCE SCANNER (one pass per sentence)
+# -------------------------
+
+# Evidence atom (lowercased phrase) -> binding it supports.
+EVIDENCE_ATOMS: Dict[str, str] = {
+    "emma's sister": "Emma's sister",
+    "lucy's sister": "Lucy's sister",
+}
+
+# Emotional/noisy keywords that count towards vanilla "pressure".
+PRESSURE_KEYWORDS: List[str] = ["shaking", "mess", "overreacting", "honestly"]
+
+
+def trie_regex(phrases: Iterable[str]) -> str:
+    """
+    Fold literal phrases into a prefix-trie regex, e.g. {"ab", "abc", "ad"} -> "a(?:b(?:c)?|d)".
+
+    The regex engine then walks shared prefixes once instead of retrying every
+    alternative at each position, and greedy `?` prefers the longest phrase.
+    """
+    trie: Dict[str, dict] = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: Dict[str, dict]) -> str:
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        if len(branches) == 1 and "" not in node:
+            return branches[0]
+        body = "(?:" + "|".join(branches) + ")"
+        return body + "?" if "" in node else body
+
+    return emit(trie)
+
+
+class EvidenceScanner:
+    """
+    Compiled multi-pattern scanner for evidence atoms and pressure keywords.
+
+    All phrases are folded into ONE prefix-trie regex (longest match wins). Each search
+    restarts one character past the previous match start, so every occurrence is
+    reported, including overlapping ones, with the same substring semantics as the
+    original `phrase in text.lower()` loops. Phrases that are prefixes of a longer
+    phrase are recorded as implied hits, so a longer match never hides a shorter one.
+
+    The scanner is configurable: `add_atom` / `add_pressure_keyword` recompile lazily.
+    """
+
+    def __init__(
+        self,
+        atoms: Optional[Dict[str, str]] = None,
+        pressure_keywords: Optional[Iterable[str]] = None,
+    ) -> None:
+        self._atoms: Dict[str, str] = {}
+        self._pressure: Set[str] = set()
+        self._pattern: Optional[re.Pattern] = None
+        # matched phrase -> (bindings supported, pressure keywords hit), prefixes included
+        self._hits: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {}
+        for phrase, binding in (EVIDENCE_ATOMS if atoms is None else atoms).items():
+            self.add_atom(phrase, binding)
+        for kw in (PRESSURE_KEYWORDS if pressure_keywords is None else pressure_keywords):
+            self.add_pressure_keyword(kw)
+
+    def add_atom(self, phrase: str, binding: str) -> None:
+        """Register an evidence phrase (matched case-insensitively) supporting `binding`."""
+        self._atoms[normalize(phrase).lower()] = binding
+        self._pattern = None
+
+    def add_pressure_keyword(self, keyword: str) -> None:
+        self._pressure.add(normalize(keyword).lower())
+        self._pattern = None
+
+    def _compile(self) -> re.Pattern:
+        phrases = sorted(set(self._atoms) | self._pressure, key=len, reverse=True)
+        self._hits = {}
+        for p in phrases:
+            implied = [q for q in phrases if p.startswith(q)]
+            self._hits[p] = (
+                tuple(self._atoms[q] for q in implied if q in self._atoms),
+                tuple(q for q in implied if q in self._pressure),
+            )
+        self._pattern = re.compile(trie_regex(phrases) if phrases else r"(?!)")
+        return self._pattern
+
+    def scan(self, sentence: str) -> Tuple[Set[str], Set[str]]:
+        """
+        Scan one sentence.
+
+        Returns:
+            (supported_bindings, pressure_keywords_hit)
+        """
+        search = (self._pattern or self._compile()).search
+        text = normalize(sentence).lower()
+        bindings: Set[str] = set()
+        pressure: Set[str] = set()
+        m = search(text)
+        while m is not None:
+            b, kw = self._hits[m.group()]
+            bindings.update(b)
+            pressure.update(kw)
+            m = search(text, m.start() + 1)
+        return bindings, pressure
+
+
+DEFAULT_SCANNER = EvidenceScanner()
+
+
+def update_pef(state: PEFState, sentence: str, scanner: Optional[EvidenceScanner] = None) -> None:
+    bindings, _ = (scanner or DEFAULT_SCANNER).scan(sentence)
+    if "Emma's sister" in bindings:
         state.emma_sister_mentioned = True
-    if "lucy's sister" in t:
+    if "Lucy's sister" in bindings:
         state.lucy_sister_mentioned = True
 
-def supported_bindings_from_stream(stream: List[str]) -> List[str]:
-    """Return list of bindings supported by prefix evidence (excluding the ambiguous sentence)."""
+def context_lines(stream: Iterable[str]) -> Iterator[str]:
+    """Yield every line except the last (the ambiguous sentence), for any iterable."""
+    it = iter(stream)
+    prev = next(it, None)
+    if prev is None:
+        return
+    for line in it:
+        yield prev
+        prev = line
+
+
+def pef_from_stream(stream: Iterable[str]) -> PEFState:
     pef = PEFState()
-    for s in stream[:-1]:
+    for s in context_lines(stream):
         update_pef(pef, s)
+    return pef
 
+
+def supported_bindings(pef: PEFState) -> List[str]:
     supported: List[str] = []
     if pef.emma_sister_mentioned:
         supported.append("Emma's sister")
@@ -148,23 +315,58 @@ def supported_bindings_from_stream(stream: List[str]) -> List[str]:
     return supported
 
 
+def supported_bindings_from_stream(stream: Iterable[str]) -> List[str]:
+    """Return list of bindings supported by prefix evidence (excluding the ambiguous sentence)."""
+    return supported_bindings(pef_from_stream(stream))
+
 
 # -------------------------
 #   ENGINE 1: "VANILLA" (BEST-GUESS COLLAPSE)
 # -------------------------
 
 
-def vanilla_collapse(stream: List[str], seed: int) -> Decision:
+def vanilla_collapse(stream: Iterable[str], seed: int) -> Decision:
     """
     Simulates a best-guess model:
     - picks ONE binding even when multiple are supported or none are supported
     - invents a justification (post-hoc rationalization)
     - content/noise influences which heuristic gets chosen (mode switching)
     """
-    rnd = random.Random(seed)
+    pef, pressure = scan_stream(stream)
+    return count_decision(vanilla_decision(pef, pressure, seed))
+
+
+def scan_stream(stream: Iterable[str]) -> Tuple[PEFState, int]:
+    """
+    One scan per sentence feeds both the PEF (prefix only) and the "pressure" feature:
+    emotional/noisy lines nudge heuristic selection.
+
+    Bindings are applied one line late, so the final (ambiguous) sentence never
+    feeds the PEF; this works for lists and lazy iterables alike.
+    """
     pef = PEFState()
-    for s in stream[:-1]:
-        update_pef(pef, s)
+    pressure = 0
+    pending: Set[str] = set()
+    for s in stream:
+        pef.emma_sister_mentioned |= "Emma's sister" in pending
+        pef.lucy_sister_mentioned |= "Lucy's sister" in pending
+        pending, keywords = DEFAULT_SCANNER.scan(s)
+        if keywords:
+            pressure += 1
+    return pef, pressure
+
+
+def count_decision(decision: Decision) -> Decision:
+    """Publish a decision handed to a caller (built or cached) to gate_decisions_total."""
+    if METRICS.enabled:
+        METRICS.counter("gate_decisions_total", "Decisions by engine and status").inc(
+            engine=decision.engine, status=decision.status)
+    return decision
+
+
+def vanilla_decision(pef: PEFState, pressure: int, seed: int) -> Decision:
+    """The vanilla Decision for an evidence state; depends only on (pef, pressure, seed)."""
+    rnd = random.Random(seed)
 
     heuristics: List[Tuple[str, str]] = [
         ("SUBJECT_BIAS", "Her most naturally refers to the subject of the reporting clause (Emma)."),
@@ -173,12 +375,6 @@ def vanilla_collapse(stream: List[str], seed: int) -> Decision:
         ("PRAGMATIC_SPEAKER", "When reporting news, the speaker often refers to their own circle (Emma)."),
     ]
 
-    # "Pressure" feature: emotional/noisy lines nudge heuristic selection
-    pressure = sum(
-        1 for s in stream
-        if any(x in s.lower() for x in ["shaking", "mess", "overreacting", "honestly"])
-    )
-
     # Under higher pressure, pick a heuristic more randomly (less stable)
     if pressure >= 2:
         heuristic_name, rationale = rnd.choice(heuristics)
@@ -220,7 +416,7 @@ def vanilla_collapse(stream: List[str], seed: int) -> Decision:
 # -------------------------
 
 
-def gate_legitimate(stream: List[str]) -> Decision:
+def gate_legitimate(stream: Iterable[str]) -> Decision:
     """
     Epistemically legitimate gate:
     - Recognize ambiguity
@@ -232,10 +428,11 @@ def gate_legitimate(stream: List[str]) -> Decision:
         resolve ⇔ |SupportedBindings| = 1
         refuse  ⇔ |SupportedBindings| ∈ {0, 2}
     """
-    pef = PEFState()
-    for s in stream[:-1]:
-        update_pef(pef, s)
+    return count_decision(gate_decision(pef_from_stream(stream)))
+
 
+def gate_decision(pef: PEFState) -> Decision:
+    """The gate Decision for an evidence state; depends only on the supported bindings."""
     interps = [
         Interpretation("Emma's sister", True, pef.emma_sister_mentioned),
         Interpretation("Lucy's sister", True, pef.lucy_sister_mentioned),
@@ -253,7 +450,7 @@ def gate_legitimate(stream: List[str]) -> Decision:
                 "No prior context supports either binding, so a single conclusion is not licensed."
             ),
             interpretations=[asdict(i) for i in interps],
-            meta={"supported_bindings": supported_bindings_from_stream(stream)},
+            meta={"supported_bindings": supported_bindings(pef)},
         )
 
     if len(supported) == 1:
@@ -266,7 +463,7 @@ def gate_legitimate(stream: List[str]) -> Decision:
                 "so collapse is licensed."
             ),
             interpretations=[asdict(i) for i in interps],
-            meta={"supported_bindings": supported_bindings_from_stream(stream)},
+            meta={"supported_bindings": supported_bindings(pef)},
         )
 
     return Decision(
@@ -278,7 +475,7 @@ def gate_legitimate(stream: List[str]) -> Decision:
             "Refusal/clarification is the correct outcome."
         ),
         interpretations=[asdict(i) for i in interps],
-            meta={"supported_bindings": supported_bindings_from_stream(stream)},
+        meta={"supported_bindings": supported_bindings(pef)},
     )
 
 
@@ -384,31 +581,35 @@ def pretty_decision(d: Decision) -> str:
     return json.dumps(box, indent=2, ensure_ascii=True)
 
 
-def run_case(seed: int, regime: str) -> Dict:
+def evaluate_case(seed: int, regime: str) -> Tuple[List[str], List[str], List[str], Decision, Decision]:
+    """One demo case: (stream, evidence_atoms, supported bindings, vanilla, gate)."""
     base = high_entropy_stream(seed=seed)
     stream, evidence_atoms = inject_context(base, regime=regime)
-
     supported = supported_bindings_from_stream(stream)
-    supported_count = len(supported)
+    return stream, evidence_atoms, supported, vanilla_collapse(stream, seed=seed), gate_legitimate(stream)
 
-    van = vanilla_collapse(stream, seed=seed)
-    gate = gate_legitimate(stream)
 
+def case_delta(supported: List[str], van: Decision, gate: Decision) -> Dict[str, bool]:
+    return {
+        "vanilla_collapses": van.resolved_to is not None,
+        "gate_refuses": gate.resolved_to is None,
+        "gate_resolves": gate.resolved_to is not None,
+        "vanilla_licensed": (len(supported) == 1 and van.resolved_to == supported[0]),
+    }
+
+
+def run_case(seed: int, regime: str) -> Dict:
+    stream, evidence_atoms, supported, van, gate = evaluate_case(seed, regime)
     return {
         "seed": seed,
         "regime": regime,
         "stream": stream,
         "evidence_atoms": evidence_atoms,
         "supported_bindings": supported,
-        "supported_count": supported_count,
+        "supported_count": len(supported),
         "vanilla": asdict(van),
         "gate": asdict(gate),
-        "delta": {
-            "vanilla_collapses": van.resolved_to is not None,
-            "gate_refuses": gate.resolved_to is None,
-            "gate_resolves": gate.resolved_to is not None,
-            "vanilla_licensed": (supported_count == 1 and van.resolved_to == supported[0]),
-        },
+        "delta": case_delta(supported, van, gate),
     }
 
 
@@ -440,7 +641,56 @@ def test_clarification():
     print()
 
 
-def main():
+def _legacy_scan(sentence: str) -> Tuple[Set[str], Set[str]]:
+    """The original per-phrase substring loops, kept only as a benchmark reference."""
+    t = normalize(sentence).lower()
+    bindings = {b for phrase, b in EVIDENCE_ATOMS.items() if phrase in t}
+    raw = sentence.lower()
+    pressure = {x for x in PRESSURE_KEYWORDS if x in raw}
+    return bindings, pressure
+
+
+def bench_scanner(number: int = 300) -> None:
+    """Benchmark the compiled scanner against the legacy loops on demo streams."""
+    sentences: List[str] = []
+    for seed, regime in ((7, "both"), (11, "emma"), (13, "lucy"), (17, "none")):
+        stream, _ = inject_context(high_entropy_stream(seed=seed), regime=regime)
+        sentences.extend(stream)
+
+    for s in sentences:
+        if _legacy_scan(s) != DEFAULT_SCANNER.scan(s):
+            raise AssertionError(f"scanner disagrees with legacy loops on {s!r}")
+
+    def run(fn):
+        for s in sentences:
+            fn(s)
+
+    print("\n" + "=" * 72)
+    print(f"BENCHMARK: evidence/pressure scan ({len(sentences)} sentences x {number})")
+    print("=" * 72 + "\n")
+
+    scanners = [("legacy loops", _legacy_scan), ("compiled scanner", DEFAULT_SCANNER.scan)]
+    for n_extra in (0, 50, 500):
+        # Grow the atom set to show how each approach scales with vocabulary size.
+        extra = {f"person{i}'s sister": f"Person{i}'s sister" for i in range(n_extra)}
+        atoms = dict(EVIDENCE_ATOMS, **extra)
+        big = EvidenceScanner(atoms=atoms)
+
+        def legacy_big(sentence: str, atoms=atoms) -> Tuple[Set[str], Set[str]]:
+            t = normalize(sentence).lower()
+            return ({b for phrase, b in atoms.items() if phrase in t},
+                    {x for x in PRESSURE_KEYWORDS if x in t})
+
+        if n_extra:
+            scanners = [("legacy loops", legacy_big), ("compiled scanner", big.scan)]
+        for label, fn in scanners:
+            secs = timeit.timeit(lambda: run(fn), number=number)
+            per = secs / (number * len(sentences)) * 1e6
+            print(f"  atoms={len(atoms):3d}  {label:18} {per:7.2f} us/sentence")
+    print()
+
+
+def main(columnar_path: Optional[str] = None):
     # Deterministic 4-quadrant demonstrator:
     #   both  -> legitimate refusal (supported set size 2)
     #   emma  -> legitimate resolution (supported set size 1)
@@ -484,6 +734,16 @@ def main():
         print("\n" + verdict)
         print("-" * 72)
 
+    if columnar_path is not None:
+        from columnar_results import ColumnarWriter  # imports this module
+
+        writer = ColumnarWriter()
+        for c in cases:
+            writer.add_case(seed=c["seed"], regime=c["regime"])
+        writer.write(columnar_path)
+        print(f"\nWrote {columnar_path} (columnar)\n")
+        return
+
     with open("demo_results.json", "w", encoding="utf-8") as f:
         json.dump(cases, f, indent=2, ensure_ascii=True)
 
@@ -491,9 +751,11 @@ def main():
 
 
 if __name__ == "__main__":
-    import sys
-    
     if len(sys.argv) > 1 and sys.argv[1] == "--test-clarification":
         test_clarification()
+    elif len(sys.argv) > 1 and sys.argv[1] == "--bench-scanner":
+        bench_scanner()
+    elif len(sys.argv) > 1 and sys.argv[1] == "--columnar":
+        main(columnar_path=sys.argv[2] if len(sys.argv) > 2 else "demo_results.npz")
     else:
         main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+stream_source.py
+
+Lazy, unbounded high-entropy streams for stress testing the gate.
+
+`high_entropy_stream` caps noise at len(NOISE_POOL) and shuffles a full copy of
+the pool per seed. `lazy_stream` is a generator instead:
+
+- yields seeded noise of any length (10^5 .. 10^7 lines) without building a list
+- mixes NOISE_POOL lines (drawn without replacement, one pool-sized cycle at a
+  time) with templated variants
+- injects evidence atoms at configurable positions, like `inject_context`
+- ends with AMBIGUOUS_SENTENCE, so every gate engine consumes it directly:
+  `gate_legitimate(lazy_stream(...))`, `IndexedGate.decide(...)`,
+  `StreamingGate.feed(...)`
+
+With `template_ratio=0` and n_noise <= len(NOISE_POOL), the output equals
+`inject_context(high_entropy_stream(seed, n_noise), regime)[0]`.
+
+Run:
+  python stream_source.py [n_noise]
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from demo_epistemic_gate import (
+    AMBIGUOUS_SENTENCE,
+    CTX_BOTH,
+    CTX_EMMA,
+    CTX_LUCY,
+    NOISE_POOL,
+    gate_legitimate,
+)
+
+REGIME_ATOMS: Dict[str, List[str]] = {
+    "none": [],
+    "emma": [CTX_EMMA],
+    "lucy": [CTX_LUCY],
+    "both": [CTX_BOTH],
+}
+
+# Templated noise: same register as NOISE_POOL, with seeded slot fillers.
+NOISE_TEMPLATES = [
+    "Anyway—completely different topic—did you see that {thing} last {when}?",
+    "Unrelated: someone keeps {verb} in my {place}.",
+    "By the way, the {group} meeting got moved {again}. Typical.",
+    "I can't believe {who} said that. Honestly, I'm {feeling}.",
+    "Random thought: {animal} are basically {fuel}-powered {toy}.",
+    "If this keeps going, I'm going to need {drink} and a {document}.",
+]
+
+SLOTS: Dict[str, Sequence[str]] = {
+    "thing": ("comet", "eclipse", "parade", "storm", "meteor shower"),
+    "when": ("night", "week", "weekend", "Tuesday"),
+    "verb": ("parking", "leaving boxes", "singing", "knocking"),
+    "place": ("spot", "driveway", "hallway", "inbox"),
+    "group": ("council", "book club", "committee", "board"),
+    "again": ("again", "to Friday", "twice", "without notice"),
+    "who": ("he", "they", "the landlord", "my neighbour"),
+    "feeling": ("shaking", "speechless", "fuming", "baffled"),
+    "animal": ("koalas", "pandas", "sloths", "wombats"),
+    "fuel": ("eucalyptus", "bamboo", "leaf", "grass"),
+    "toy": ("teddy bears", "pillows", "slippers", "beanbags"),
+    "drink": ("tea", "coffee", "cocoa", "water"),
+    "document": ("legal brief", "spreadsheet", "nap", "holiday"),
+}
+
+
+def _fill(rnd: random.Random, template: str) -> str:
+    return template.format(**{k: rnd.choice(v) for k, v in SLOTS.items() if "{" + k + "}" in template})
+
+
+def noise_lines(seed: int, template_ratio: float = 0.5) -> Iterator[str]:
+    """
+    Endless seeded noise. Pool lines are drawn without replacement one cycle
+    (len(NOISE_POOL) lines) at a time; each line is swapped for a templated
+    variant with probability `template_ratio`.
+    """
+    rnd = random.Random(seed)
+    while True:
+        cycle = list(NOISE_POOL)
+        rnd.shuffle(cycle)
+        for line in cycle:
+            if template_ratio > 0 and rnd.random() < template_ratio:
+                yield _fill(rnd, rnd.choice(NOISE_TEMPLATES))
+            else:
+                yield line
+
+
+def lazy_stream(
+    seed: int,
+    n_noise: int,
+    regime: str = "none",
+    positions: Optional[Iterable[int]] = None,
+    atoms: Optional[Sequence[str]] = None,
+    template_ratio: float = 0.5,
+) -> Iterator[str]:
+    """
+    Yield n_noise seeded noise lines with evidence injected, then AMBIGUOUS_SENTENCE.
+
+    `atoms` defaults to the regime's context atoms (see `inject_context`).
+    `positions` are output indices at which the atoms are inserted (all atoms at
+    each position); the default mirrors `inject_context`: index 1, or 0 for
+    streams shorter than three lines. Positions past the noise land just before
+    the ambiguous sentence.
+    """
+    if regime not in REGIME_ATOMS:
+        raise ValueError("regime must be one of: none, emma, lucy, both")
+    evidence = list(REGIME_ATOMS[regime] if atoms is None else atoms)
+    if positions is None:
+        positions = [1 if n_noise + 1 >= 3 else 0]
+    pending = sorted(set(positions)) if evidence else []
+
+    noise = noise_lines(seed, template_ratio)
+    out_idx = 0
+    emitted = 0
+    p = 0
+    while emitted < n_noise:
+        if p < len(pending) and pending[p] <= out_idx:
+            p += 1
+            for line in evidence:
+                yield line
+                out_idx += 1
+            continue
+        yield next(noise)
+        out_idx += 1
+        emitted += 1
+
+    if p < len(pending):
+        yield from evidence * (len(pending) - p)
+    yield AMBIGUOUS_SENTENCE
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Stress the gate engines on one long lazy stream per regime."""
+    from binding_gate import IndexedGate
+
+    argv = sys.argv if argv is None else argv
+    n_noise = int(argv[1]) if len(argv) > 1 else 100_000
+    gate = IndexedGate.for_candidates(["Emma's sister", "Lucy's sister"])
+
+    print(f"Lazy stream stress test: {n_noise} noise lines per regime\n")
+    for regime in ("none", "emma", "lucy", "both"):
+        positions = [n_noise // 2]
+        t0 = time.perf_counter()
+        a = gate_legitimate(lazy_stream(seed=7, n_noise=n_noise, regime=regime, positions=positions))
+        t1 = time.perf_counter()
+        b = gate.decide(lazy_stream(seed=7, n_noise=n_noise, regime=regime, positions=positions))
+        t2 = time.perf_counter()
+        assert (a.status, a.resolved_to) == (b.status, b.resolved_to)
+        print(f"  {regime:5} {a.status:32} gate_legitimate {t1 - t0:6.2f}s   IndexedGate {t2 - t1:6.2f}s")
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+aurora_metrics.py
+
+Lightweight in-process metrics registry shared by the demos: counters, gauges
+and latency histograms with optional labels.
+
+    from aurora_metrics import METRICS
+
+    if METRICS.enabled:
+        METRICS.counter("gate_decisions_total", "Gate decisions").inc(engine="gate", status=d.status)
+        METRICS.histogram("pef_query_seconds", "handle_query latency").observe(secs)
+
+Instrumented code checks `METRICS.enabled` before doing any work, so a
+disabled registry costs one attribute test per call site.
+
+The demos import it only when it is on sys.path (otherwise instrumentation is
+off), so run them with PYTHONPATH pointing at this directory, and enable it
+from the environment (no code changes needed in entry points):
+
+  AURORA_METRICS=metrics.json     write a JSON snapshot at exit
+  AURORA_METRICS=metrics.prom     ... or Prometheus text format
+  AURORA_METRICS_PORT=9108        serve Prometheus text on http://127.0.0.1:9108/metrics
+
+or in code: METRICS.enable(), METRICS.write(path), METRICS.serve(port).
+
+Metrics published by the demos:
+
+  miner_steps_total, miner_seconds, miner_steps_per_second        (transitions)
+  lattice_runs_total, lattice_steps_total, lattice_run_seconds,
+  lattice_steps_per_second, lattice_fast_forwarded_steps_total    (resolver)
+  lattice_branch_score, lattice_branch_state_count                (main.print_branch)
+  replay_sessions_total, replay_events_total, replay_seconds,
+  replay_events_per_second                                        (trace_player)
+  pef_queries_total, pef_query_seconds,
+  pef_query_batch_seconds                                         (pef_dog_demo)
+  gate_decisions_total                                            (demo_epistemic_gate)
+  clarify_responses_total                                         (clarify_service)
+
+Run:
+  python aurora_metrics.py [snapshot.json]     (print a snapshot as Prometheus text)
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import sys
+import threading
+from bisect import bisect_left
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Latency buckets (seconds): 1us .. 10s, roughly 1-2.5-5 per decade.
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+    1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+# -------------------------
+#   Metric types
+# -------------------------
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str = "") -> None:
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+        self._values: Dict[LabelKey, Any] = {}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def samples(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [{"labels": dict(k), "value": v} for k, v in sorted(self._values.items())]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        k = _key(labels)
+        with self._lock:
+            self._values[k] = self._values.get(k, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        with self._lock:
+            self._values[_key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        k = _key(labels)
+        with self._lock:
+            self._values[k] = self._values.get(k, 0) + amount
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram; per label set: bucket counts, count and sum."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str = "", buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: Any) -> None:
+        k = _key(labels)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(k)
+            if state is None:
+                state = self._values[k] = [[0] * (len(self.buckets) + 1), 0, 0.0]
+            state[0][i] += 1
+            state[1] += 1
+            state[2] += value
+
+    def samples(self) -> List[Dict[str, Any]]:
+        out = []
+        with self._lock:
+            for k, (counts, n, total) in sorted(self._values.items()):
+                cum, running = {}, 0
+                for le, c in zip(self.buckets, counts):
+                    running += c
+                    cum[repr(le)] = running
+                cum["+Inf"] = n
+                out.append({"labels": dict(k), "count": n, "sum": total, "buckets": cum})
+        return out
+
+
+# -------------------------
+#   Registry
+# -------------------------
+
+class Registry:
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def enable(self) -> "Registry":
+        self.enabled = True
+        return self
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        for m in list(self._metrics.values()):
+            m.reset()
+
+    def _get(self, cls: type, name: str, help: str, **kwargs: Any) -> Any:
+        m = self._metrics.get(name)
+        if m is None:
+            with self._lock:
+                m = self._metrics.get(name)
+                if m is None:
+                    m = self._metrics[name] = cls(name, help, **kwargs)
+        if not isinstance(m, cls):
+            raise ValueError(f"metric {name!r} is a {m.kind}, not a {cls.kind}")
+        return m
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        return self._get(Counter, name, help)
+
+    def gauge(self, name: str, help: str = "") -> Gauge:
+        return self._get(Gauge, name, help)
+
+    def histogram(self, name: str, help: str = "", buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, buckets=buckets)
+
+    # ---- export ----
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "created_utc": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "metrics": {
+                name: {"type": m.kind, "help": m.help, "samples": m.samples()}
+                for name, m in sorted(self._metrics.items())
+            },
+        }
+
+    def prometheus_text(self) -> str:
+        return prometheus_text(self.snapshot())
+
+    def write(self, path: str) -> None:
+        """Snapshot to `path`: Prometheus text for *.prom / *.txt, JSON otherwise."""
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            if path.endswith((".prom", ".txt")):
+                f.write(self.prometheus_text())
+            else:
+                json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp, path)
+
+    def serve(self, port: int = 9108, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serve GET /metrics (Prometheus text) from a daemon thread."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(labels: Dict[str, str], extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels.items()) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in items) + "}"
+
+
+def prometheus_text(snapshot: Dict[str, Any]) -> str:
+    """Prometheus text exposition format of a snapshot."""
+    lines: List[str] = []
+    for name, m in snapshot["metrics"].items():
+        if m["help"]:
+            lines.append(f"# HELP {name} {_escape(m['help'])}")
+        lines.append(f"# TYPE {name} {m['type']}")
+        for s in m["samples"]:
+            if m["type"] == "histogram":
+                for le, c in s["buckets"].items():
+                    lines.append(f"{name}_bucket{_labels(s['labels'], ('le', le))} {c}")
+                lines.append(f"{name}_sum{_labels(s['labels'])} {s['sum']!r}")
+                lines.append(f"{name}_count{_labels(s['labels'])} {s['count']}")
+            else:
+                lines.append(f"{name}{_labels(s['labels'])} {s['value']!r}")
+    return "\n".join(lines) + "\n"
+
+
+METRICS = Registry()
+
+
+def _configure_from_env() -> None:
+    path = os.environ.get("AURORA_METRICS", "")
+    port = os.environ.get("AURORA_METRICS_PORT", "")
+    if path:
+        METRICS.enable()
+        atexit.register(METRICS.write, os.path.abspath(path))
+    if port:
+        METRICS.enable()
+        METRICS.serve(int(port))
+
+
+_configure_from_env()
+
+
+def main(argv: List[str]) -> int:
+    if len(argv) > 1:
+        with open(argv[1], "r", encoding="utf-8") as f:
+            sys.stdout.write(prometheus_text(json.load(f)))
+    else:
+        sys.stdout.write(METRICS.prometheus_text())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv))